@@ -0,0 +1,57 @@
+import argparse
+import os
+import resource
+import tempfile
+import time
+from synthetic_data import make_listings
+from process_data import FEATURE_COLUMNS, FINGERPRINT_COLUMNS, extract_chunk
+from feature_cache import row_fingerprints
+from chunked_pipeline import iter_csv_chunks, map_chunks, CsvAppender
+
+# Times the chunked extraction pass (the one a cold feature cache runs) at several
+# worker counts on a synthetic Flipkart-style CSV, checks every run writes the
+# same bytes, and reports peak RSS.
+
+def run(input_path, output_path, chunksize, workers):
+    def jobs():
+        for chunk in iter_csv_chunks(input_path, chunksize):
+            chunk['Source'] = 'Flipkart'
+            chunk['fingerprint'] = row_fingerprints(chunk, FINGERPRINT_COLUMNS)
+            yield chunk, 'Flipkart'
+
+    out = CsvAppender(output_path, ['fingerprint'] + FEATURE_COLUMNS)
+    start = time.perf_counter()
+    for df in map_chunks(extract_chunk, jobs(), workers):
+        out.write(df)
+    out.close()
+    return time.perf_counter() - start
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling check for the chunked cleaning pipeline.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'flipkart_laptops.csv')
+        print(f"Generating {args.rows:,} synthetic listings...")
+        make_listings(args.rows)[['Title', 'Price', 'Rating', 'Features']].to_csv(input_path, index=False)
+
+        print(f"{'workers':>8} {'seconds':>9} {'rows/sec':>12} {'speedup':>8}")
+        baseline = expected = None
+        for workers in args.workers:
+            output_path = os.path.join(tmp, f'cleaned_{workers}.csv')
+            elapsed = run(input_path, output_path, args.chunksize, workers)
+            with open(output_path, 'rb') as f:
+                data = f.read()
+            expected = expected or data
+            assert data == expected, f"{workers} workers wrote a different file"
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>12,.0f} {baseline / elapsed:>7.1f}x")
+        print(f"Peak RSS of any process: {peak_rss_mb():.0f} MB (cores available: {os.cpu_count()})")
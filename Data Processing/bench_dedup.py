@@ -0,0 +1,72 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from synthetic_data import make_listings
+from process_data import extract_features
+from dedup import MinHasher, title_signatures, block_keys, cluster
+
+# Plants near-duplicates (re-cased, re-punctuated or slightly extended copies of
+# a listing, as the same laptop looks on another site or search page) into
+# synthetic data, then reports how many the LSH dedup finds, how many distinct
+# listings it merges by mistake, and listings/sec as the data grows. Base rows
+# whose titles have the same word set count as one listing; merges still counted
+# as mistakes are distinct synthetic rows with identical features whose titles
+# differ by one token (SSD vs HDD, "8GB" vs "8 GB").
+
+EXTRA_WORDS = ['Renewed', '2024', 'Laptop', 'Thin', 'Backlit', 'Keyboard']
+
+def planted(n, dup_share=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    base = make_listings(n, seed=seed, irregular=0.0)
+    base['group'] = np.arange(n)
+    picks = rng.integers(0, n, int(n * dup_share))
+    dups = base.iloc[picks].copy()
+    title = dups['Title'].astype(str)
+    style = rng.integers(0, 3, len(dups))
+    extra = np.asarray(EXTRA_WORDS, dtype=object)[rng.integers(0, len(EXTRA_WORDS), len(dups))]
+    title = np.where(style == 0, title.str.upper(), np.where(style == 1, title.str.replace(' (', ', ', regex=False),
+                                                             title + ' ' + extra))
+    dups['Title'] = title
+    dups['Combined_Text'] = dups['Title']
+    df = pd.concat([base, dups], ignore_index=True).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+    df['Source'] = 'Amazon'
+    df['Combined_Text'] = df['Title']
+    df = extract_features(df)
+
+    # Ground truth: the planted group, with identical base titles merged
+    words = base['Title'].astype(str).str.lower().str.replace(r'[^a-z0-9. ]', ' ', regex=True).str.split()
+    base_key = words.apply(lambda w: ' '.join(sorted(set(w))))
+    df['truth'] = pd.factorize(base_key.to_numpy()[df['group'].to_numpy()])[0]
+    return df
+
+def pair_counts(labels, truth):
+    # Pairs of rows put together, and how many of those share a planted group
+    frame = pd.DataFrame({'label': labels, 'truth': truth})
+    together = (frame.groupby('label').size() ** 2 - frame.groupby('label').size()).sum() // 2
+    same = frame.groupby(['label', 'truth']).size()
+    correct = (same ** 2 - same).sum() // 2
+    truth_sizes = frame.groupby('truth').size()
+    expected = (truth_sizes ** 2 - truth_sizes).sum() // 2
+    return together, correct, expected
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quality and throughput of near-duplicate detection.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 300_000, 1_000_000])
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+
+    hasher = MinHasher()
+    print(f"{'listings':>10} {'clusters':>10} {'recall':>8} {'precision':>10} {'seconds':>8} {'listings/sec':>13}")
+    for n in args.rows:
+        df = planted(int(n / 1.3))
+        start = time.perf_counter()
+        keys = block_keys(df)
+        sig = title_signatures(hasher, df['Title'])
+        labels, _, _ = cluster(keys, sig, args.threshold)
+        elapsed = time.perf_counter() - start
+        together, correct, expected = pair_counts(labels, df['truth'].to_numpy())
+        recall = correct / expected if expected else 1.0
+        precision = correct / together if together else 1.0
+        print(f"{len(df):>10,} {len(np.unique(labels)):>10,} {recall:>8.3f} {precision:>10.3f} "
+              f"{elapsed:>8.2f} {len(df) / elapsed:>13,.0f}")
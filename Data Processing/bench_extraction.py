@@ -0,0 +1,52 @@
+import argparse
+import time
+import pandas as pd
+from process_data import (extract_brand, extract_ram, extract_storage, extract_processor, extract_gpu,
+                          extract_display, clean_price, extract_features, clean_price_series)
+from synthetic_data import make_listings
+
+# Rows/sec benchmark: row-wise Series.apply extractors versus the vectorized
+# extract_features / clean_price_series used by clean_data. Parity on edge cases
+# is tested in tests/test_extraction_parity.py; here it is checked again at scale.
+
+COLUMNS = ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch', 'Price']
+
+def rowwise(df):
+    df['Brand'] = df['Title'].apply(extract_brand)
+    df['RAM'] = df['Combined_Text'].apply(extract_ram)
+    df['Storage_GB'] = df['Combined_Text'].apply(extract_storage)
+    df['Processor'] = df['Combined_Text'].apply(extract_processor)
+    df['GPU'] = df['Combined_Text'].apply(extract_gpu)
+    df['Display_Inch'] = df['Combined_Text'].apply(extract_display)
+    df['Price'] = df['Price'].apply(clean_price)
+    return df
+
+def vectorized(df):
+    df = extract_features(df)
+    df['Price'] = clean_price_series(df['Price'])
+    return df
+
+def timed(func, df):
+    start = time.perf_counter()
+    out = func(df.copy())
+    return out, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare row-wise and vectorized feature extraction.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} synthetic listings...")
+    df = make_listings(args.rows, seed=args.seed)
+
+    expected, t_row = timed(rowwise, df)
+    got, t_vec = timed(vectorized, df)
+
+    for col in COLUMNS:
+        pd.testing.assert_series_equal(got[col], expected[col], check_exact=True)
+    assert got[COLUMNS].to_csv(index=False) == expected[COLUMNS].to_csv(index=False)
+    print("Parity: vectorized output identical to row-wise apply")
+
+    print(f"Row-wise:   {t_row:7.2f}s  {len(df) / t_row:12,.0f} rows/sec")
+    print(f"Vectorized: {t_vec:7.2f}s  {len(df) / t_vec:12,.0f} rows/sec  ({t_row / t_vec:.1f}x)")
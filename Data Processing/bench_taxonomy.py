@@ -0,0 +1,60 @@
+import argparse
+import random
+import time
+import pyarrow as pa
+import pyarrow.compute as pc
+from taxonomy import Taxonomy, PROCESSOR_TAXONOMY, GPU_TAXONOMY
+from synthetic_data import make_listings
+
+# Checks that the single-scan and Arrow classifiers agree with the rule-by-rule
+# definition, then times all three as the taxonomy grows to hundreds of SKUs.
+
+def fragment_texts(taxonomy, n, seed=0):
+    # Strings glued together from keyword pieces, to hit overlapping keywords
+    rng = random.Random(seed)
+    words = [k for _, keywords in taxonomy.rules for k in keywords]
+    pieces = words + [w[:len(w) // 2] for w in words] + [w[len(w) // 2:] for w in words] + [" ", "x", "laptop "]
+    return [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 8))) for _ in range(n)]
+
+def check(taxonomy, texts, name):
+    expected = [taxonomy.classify_reference(t) for t in texts]
+    scanned = [taxonomy.classify(t) for t in texts]
+    lower = pc.ascii_lower(pa.array(texts, type=pa.string()))
+    arrow = list(taxonomy.classify_arrow(lower))
+    assert scanned == expected, f"{name}: single-scan classifier disagrees with the rule order"
+    assert arrow == expected, f"{name}: Arrow classifier disagrees with the rule order"
+
+def synthetic_taxonomy(n_rules, seed=0):
+    rng = random.Random(seed)
+    rules = [(f"SKU {i}", [f"sku{i:04d}{rng.choice('abcdefgh')}", f"model {i:04d}"]) for i in range(n_rules)]
+    return Taxonomy(rules, ('Other', 'Unknown'))
+
+def rate(func, texts):
+    start = time.perf_counter()
+    func(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity and scaling check for the keyword taxonomies.")
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    listings = make_listings(args.rows)['Combined_Text'].dropna().tolist()
+    for name, taxonomy in (('Processor', PROCESSOR_TAXONOMY), ('GPU', GPU_TAXONOMY)):
+        check(taxonomy, listings, name)
+        check(taxonomy, fragment_texts(taxonomy, 50_000), name)
+    print("Parity: single-scan and Arrow classifiers match the rule order")
+
+    rng = random.Random(1)
+    print(f"\n{'rules':>6} {'rule-by-rule':>14} {'single scan':>14} {'arrow':>14}   (rows/sec)")
+    for n_rules in (16, 64, 256, 1024):
+        taxonomy = synthetic_taxonomy(n_rules)
+        keywords = [k for _, ks in taxonomy.rules for k in ks]
+        texts = [f"Laptop {rng.choice(listings)[:60]} {rng.choice(keywords) if rng.random() < 0.8 else ''}"
+                 for _ in range(args.rows)]
+        check(taxonomy, texts[:5000], f"{n_rules} rules")
+        lower = pc.ascii_lower(pa.array(texts, type=pa.string()))
+        reference = rate(lambda ts: [taxonomy.classify_reference(t) for t in ts], texts)
+        scanned = rate(lambda ts: [taxonomy.classify(t) for t in ts], texts)
+        arrow = rate(lambda ts: taxonomy.classify_arrow(lower), texts)
+        print(f"{n_rules:>6} {reference:>14,.0f} {scanned:>14,.0f} {arrow:>14,.0f}")
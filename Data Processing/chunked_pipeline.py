@@ -0,0 +1,63 @@
+import pandas as pd
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Building blocks for processing scraped CSVs that do not fit comfortably in memory:
+# read fixed-size chunks, run a transform on each chunk in a process pool, and
+# append results to the output as they come back, in input order. At most
+# `workers * 2` chunks are in flight, so peak memory is bounded by the chunk size.
+
+DEFAULT_CHUNKSIZE = 100_000
+
+def iter_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None):
+    # Every column is read as text so all chunks see the same dtypes; pandas
+    # would otherwise infer int/float/object independently per chunk
+    if not os.path.exists(path):
+        return
+    yield from pd.read_csv(path, dtype=str, chunksize=chunksize, usecols=usecols)
+
+def csv_columns(path):
+    if not os.path.exists(path):
+        return []
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+def map_chunks(func, jobs, workers=None):
+    # jobs yields argument tuples; results come back in the order jobs were given.
+    # workers=1 runs in-process (handy for debugging and small inputs).
+    if workers == 1:
+        for args in jobs:
+            yield func(*args)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for args in jobs:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvAppender:
+    # Writes chunks to one CSV (header once) via a temp file renamed at the end,
+    # so readers never see a half-written output
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.tmp = path + '.tmp'
+        self.rows = 0
+        pd.DataFrame(columns=columns).to_csv(self.tmp, index=False)
+
+    def write(self, df):
+        df.reindex(columns=self.columns).to_csv(self.tmp, index=False, header=False, mode='a')
+        self.rows += len(df)
+
+    def close(self):
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
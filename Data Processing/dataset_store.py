@@ -0,0 +1,167 @@
+import argparse
+import datetime
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Typed, partitioned Parquet store for the cleaned datasets, replacing the CSV
+# hand-off between cleaning, v2 processing and training. Layout (hive style):
+#   <path>/_common_metadata                         schema + row count, no data
+#   <path>/Source=Flipkart/scrape_date=2026-10-18/part-00000.parquet
+# Loads read only the requested columns, and filters are pushed down to skip
+# whole partitions and row groups; the schema comes from _common_metadata alone.
+
+PARTITION_COLUMNS = ['Source', 'scrape_date']
+PARTITIONING = ds.partitioning(pa.schema([('Source', pa.string()), ('scrape_date', pa.string())]), flavor='hive')
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+# Known columns and their stored types; anything else is kept as pandas infers it
+SCHEMA = pa.schema([
+    ('Title', pa.string()),
+    ('Price', pa.float64()),
+    ('Rating', pa.string()),
+    ('Features', pa.string()),
+    ('Combined_Text', pa.string()),
+    ('Brand', CATEGORY),
+    ('RAM', pa.int16()),
+    ('Storage_GB', pa.int32()),
+    ('Processor', CATEGORY),
+    ('GPU', CATEGORY),
+    ('Display_Inch', pa.float64()),
+])
+
+def to_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, name in enumerate(table.column_names):
+        if name in SCHEMA.names:
+            # Safe cast: a fractional RAM value or a non-number Price raises
+            table = table.set_column(i, SCHEMA.field(name), table.column(i).cast(SCHEMA.field(name).type))
+    return table
+
+def file_date(path):
+    # Scrape date of a raw export, from its modification time
+    return datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+
+class DatasetWriter:
+    # Appends DataFrame chunks as Parquet files under their partition
+    # directories. Like CsvAppender, it writes to <path>.tmp and swaps it in on
+    # close(), so readers never see a half-written dataset.
+    def __init__(self, path, columns=None, scrape_date=None):
+        self.path = path
+        self.tmp = path + '.tmp'
+        self.columns = [c for c in columns if c not in PARTITION_COLUMNS] if columns else None
+        self.scrape_date = scrape_date or datetime.date.today().isoformat()
+        self.schema = None
+        self.parts = 0
+        self.rows = 0
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+
+    def write(self, df):
+        if 'Source' not in df.columns:
+            df = df.assign(Source='Unknown')
+        if 'scrape_date' not in df.columns:
+            df = df.assign(scrape_date=self.scrape_date)
+        for (source, date), part in df.groupby(PARTITION_COLUMNS, sort=False, observed=True):
+            part = part.drop(columns=PARTITION_COLUMNS)
+            if self.columns:
+                part = part.reindex(columns=self.columns)
+            table = to_table(part)
+            folder = os.path.join(self.tmp, f'Source={source}', f'scrape_date={date}')
+            os.makedirs(folder, exist_ok=True)
+            pq.write_table(table, os.path.join(folder, f'part-{self.parts:05d}.parquet'))
+            self.schema = table.schema if self.schema is None else pa.unify_schemas(
+                [self.schema, table.schema], promote_options='permissive')
+            self.parts += 1
+        self.rows += len(df)
+
+    def close(self):
+        schema = (self.schema or pa.schema([])).remove_metadata().with_metadata({'num_rows': str(self.rows)})
+        pq.write_metadata(schema, os.path.join(self.tmp, '_common_metadata'))
+        old = self.path + '.old'
+        if os.path.exists(self.path):
+            os.replace(self.path, old)
+        os.replace(self.tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def is_dataset(path):
+    return os.path.exists(os.path.join(path, '_common_metadata'))
+
+def read_schema(path):
+    # Metadata only: the stored columns plus the partition columns
+    schema = pq.read_schema(os.path.join(path, '_common_metadata'))
+    fields = list(schema) + [f for f in PARTITIONING.schema if f.name not in schema.names]
+    return pa.schema(fields, metadata=schema.metadata)
+
+def num_rows(path):
+    return int(read_schema(path).metadata[b'num_rows'])
+
+def open_dataset(path):
+    return ds.dataset(path, schema=read_schema(path), format='parquet', partitioning=PARTITIONING)
+
+def load(path, columns=None, filters=None):
+    # filters use the pandas/pyarrow DNF form, e.g. [('Source', '==', 'Flipkart')]
+    expression = pq.filters_to_expression(filters) if filters else None
+    return open_dataset(path).to_table(columns=columns, filter=expression).to_pandas()
+
+def iter_chunks(path, chunksize, columns=None):
+    for batch in open_dataset(path).to_batches(columns=columns, batch_size=chunksize):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def head(path, n=5, columns=None):
+    return open_dataset(path).head(n, columns=columns).to_pandas()
+
+def import_csv(csv_path, path, chunksize=100_000):
+    columns = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    writer = DatasetWriter(path, columns, scrape_date=file_date(csv_path))
+    try:
+        for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunksize):
+            # Text in, typed columns out: numbers are parsed here once
+            for col in ('Price', 'RAM', 'Storage_GB', 'Display_Inch'):
+                if col in chunk.columns:
+                    chunk[col] = pd.to_numeric(chunk[col])
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return writer.rows
+
+def export_csv(path, csv_path, columns=None):
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(path, 100_000, columns)):
+        chunk.to_csv(csv_path, index=False, header=i == 0, mode='w' if i == 0 else 'a')
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and convert partitioned Parquet datasets.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    schema_cmd = commands.add_parser('schema', help="Print columns, types and row count (metadata only)")
+    schema_cmd.add_argument('path')
+    import_cmd = commands.add_parser('import', help="Convert a CSV into a dataset")
+    import_cmd.add_argument('csv')
+    import_cmd.add_argument('path')
+    export_cmd = commands.add_parser('export', help="Write a dataset out as one CSV")
+    export_cmd.add_argument('path')
+    export_cmd.add_argument('csv')
+    args = parser.parse_args()
+
+    if args.command == 'schema':
+        for field in read_schema(args.path):
+            print(f"{field.name:<15} {field.type}")
+        print(f"{num_rows(args.path)} rows")
+    elif args.command == 'import':
+        print(f"Imported {import_csv(args.csv, args.path)} rows into {args.path}")
+    else:
+        print(f"Exported {export_csv(args.path, args.csv)} rows to {args.csv}")
@@ -0,0 +1,184 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from dataset_store import DatasetWriter, iter_chunks, read_schema
+
+# Near-duplicate listing detection for the cleaned dataset. The same laptop shows
+# up on both sites and on several search pages; each group of such listings is
+# collapsed to its first row, with the group's price statistics attached.
+#
+# Listings are only compared within a block of identical extracted features
+# (the price model's whole input, so a duplicate would be a repeated training
+# row). Inside a block, titles are compared by the
+# Jaccard similarity of their word sets, estimated with MinHash signatures.
+# LSH banding puts signatures that agree on a whole band into the same bucket;
+# only bucket members are checked against each other, so the cost is linear in
+# the number of listings instead of quadratic.
+
+BLOCK_COLUMNS = ['Brand', 'Processor', 'RAM', 'Storage_GB', 'GPU', 'Display_Inch']
+NUM_PERM = 32
+BANDS = 8
+THRESHOLD = 0.8
+STAT_COLUMNS = ['Listings', 'Price_Min', 'Price_Max', 'Price_Median']
+
+_PRIME = np.uint64(4294967311)
+_LOW32 = np.uint64(0xffffffff)
+_EMPTY = np.iinfo(np.uint32).max
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        # Universal hashes (a * x + b) mod p over 32-bit token hashes
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2**32 - 1, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2**32 - 1, num_perm, dtype=np.uint64)
+
+    def tokens(self, titles):
+        # Lowercased word tokens of an Arrow string array, dictionary encoded:
+        # (distinct token hashes, token -> distinct index, token -> title row)
+        text = pc.replace_substring_regex(pc.ascii_lower(titles), r'[^a-z0-9. ]', ' ')
+        lists = pc.ascii_split_whitespace(text)
+        parents = pc.list_parent_indices(lists).to_numpy()
+        words = pc.dictionary_encode(pc.list_flatten(lists))
+        vocab = pd.util.hash_array(words.dictionary.to_numpy(zero_copy_only=False))
+        return vocab, words.indices.to_numpy(), parents
+
+    def signatures(self, titles):
+        # (rows, num_perm) uint32 signatures; rows without any token stay _EMPTY
+        sig = np.full((len(titles), self.num_perm), _EMPTY, dtype=np.uint32)
+        vocab, index, parents = self.tokens(titles)
+        if not len(index):
+            return sig
+        # Every hash function applied once per distinct token; per function,
+        # gather over the tokens and take the minimum within each title
+        permuted = (((vocab & _LOW32)[None, :] * self.a[:, None] + self.b[:, None]) % _PRIME).astype(np.uint32)
+        starts = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+        docs = parents[starts]
+        for j in range(self.num_perm):
+            sig[docs, j] = np.minimum.reduceat(permuted[j][index], starts)
+        return sig
+
+
+def title_signatures(hasher, titles):
+    # Repeated titles (the same listing on several pages) are hashed once
+    encoded = pc.dictionary_encode(pa.array(titles, from_pandas=True, type=pa.string()))
+    sig = hasher.signatures(encoded.dictionary)
+    rows = encoded.indices.to_numpy(zero_copy_only=False)
+    out = np.full((len(titles), hasher.num_perm), _EMPTY, dtype=np.uint32)
+    present = encoded.indices.is_valid().to_numpy(zero_copy_only=False)
+    out[present] = sig[rows[present].astype(np.int64)]
+    return out
+
+def block_keys(df):
+    # Hashed by value, so category codes or chunk boundaries don't matter
+    return pd.util.hash_pandas_object(df[BLOCK_COLUMNS], index=False).to_numpy()
+
+def candidate_pairs(keys, sig, bands=BANDS):
+    # Rows sharing a block key and one whole band land in the same bucket; each
+    # bucket contributes (first member, other member) pairs
+    rows = np.flatnonzero((sig != _EMPTY).any(axis=1))
+    width = sig.shape[1] // bands
+    left, right = [], []
+    for band in range(bands):
+        bucket = keys[rows].copy()
+        for col in sig[rows, band * width:(band + 1) * width].T:
+            bucket = (bucket * np.uint64(1000003)) ^ col.astype(np.uint64)
+        order = np.argsort(bucket, kind='stable')
+        ordered = bucket[order]
+        new_group = np.r_[True, ordered[1:] != ordered[:-1]]
+        leader = order[np.flatnonzero(new_group)[np.cumsum(new_group) - 1]]
+        paired = leader != order
+        left.append(rows[leader[paired]])
+        right.append(rows[order[paired]])
+    # Bands often propose the same pair; keep each once
+    n = np.int64(len(keys))
+    pairs = np.unique(np.concatenate(left).astype(np.int64) * n + np.concatenate(right))
+    return pairs // n, pairs % n
+
+def cluster(keys, sig, threshold=THRESHOLD, bands=BANDS):
+    # Cluster label per row: connected components of the verified pairs
+    left, right = candidate_pairs(keys, sig, bands)
+    similar = (keys[left] == keys[right]) & ((sig[left] == sig[right]).mean(axis=1) >= threshold)
+    n = len(keys)
+    graph = coo_matrix((np.ones(int(similar.sum()), dtype=np.int8), (left[similar], right[similar])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels, len(left), int(similar.sum())
+
+def cluster_stats(labels, price):
+    # One row per cluster, indexed by label: size and price spread; the first
+    # row of each cluster (in input order) is its representative
+    first = np.unique(labels, return_index=True)[1]
+    stats = pd.Series(price).groupby(labels).agg(['size', 'min', 'max', 'median'])
+    stats.columns = STAT_COLUMNS
+    stats['Listings'] = stats['Listings'].astype('int32')
+    return first, stats
+
+
+def dedup_dataset(input_path, output_path, threshold=THRESHOLD, chunksize=100_000, num_perm=NUM_PERM, bands=BANDS):
+    hasher = MinHasher(num_perm)
+    schema = read_schema(input_path)
+    text = 'Title' if 'Title' in schema.names else 'Combined_Text'
+
+    # Pass 1: block key, title signature and price for every row
+    start = time.perf_counter()
+    keys, sigs, prices = [], [], []
+    for chunk in iter_chunks(input_path, chunksize, BLOCK_COLUMNS + [text, 'Price']):
+        keys.append(block_keys(chunk))
+        sigs.append(title_signatures(hasher, chunk[text]))
+        prices.append(chunk['Price'].to_numpy(dtype=float))
+    if not keys:
+        print(f"{input_path} is empty; nothing to deduplicate")
+        return
+    keys, sig, price = np.concatenate(keys), np.concatenate(sigs), np.concatenate(prices)
+    labels, candidates, matched = cluster(keys, sig, threshold, bands)
+    first, stats = cluster_stats(labels, price)
+    elapsed = time.perf_counter() - start
+
+    # Pass 2: stream the rows again, keeping cluster representatives. Price
+    # becomes the cluster median so every listing of a laptop counts once.
+    keep = np.zeros(len(labels), dtype=bool)
+    keep[first] = True
+    columns = [c for c in schema.names if c not in STAT_COLUMNS] + STAT_COLUMNS
+    out = DatasetWriter(output_path, columns)
+    offset = 0
+    try:
+        for chunk in iter_chunks(input_path, chunksize):
+            rows = slice(offset, offset + len(chunk))
+            offset += len(chunk)
+            chunk = chunk[keep[rows]]
+            group = stats.loc[labels[rows][keep[rows]]]
+            for col in STAT_COLUMNS:
+                chunk[col] = group[col].to_numpy()
+            chunk['Price'] = chunk['Price_Median']
+            out.write(chunk)
+    except BaseException:
+        out.abort()
+        raise
+    out.close()
+
+    sizes = stats['Listings']
+    print(f"Dedup: {len(labels)} listings -> {len(stats)} clusters "
+          f"({len(labels) - len(stats)} duplicates removed, {(sizes > 1).sum()} clusters with duplicates, "
+          f"largest {sizes.max()})")
+    print(f"  {candidates} candidate pairs from LSH, {matched} above similarity {threshold}")
+    print(f"  Clustering: {elapsed:.2f}s ({len(labels) / elapsed:,.0f} listings/sec)")
+    print(f"Deduplicated data saved to {output_path}")
+    return labels
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate listings in a cleaned dataset.")
+    parser.add_argument('--input', default=os.path.join(base_dir, 'data', 'cleaned_laptops'))
+    parser.add_argument('--output', default=os.path.join(base_dir, 'data', 'cleaned_laptops_dedup'))
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="Title similarity for a duplicate")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Rows per chunk")
+    args = parser.parse_args()
+    dedup_dataset(args.input, args.output, args.threshold, args.chunksize)
@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+
+# Persistent cache of extracted features keyed by a 64-bit fingerprint of the
+# raw row, so a re-run only extracts rows that are new or changed since the last
+# one. Layout:
+#   <path>/_meta.json           version the cached values were computed with
+#   <path>/part-00000.parquet   fingerprint + feature columns, one part per run
+# A version mismatch (extractor or taxonomy changed) discards every part.
+
+MAX_PARTS = 16
+
+def row_fingerprints(df, columns):
+    # Vectorized hash of the given columns (absent columns hash as missing).
+    # Inputs are read with dtype=str, so the same raw row always hashes the same.
+    return pd.util.hash_pandas_object(df.reindex(columns=columns).astype(str), index=False).to_numpy()
+
+
+class FeatureCache:
+    def __init__(self, path, columns, version):
+        # path=None keeps the cache in memory for this run only
+        self.path = path
+        self.columns = list(columns)
+        self.version = {'version': str(version), 'pandas': pd.__version__}
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.parts = 0
+        self.frame = self._load()
+        self._reindex()
+
+    def _meta_path(self):
+        return os.path.join(self.path, '_meta.json')
+
+    def _part_files(self):
+        return sorted(f for f in os.listdir(self.path) if f.startswith('part-') and f.endswith('.parquet'))
+
+    def _empty(self):
+        return pd.DataFrame({'fingerprint': np.array([], dtype=np.uint64), **{c: [] for c in self.columns}})
+
+    def _load(self):
+        if self.path is None:
+            return self._empty()
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            if meta == self.version:
+                parts = self._part_files()
+                self.parts = len(parts)
+                if parts:
+                    frame = pd.concat([pd.read_parquet(os.path.join(self.path, p)) for p in parts],
+                                      ignore_index=True)
+                    return frame.drop_duplicates('fingerprint', keep='last', ignore_index=True)
+                return self._empty()
+            print(f"Feature cache at {self.path} was built with {meta}; rebuilding for {self.version}")
+        self.clear()
+        return self._empty()
+
+    def clear(self):
+        if self.path is None:
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        with open(self._meta_path(), 'w') as f:
+            json.dump(self.version, f)
+        self.parts = 0
+
+    def _reindex(self):
+        self.index = pd.Index(self.frame['fingerprint'].to_numpy())
+
+    def missing(self, fingerprints):
+        # Mask of fingerprints with nothing cached; counted as this run's hits/misses
+        mask = self.index.get_indexer(fingerprints) < 0
+        self.misses += int(mask.sum())
+        self.hits += int(len(mask) - mask.sum())
+        return mask
+
+    def add(self, frame):
+        # frame: 'fingerprint' plus the feature columns, for rows just extracted
+        if len(frame):
+            self.pending.append(frame[['fingerprint'] + self.columns])
+
+    def commit(self, live=None):
+        # Fold this run's extractions in and persist them as one new part. With
+        # `live` (every fingerprint seen this run) the parts are also compacted
+        # into one, dropping stale rows, once they pile up.
+        if self.pending:
+            new = pd.concat(self.pending, ignore_index=True).drop_duplicates('fingerprint', keep='last')
+            self.pending = []
+            self.frame = pd.concat([self.frame, new], ignore_index=True) if len(self.frame) else new.reset_index(drop=True)
+            self._reindex()
+            if self.path is not None:
+                new.to_parquet(os.path.join(self.path, f'part-{self.parts:05d}.parquet'), index=False)
+                self.parts += 1
+
+        if self.path is not None and live is not None and self.parts > MAX_PARTS:
+            keep = self.frame['fingerprint'].isin(np.unique(live))
+            self.frame = self.frame[keep].reset_index(drop=True)
+            self._reindex()
+            self.clear()
+            self.frame.to_parquet(os.path.join(self.path, 'part-00000.parquet'), index=False)
+            self.parts = 1
+
+    def get(self, fingerprints, index=None, columns=None):
+        # Cached features for these fingerprints, in order; all must be present
+        pos = self.index.get_indexer(fingerprints)
+        if (pos < 0).any():
+            raise KeyError(f"{int((pos < 0).sum())} fingerprints are not in the feature cache")
+        out = self.frame[columns or self.columns].iloc[pos]
+        out.index = index if index is not None else pd.RangeIndex(len(pos))
+        return out
+
+    def report(self):
+        total = self.hits + self.misses
+        share = self.hits / total if total else 0.0
+        print(f"Feature cache: {self.hits} hits, {self.misses} extracted ({share:.1%} reused), "
+              f"{len(self.frame)} rows cached")
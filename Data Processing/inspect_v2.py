@@ -1,4 +1,10 @@
 import pandas as pd
-df = pd.read_csv('data/laptops_cleaned_v2.csv')
-print("Columns:", df.columns.tolist())
-print(df.head(2))
+from dataset_store import is_dataset, read_schema, head
+# Metadata only for the dataset; the CSV fallback reads just two rows
+if is_dataset('data/laptops_cleaned_v2'):
+    print("Columns:", read_schema('data/laptops_cleaned_v2').names)
+    print(head('data/laptops_cleaned_v2', 2))
+else:
+    df = pd.read_csv('data/laptops_cleaned_v2.csv', nrows=2)
+    print("Columns:", df.columns.tolist())
+    print(df.head(2))
@@ -1,4 +1,9 @@
 import pandas as pd
-df = pd.read_csv('data/laptops_cleaned_v2.csv')
-for col in df.columns:
+from dataset_store import is_dataset, read_schema
+# Column names come from the dataset footer (or the CSV header), not the data
+if is_dataset('data/laptops_cleaned_v2'):
+    columns = read_schema('data/laptops_cleaned_v2').names
+else:
+    columns = pd.read_csv('data/laptops_cleaned_v2.csv', nrows=0).columns
+for col in columns:
     print(col)
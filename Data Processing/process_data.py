@@ -1,6 +1,23 @@
+import argparse
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
 import os
+import sys
+from taxonomy import TAXONOMY_VERSION, PROCESSOR_TAXONOMY, GPU_TAXONOMY, classify_processor, classify_gpu
+from chunked_pipeline import DEFAULT_CHUNKSIZE, iter_csv_chunks, csv_columns, map_chunks, CsvAppender
+from feature_cache import FeatureCache, row_fingerprints
+from dataset_store import DatasetWriter, file_date
+from dedup import dedup_dataset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from instrumentation import span, path_size
+
+# Bump when an extractor below changes, so cached features are recomputed
+EXTRACTOR_VERSION = 2
 
 def extract_ram(text):
     if not isinstance(text, str): return None
@@ -22,26 +39,13 @@ def extract_storage(text):
     return 0
 
 def extract_processor(text):
-    if not isinstance(text, str): return 'Unknown'
-    text = text.lower()
-    if 'i9' in text: return 'Intel Core i9'
-    if 'i7' in text: return 'Intel Core i7'
-    if 'i5' in text: return 'Intel Core i5'
-    if 'i3' in text: return 'Intel Core i3'
-    if 'm1' in text: return 'Apple M1'
-    if 'm2' in text: return 'Apple M2'
-    if 'm3' in text: return 'Apple M3'
-    if 'ryzen 9' in text: return 'AMD Ryzen 9'
-    if 'ryzen 7' in text: return 'AMD Ryzen 7'
-    if 'ryzen 5' in text: return 'AMD Ryzen 5'
-    if 'ryzen 3' in text: return 'AMD Ryzen 3'
-    if 'celeron' in text: return 'Intel Celeron'
-    if 'pentium' in text: return 'Intel Pentium'
-    return 'Other'
+    return classify_processor(text)
 
 def extract_brand(text):
     if not isinstance(text, str): return 'Other'
-    return text.split()[0].title()
+    words = text.split()
+    if not words: return 'Other'
+    return words[0].title()
 
 def extract_display(text):
     if not isinstance(text, str): return None
@@ -53,97 +57,367 @@ def extract_display(text):
         return round(val, 1)
     return None
 
-def clean_data():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(base_dir, 'data')
-    
-    # Load files
-    amazon_file = os.path.join(data_dir, 'amazon_laptops.csv')
-    flipkart_file = os.path.join(data_dir, 'flipkart_laptops.csv')
-    
-    df_amazon = pd.read_csv(amazon_file) if os.path.exists(amazon_file) else pd.DataFrame()
-    df_flipkart = pd.read_csv(flipkart_file) if os.path.exists(flipkart_file) else pd.DataFrame()
-    
-    print("Amazon Columns:", df_amazon.columns)
-    print("Flipkart Columns:", df_flipkart.columns)
-    
-    # Process Amazon
-    if not df_amazon.empty:
-        if 'Title' not in df_amazon.columns:
-            print("Amazon data missing Title column!")
-        else:
-            df_amazon['Source'] = 'Amazon'
-        # Amazon features are all in Title
-        df_amazon['Combined_Text'] = df_amazon['Title'] 
-        
-    # Process Flipkart
-    if not df_flipkart.empty:
-        df_flipkart['Source'] = 'Flipkart'
-        df_flipkart['Combined_Text'] = df_flipkart['Title'].astype(str) + " " + df_flipkart['Features'].astype(str)
-        
-    # Combine
-    df = pd.concat([df_amazon, df_flipkart], ignore_index=True)
-    
-    # Feature Engineering
-    df['Brand'] = df['Title'].apply(extract_brand)
-    df['RAM'] = df['Combined_Text'].apply(extract_ram)
-    df['Storage_GB'] = df['Combined_Text'].apply(extract_storage)
-    df['Processor'] = df['Combined_Text'].apply(extract_processor)
-    
-    # Extract GPU
-    def extract_gpu(text):
-        if not isinstance(text, str):
-            return "Other"
-        text = text.lower()
-        if 'rtx 4090' in text: return 'NVIDIA RTX 4090'
-        if 'rtx 4080' in text: return 'NVIDIA RTX 4080'
-        if 'rtx 4070' in text: return 'NVIDIA RTX 4070'
-        if 'rtx 4060' in text: return 'NVIDIA RTX 4060'
-        if 'rtx 4050' in text: return 'NVIDIA RTX 4050'
-        if 'rtx 3080' in text: return 'NVIDIA RTX 3080'
-        if 'rtx 3070' in text: return 'NVIDIA RTX 3070'
-        if 'rtx 3060' in text: return 'NVIDIA RTX 3060'
-        if 'rtx 3050' in text: return 'NVIDIA RTX 3050'
-        if 'rtx 2050' in text: return 'NVIDIA RTX 2050'
-        if 'gtx 1650' in text: return 'NVIDIA GTX 1650'
-        if 'intel arc' in text: return 'Intel Arc'
-        if 'iris xe' in text or 'intel iris' in text: return 'Intel Iris Xe'
-        if 'uhd graphics' in text or 'intel uhd' in text: return 'Intel UHD'
-        if 'radeon' in text: return 'AMD Radeon'
-        if 'm1' in text or 'm2' in text or 'm3' in text: return 'Apple Silicon GPU'
-        return "Integrated/Other"
-
-    df['GPU'] = df['Combined_Text'].apply(extract_gpu)
-
-    df['Display_Inch'] = df['Combined_Text'].apply(extract_display)
-    
-    # Clean Price
-    def clean_price(x):
-        if pd.isna(x): return None
-        if isinstance(x, (int, float)): return x
-        x = str(x).replace('₹', '').replace(',', '').replace('.', '')
-        try:
-            return float(x)
-        except:
+def extract_gpu(text):
+    return classify_gpu(text)
+
+def clean_price(x):
+    if pd.isna(x): return None
+    if isinstance(x, (int, float)): return x
+    x = str(x).replace('₹', '').replace(',', '').replace('.', '')
+    try:
+        return float(x)
+    except:
+        return None
+
+# Vectorized versions of the extractors above, used by clean_data. Each returns
+# exactly what Series.apply(<extractor>) would. Pure-ASCII rows (nearly all of a
+# scrape) are processed column-at-a-time with Arrow compute kernels and RE2 patterns
+# spelled to match Python's re on ASCII text; the few rows with other characters
+# go through the scalar extractor, so Unicode digits/whitespace behave as before.
+# Processor and GPU keywords live in taxonomy.py.
+
+# Python's \s on ASCII also covers \v and \x1c-\x1f, RE2's does not
+_WS = r'[ \t\n\r\f\v\x1c-\x1f]'
+RAM_PATTERN = r'(?i)(?P<n>[0-9]+)' + _WS + r'*GB'
+STORAGE_PATTERN = r'(?i)(?P<n>[0-9]+)' + _WS + r'*(?P<unit>GB|TB)' + _WS + r'*(?:SSD|HDD)'
+DISPLAY_PATTERN = r'(?i)(?P<n>[0-9]+(?:\.[0-9]+)?)' + _WS + r'*(?P<unit>Inch|cm|inch)'
+FIRST_WORD_PATTERN = r'^' + _WS + r'*(?P<word>[^ \t\n\r\f\v\x1c-\x1f]+)'
+
+def _text_array(s):
+    # Arrow string array of the column with every non-str value as null, plus the
+    # mask of rows the scalar extractors treat as text (isinstance(text, str))
+    values = s.to_numpy(dtype=object)
+    try:
+        arr = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # Mixed column (numbers among the strings): blank out the non-strings first
+        text = np.fromiter((isinstance(x, str) for x in values), dtype=bool, count=len(values))
+        values = values.copy()
+        values[~text] = None
+        arr = pa.array(values, type=pa.string())
+    return arr, arr.is_valid().to_numpy(zero_copy_only=False)
+
+def _map_unique(values, func):
+    # Apply a Python conversion once per distinct value instead of once per row
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    converted = np.array([func(u) for u in uniques] + [None], dtype=object)
+    return converted[codes]
+
+class TextColumn:
+    # A text column prepared once and shared by all the vectorized extractors
+    def __init__(self, s):
+        self.s = s
+        self.index = s.index
+        arr, text = _text_array(s)
+        ascii_ = pc.fill_null(pc.string_is_ascii(arr), False).to_numpy(zero_copy_only=False)
+        self.text = text
+        self.fast = text & ascii_
+        self.slow = text & ~ascii_
+        self.arr = arr.filter(pa.array(self.fast))
+        self._lower = None
+
+    @property
+    def lower(self):
+        if self._lower is None:
+            self._lower = pc.ascii_lower(self.arr)
+        return self._lower
+
+    def groups(self, pattern):
+        # Capture groups of the first match for every fast row, None where it fails
+        found = pc.extract_regex(self.arr, pattern)
+        names = [f.name for f in found.type]
+        return [pc.struct_field(found, [i]).to_numpy(zero_copy_only=False) for i in range(len(names))]
+
+    def apply(self, fast, scalar, non_text):
+        # fast(self) -> results for fast rows; scalar for the others
+        out = np.full(len(self.index), non_text, dtype=object)
+        if self.fast.any():
+            out[self.fast] = fast(self)
+        if self.slow.any():
+            out[self.slow] = [scalar(x) for x in self.s[self.slow]]
+        return out
+
+
+def _ram_fast(col):
+    number, = col.groups(RAM_PATTERN)
+    return _map_unique(number, int)
+
+def _storage_fast(col):
+    number, unit = col.groups(STORAGE_PATTERN)
+
+    def convert(key):
+        val, unit = key
+        if val is None:
+            return 0
+        val = int(val)
+        if unit.upper() == 'TB':
+            val *= 1024
+        return val
+
+    keys = np.empty(len(number), dtype=object)
+    keys[:] = list(zip(number, unit))
+    return _map_unique(keys, convert)
+
+def _display_fast(col):
+    number, unit = col.groups(DISPLAY_PATTERN)
+
+    def convert(key):
+        val, unit = key
+        if val is None:
             return None
-            
-    df['Price'] = df['Price'].apply(clean_price)
-    
+        val = float(val)
+        if 'cm' in unit.lower():
+            val = val / 2.54 # Convert cm to inch
+        return round(val, 1)
+
+    keys = np.empty(len(number), dtype=object)
+    keys[:] = list(zip(number, unit))
+    return _map_unique(keys, convert)
+
+def _brand_fast(col):
+    word, = col.groups(FIRST_WORD_PATTERN)
+    out = _map_unique(word, str.title)
+    out[pd.isna(word)] = 'Other' # Blank titles
+    return out
+
+def _series(values, index, text=False):
+    # Same dtype Series.apply infers: str for labels, int64 / float64 for numbers
+    if text:
+        return pd.Series(values, index=index, dtype=str)
+    return pd.Series(values, index=index, dtype=object).infer_objects()
+
+def extract_ram_series(s, col=None):
+    col = col or TextColumn(s)
+    return _series(col.apply(_ram_fast, extract_ram, None), col.index)
+
+def extract_storage_series(s, col=None):
+    col = col or TextColumn(s)
+    return _series(col.apply(_storage_fast, extract_storage, 0), col.index)
+
+def extract_display_series(s, col=None):
+    col = col or TextColumn(s)
+    return _series(col.apply(_display_fast, extract_display, None), col.index)
+
+def extract_brand_series(s, col=None):
+    col = col or TextColumn(s)
+    return _series(col.apply(_brand_fast, extract_brand, 'Other'), col.index, text=True)
+
+def extract_processor_series(s, col=None):
+    col = col or TextColumn(s)
+    fast = lambda c: PROCESSOR_TAXONOMY.classify_arrow(c.lower)
+    return _series(col.apply(fast, extract_processor, PROCESSOR_TAXONOMY.non_text), col.index, text=True)
+
+def extract_gpu_series(s, col=None):
+    col = col or TextColumn(s)
+    fast = lambda c: GPU_TAXONOMY.classify_arrow(c.lower)
+    return _series(col.apply(fast, extract_gpu, GPU_TAXONOMY.non_text), col.index, text=True)
+
+def clean_price_series(s):
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s
+    arr, text = _text_array(s)
+    out = s.to_numpy(dtype=object, copy=True)
+    out[pd.isna(out)] = None
+    if text.any():
+        cleaned = arr.filter(pa.array(text))
+        for char in ('₹', ',', '.'):
+            cleaned = pc.replace_substring(cleaned, char, '')
+        # Plain digit strings parse identically in Arrow; anything else goes
+        # through clean_price itself (float() accepts more than digits)
+        digits = pc.match_substring_regex(cleaned, r'^[0-9]+$').to_numpy(zero_copy_only=False)
+        parsed = np.empty(len(cleaned), dtype=object)
+        parsed[digits] = pc.cast(cleaned.filter(pa.array(digits)), pa.float64()).to_numpy(zero_copy_only=False)
+        if not digits.all():
+            others = cleaned.filter(pa.array(~digits)).to_numpy(zero_copy_only=False)
+            parsed[~digits] = _map_unique(others, clean_price)
+        out[text] = parsed
+    return _series(out, s.index)
+
+def parse_prices(s):
+    # Raw Price text (chunks are read as text) back to what pandas' type
+    # guessing gave: numbers stay numbers, so '54990.50' is 54990.5 and not
+    # stripped of its '.'. Only values that are not numbers go through
+    # clean_price's text cleaning.
+    numeric = pd.to_numeric(s, errors='coerce')
+    if numeric.notna().sum() == s.notna().sum():
+        return numeric
+    return s.where(numeric.isna(), numeric.astype(object))
+
+def integer_prices(s):
+    # True when read_csv would have typed the column as int64: every raw price
+    # is a whole number and none is missing
+    return pd.api.types.is_integer_dtype(pd.to_numeric(s, errors='coerce'))
+
+def extract_features(df):
+    title = TextColumn(df['Title'])
+    text = TextColumn(df['Combined_Text'])
+    df['Brand'] = extract_brand_series(df['Title'], title)
+    df['RAM'] = extract_ram_series(df['Combined_Text'], text)
+    df['Storage_GB'] = extract_storage_series(df['Combined_Text'], text)
+    df['Processor'] = extract_processor_series(df['Combined_Text'], text)
+    df['GPU'] = extract_gpu_series(df['Combined_Text'], text)
+    df['Display_Inch'] = extract_display_series(df['Combined_Text'], text)
+    return df
+
+def prepare_chunk(df, source):
+    df['Source'] = source
+    if source == 'Amazon':
+        # Amazon features are all in Title
+        df['Combined_Text'] = df['Title']
+    else:
+        df['Combined_Text'] = df['Title'].astype(str) + " " + df['Features'].astype(str)
+    return df
+
+FEATURE_COLUMNS = ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch', 'Price']
+# Cached dtypes; RAM goes back to int64 on output when no row lacks it
+FEATURE_DTYPES = {'RAM': float, 'Storage_GB': 'int64', 'Display_Inch': float, 'Price': float}
+# Raw columns that determine a row's features (Source picks how Combined_Text is built)
+FINGERPRINT_COLUMNS = ['Source', 'Title', 'Features', 'Price']
+
+def extract_chunk(df, source):
+    # Worker: features for the raw rows missing from the feature cache
+    fingerprint = df['fingerprint']
+    df = prepare_chunk(df, source)
+    df = extract_features(df)
+    df['Price'] = clean_price_series(parse_prices(df['Price']))
+    df = df[FEATURE_COLUMNS].astype(FEATURE_DTYPES)
+    df.insert(0, 'fingerprint', fingerprint)
+    return df
+
+def clean_chunk(df, features, ram_fill, ram_float, price_int=False):
+    df = df.assign(**{c: features[c] for c in FEATURE_COLUMNS})
+    if not ram_float:
+        df['RAM'] = df['RAM'].astype('int64')
+    if price_int:
+        df['Price'] = df['Price'].astype('int64')
+
     # Remove rows with empty Price
     df = df.dropna(subset=['Price'])
-    
+
     # Fill missing values
-    df['RAM'] = df['RAM'].fillna(df['RAM'].mode()[0])
+    if ram_fill is not None:
+        df['RAM'] = df['RAM'].fillna(ram_fill)
     df['Storage_GB'] = df['Storage_GB'].fillna(512)
     df['Display_Inch'] = df['Display_Inch'].fillna(15.6)
+    return df
+
+def clean_data(chunksize=DEFAULT_CHUNKSIZE, workers=None, use_cache=True, csv=False, dedup=False, data_dir=None):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = data_dir or os.path.join(base_dir, 'data')
     
-    # Save
-    output_path = os.path.join(data_dir, 'cleaned_laptops.csv')
-    df.to_csv(output_path, index=False)
-    print(f"Cleaned data saved to {output_path}")
-    print(df.head())
-    print("\nDataset Info:")
-    print(df.info())
+    # Load files
+    amazon_file = os.path.join(data_dir, 'amazon_laptops.csv')
+    flipkart_file = os.path.join(data_dir, 'flipkart_laptops.csv')
+    
+    amazon_columns = csv_columns(amazon_file)
+    flipkart_columns = csv_columns(flipkart_file)
+    print("Amazon Columns:", amazon_columns)
+    print("Flipkart Columns:", flipkart_columns)
+    if amazon_columns and 'Title' not in amazon_columns:
+        print("Amazon data missing Title column!")
+
+    sources = [(amazon_file, 'Amazon'), (flipkart_file, 'Flipkart')]
+
+    def raw_chunks():
+        for path, source in sources:
+            for chunk in iter_csv_chunks(path, chunksize):
+                chunk['Source'] = source
+                yield chunk, source
+
+    cache = FeatureCache(os.path.join(data_dir, 'feature_cache', 'cleaned') if use_cache else None,
+                         FEATURE_COLUMNS, f'{EXTRACTOR_VERSION}.{TAXONOMY_VERSION}')
+
+    # Pass 1: fingerprint every raw row and extract features only for rows the
+    # cache has not seen, across the process pool
+    fingerprints = []
+    extracted = 0
+    # Prices come out as integers, as in a single-frame run, only when every
+    # raw price of every source is one
+    price_int = True
+
+    def misses():
+        nonlocal price_int
+        for chunk, source in raw_chunks():
+            price_int = price_int and integer_prices(chunk['Price'])
+            chunk['fingerprint'] = row_fingerprints(chunk, FINGERPRINT_COLUMNS)
+            fingerprints.append(chunk['fingerprint'].to_numpy())
+            todo = chunk[cache.missing(fingerprints[-1])].drop_duplicates('fingerprint')
+            if len(todo):
+                yield todo, source
+
+    with span('clean_data.extract', workers=workers) as stage:
+        for features in map_chunks(extract_chunk, misses(), workers):
+            cache.add(features)
+            extracted += len(features)
+        cache.commit(live=np.concatenate(fingerprints) if fingerprints else None)
+        stage.add(rows=sum(len(fp) for fp in fingerprints), extracted=extracted,
+                  bytes_read=sum(path_size(path) for path, _ in sources if os.path.exists(path)))
+    cache.report()
+
+    # Pass 2 (cheap reduction over cached values): RAM mode over the rows that
+    # keep a price, and whether any RAM is missing at all (which makes the whole
+    # column float, as in a single-frame run)
+    ram_fill, ram_float = None, False
+    if fingerprints:
+        features = cache.get(np.concatenate(fingerprints), columns=['RAM', 'Price'])
+        ram_float = bool(features['RAM'].isna().any())
+        ram = features.loc[features['Price'].notna(), 'RAM']
+        if not ram_float:
+            ram = ram.astype('int64')
+        counts = ram.value_counts()
+        if len(counts):
+            ram_fill = counts[counts == counts.max()].index.min()
+        del features, ram
+
+    # Pass 3: join cached features back onto the raw rows and append to the
+    # output in input order. Column order is what concatenating the two
+    # sources used to give.
+    columns = []
+    for source_columns in (amazon_columns, flipkart_columns):
+        if source_columns:
+            columns += [c for c in source_columns + ['Source', 'Combined_Text'] if c not in columns]
+    columns += [c for c in ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch'] if c not in columns]
+
+    # Save: the typed dataset is the hand-off to the next step; the CSV is optional
+    dataset_path = os.path.join(data_dir, 'cleaned_laptops')
+    scrape_dates = {source: file_date(path) for path, source in sources if os.path.exists(path)}
+    out = DatasetWriter(dataset_path, columns)
+    csv_out = CsvAppender(os.path.join(data_dir, 'cleaned_laptops.csv'), columns) if csv else None
+    with span('clean_data.write') as stage:
+        try:
+            for (chunk, source), fp in zip(raw_chunks(), fingerprints):
+                df = clean_chunk(prepare_chunk(chunk, source), cache.get(fp, chunk.index), ram_fill, ram_float,
+                                 price_int)
+                if out.rows == 0:
+                    print(df.head())
+                out.write(df.assign(scrape_date=scrape_dates[source]))
+                if csv_out:
+                    csv_out.write(df)
+        except BaseException:
+            out.abort()
+            if csv_out:
+                csv_out.abort()
+            raise
+        out.close()
+        if csv_out:
+            csv_out.close()
+        stage.add(rows=out.rows, bytes_written=path_size(dataset_path) + (path_size(csv_out.path) if csv_out else 0))
+    print(f"Cleaned data saved to {dataset_path} ({out.rows} rows)")
+    if csv_out:
+        print(f"CSV copy saved to {csv_out.path}")
+
+    if dedup:
+        # One row per cluster of near-duplicate listings, with price stats
+        with span('clean_data.dedup'):
+            dedup_dataset(dataset_path, os.path.join(data_dir, 'cleaned_laptops_dedup'), chunksize=chunksize)
 
 if __name__ == "__main__":
-    clean_data()
+    parser = argparse.ArgumentParser(description="Clean the scraped Amazon and Flipkart listings.")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the feature cache and extract every row")
+    parser.add_argument('--csv', action='store_true', help="Also write cleaned_laptops.csv")
+    parser.add_argument('--dedup', action='store_true', help="Also write cleaned_laptops_dedup with near-duplicates collapsed")
+    args = parser.parse_args()
+    clean_data(chunksize=args.chunksize, workers=args.workers, use_cache=not args.no_cache, csv=args.csv,
+               dedup=args.dedup)
@@ -1,46 +1,98 @@
+import argparse
 import pandas as pd
 import os
+import sys
+import numpy as np
+from process_data import EXTRACTOR_VERSION, extract_gpu_series
+from taxonomy import TAXONOMY_VERSION
+from chunked_pipeline import DEFAULT_CHUNKSIZE, iter_csv_chunks, csv_columns, map_chunks, CsvAppender
+from feature_cache import FeatureCache, row_fingerprints
+from dataset_store import DatasetWriter, is_dataset, read_schema, iter_chunks, file_date
 
-def extract_gpu(text):
-    if not isinstance(text, str):
-        return "Internal/Other"
-    text = text.lower()
-    if 'rtx 4090' in text: return 'NVIDIA RTX 4090'
-    if 'rtx 4080' in text: return 'NVIDIA RTX 4080'
-    if 'rtx 4070' in text: return 'NVIDIA RTX 4070'
-    if 'rtx 4060' in text: return 'NVIDIA RTX 4060'
-    if 'rtx 4050' in text: return 'NVIDIA RTX 4050'
-    if 'rtx 3080' in text: return 'NVIDIA RTX 3080'
-    if 'rtx 3070' in text: return 'NVIDIA RTX 3070'
-    if 'rtx 3060' in text: return 'NVIDIA RTX 3060'
-    if 'rtx 3050' in text: return 'NVIDIA RTX 3050'
-    if 'rtx 2050' in text: return 'NVIDIA RTX 2050'
-    if 'gtx 1650' in text: return 'NVIDIA GTX 1650'
-    if 'intel arc' in text: return 'Intel Arc'
-    if 'iris xe' in text or 'intel iris' in text: return 'Intel Iris Xe'
-    if 'uhd graphics' in text or 'intel uhd' in text: return 'Intel UHD'
-    if 'radeon' in text: return 'AMD Radeon'
-    if 'm1' in text or 'm2' in text or 'm3' in text: return 'Apple Silicon GPU'
-    return "Integrated/Other"
-
-def process_v2():
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from instrumentation import span, path_size
+
+def gpu_chunk(df):
+    # Worker: GPU for the texts missing from the feature cache
+    return pd.DataFrame({'fingerprint': df['fingerprint'], 'GPU': extract_gpu_series(df['Combined_Text'])})
+
+def process_v2(chunksize=DEFAULT_CHUNKSIZE, workers=None, use_cache=True, csv=False):
     base_dir = os.path.dirname(os.path.abspath(__file__))
+    input_dataset = os.path.join(base_dir, 'data', 'laptops_cleaned_v2')
     input_path = os.path.join(base_dir, 'data', 'laptops_cleaned_v2.csv')
+    output_dataset = os.path.join(base_dir, 'data', 'laptops_v2_ready')
     output_path = os.path.join(base_dir, 'data', 'laptops_v2_ready.csv')
-    
-    if not os.path.exists(input_path):
+
+    # Prefer the typed dataset; the CSV still works as input
+    if is_dataset(input_dataset):
+        print(f"Reading {input_dataset} in chunks of {chunksize:,} rows...")
+        columns = read_schema(input_dataset).names
+        chunks = lambda cols=None: iter_chunks(input_dataset, chunksize, cols)
+        scrape_date = None
+    elif os.path.exists(input_path):
+        print(f"Reading {input_path} in chunks of {chunksize:,} rows...")
+        columns = csv_columns(input_path)
+        chunks = lambda cols=None: iter_csv_chunks(input_path, chunksize, usecols=cols)
+        scrape_date = file_date(input_path)
+    else:
         print(f"Error: {input_path} not found.")
         return
+    if 'GPU' not in columns:
+        columns.append('GPU')
+
+    cache = FeatureCache(os.path.join(base_dir, 'data', 'feature_cache', 'v2_gpu') if use_cache else None,
+                         ['GPU'], f'{EXTRACTOR_VERSION}.{TAXONOMY_VERSION}')
 
-    print(f"Reading {input_path}...")
-    df = pd.read_csv(input_path)
-    
     print("Extracting GPU...")
-    df['GPU'] = df['Combined_Text'].apply(extract_gpu)
-    
-    print(f"Saving to {output_path}...")
-    df.to_csv(output_path, index=False)
+    fingerprints = []
+
+    def misses():
+        for chunk in chunks(['Combined_Text']):
+            chunk['fingerprint'] = row_fingerprints(chunk, ['Combined_Text'])
+            fingerprints.append(chunk['fingerprint'].to_numpy())
+            todo = chunk[cache.missing(fingerprints[-1])].drop_duplicates('fingerprint')
+            if len(todo):
+                yield (todo,)
+
+    with span('process_v2.extract_gpu', workers=workers) as stage:
+        extracted = 0
+        for gpu in map_chunks(gpu_chunk, misses(), workers):
+            cache.add(gpu)
+            extracted += len(gpu)
+        cache.commit(live=np.concatenate(fingerprints) if fingerprints else None)
+        stage.add(rows=sum(len(fp) for fp in fingerprints), extracted=extracted,
+                  bytes_read=path_size(input_dataset if is_dataset(input_dataset) else input_path))
+    cache.report()
+
+    out = DatasetWriter(output_dataset, columns, scrape_date=scrape_date)
+    csv_out = CsvAppender(output_path, [c for c in columns if c != 'scrape_date']) if csv else None
+    with span('process_v2.write') as stage:
+        try:
+            for df in chunks():
+                df['GPU'] = cache.get(row_fingerprints(df, ['Combined_Text']), df.index)['GPU']
+                out.write(df)
+                if csv_out:
+                    csv_out.write(df)
+        except BaseException:
+            out.abort()
+            if csv_out:
+                csv_out.abort()
+            raise
+        out.close()
+        if csv_out:
+            csv_out.close()
+        stage.add(rows=out.rows, bytes_written=path_size(output_dataset) + (path_size(output_path) if csv_out else 0))
+    print(f"Saved {out.rows} rows to {output_dataset}")
+    if csv_out:
+        print(f"CSV copy saved to {output_path}")
     print("Done.")
 
 if __name__ == "__main__":
-    process_v2()
+    parser = argparse.ArgumentParser(description="Recompute the GPU column of the v2 dataset.")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the feature cache and extract every row")
+    parser.add_argument('--csv', action='store_true', help="Also write laptops_v2_ready.csv")
+    args = parser.parse_args()
+    process_v2(chunksize=args.chunksize, workers=args.workers, use_cache=not args.no_cache, csv=args.csv)
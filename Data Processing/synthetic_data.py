@@ -0,0 +1,90 @@
+import os
+import pandas as pd
+import numpy as np
+from taxonomy import PROCESSORS as PROCESSOR_RULES, GPUS as GPU_RULES, PROCESSOR_DEFAULTS, GPU_DEFAULTS
+
+# Synthetic scraped listings for benchmarks and parity checks. Titles and feature
+# strings are assembled from the brands, processors and GPUs the extractors know,
+# plus a share of irregular rows (missing titles, odd prices, cm displays, TB drives).
+# Model-ready rows (the cleaned feature columns) use the taxonomy's labels.
+
+BRANDS = ["HP", "Dell", "Lenovo", "ASUS", "Acer", "MSI", "Apple", "Samsung", "Infinix", "Avita"]
+PROCESSORS = ["Intel Core i3 12th Gen", "Intel Core i5 1235U", "Intel Core i7 13700H", "Intel Core i9",
+              "AMD Ryzen 3 7320U", "AMD Ryzen 5 5500U", "AMD Ryzen 7 7840HS", "AMD Ryzen 9",
+              "Apple M1", "Apple M2 chip", "Apple M3 Pro", "Intel Celeron N4500", "Intel Pentium Silver",
+              "MediaTek Kompanio"]
+GPUS = ["NVIDIA GeForce RTX 4090", "RTX 4080", "NVIDIA RTX 4070", "RTX 4060 8GB", "RTX 4050", "RTX 3080",
+        "RTX 3070", "NVIDIA GeForce RTX 3060", "RTX 3050", "RTX 2050", "GTX 1650", "Intel Arc A370M",
+        "Intel Iris Xe Graphics", "Intel UHD Graphics", "AMD Radeon Graphics", "Integrated Graphics", ""]
+RAM = ["4 GB", "8 GB", "8GB", "16 GB", "16gb", "32 GB", "64 GB"]
+STORAGE = ["256 GB SSD", "512 GB SSD", "512GB SSD", "1 TB SSD", "1 TB HDD", "2 TB SSD", "128 GB EMMC", "1tb ssd"]
+DISPLAY = ["14 Inch", "15.6 Inch", "15.6 inch", "39.62 cm", "35.56 cm", "16 Inch", "13.3 Inch", "40.64 cm", ""]
+PRICES = ["54990", "₹1,23,990", "39,999", "74990.", "", "Currently unavailable", "1_000"]
+
+def _pick(rng, choices, n):
+    return np.asarray(choices, dtype=object)[rng.integers(0, len(choices), n)]
+
+def make_listings(n, seed=0, irregular=0.02):
+    rng = np.random.default_rng(seed)
+    brand = _pick(rng, BRANDS, n)
+    title = pd.Series(brand + " " + _pick(rng, PROCESSORS, n) + " Thin and Light Laptop ("
+                      + _pick(rng, RAM, n) + "/" + _pick(rng, STORAGE, n) + "/Windows 11 Home) "
+                      + _pick(rng, GPUS, n) + " " + _pick(rng, DISPLAY, n), dtype=object)
+    features = pd.Series(_pick(rng, RAM, n) + " DDR4 RAM | " + _pick(rng, STORAGE, n) + " | "
+                         + _pick(rng, DISPLAY, n) + " Display", dtype=object)
+    price = pd.Series(rng.integers(15000, 350000, n).astype(str), dtype=object)
+    rating = pd.Series(np.round(rng.uniform(3.0, 5.0, n), 1))
+    source = _pick(rng, ["Amazon", "Flipkart"], n)
+
+    odd = rng.random(n) < irregular
+    price[odd] = _pick(rng, PRICES, int(odd.sum()))
+    blank = rng.random(n) < irregular / 4
+    title[blank] = np.nan
+
+    df = pd.DataFrame({'Title': title, 'Price': price, 'Rating': rating, 'Features': features, 'Source': source})
+    amazon = df['Source'] == 'Amazon'
+    df.loc[amazon, 'Features'] = np.nan
+    df['Combined_Text'] = df['Title'].where(amazon, df['Title'].astype(str) + " " + df['Features'].astype(str))
+    return df
+
+def iter_listings(n, chunksize=1_000_000, seed=0, irregular=0.02):
+    # make_listings in chunks (one seed each), for sizes that do not fit in memory at once
+    for i, start in enumerate(range(0, n, chunksize)):
+        yield make_listings(min(chunksize, n - start), seed=seed * 1_000_003 + i, irregular=irregular)
+
+def write_raw(data_dir, n, seed=0, chunksize=1_000_000):
+    # amazon_laptops.csv and flipkart_laptops.csv as the scrapers write them,
+    # n rows in total
+    paths = {'Amazon': os.path.join(data_dir, 'amazon_laptops.csv'),
+             'Flipkart': os.path.join(data_dir, 'flipkart_laptops.csv')}
+    columns = {'Amazon': ['Title', 'Price', 'Rating'], 'Flipkart': ['Title', 'Price', 'Rating', 'Features']}
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+    for df in iter_listings(n, chunksize, seed):
+        for source, path in paths.items():
+            part = df.loc[df['Source'] == source, columns[source]]
+            part.to_csv(path, index=False, header=not os.path.exists(path), mode='a')
+    return paths
+
+def make_ready(n, seed=0):
+    # Rows shaped like laptops_v2_ready: the six model inputs and a Price that
+    # depends on them (so trees grow as deep as on real data), plus noise
+    rng = np.random.default_rng(seed)
+    processors = [label for label, _ in PROCESSOR_RULES] + [PROCESSOR_DEFAULTS[0]]
+    gpus = [label for label, _ in GPU_RULES] + [GPU_DEFAULTS[0]]
+    df = pd.DataFrame({
+        'Brand': _pick(rng, BRANDS, n),
+        'RAM': rng.choice([4, 8, 16, 32, 64], n, p=[0.1, 0.35, 0.35, 0.15, 0.05]),
+        'Storage_GB': rng.choice([128, 256, 512, 1024, 2048], n, p=[0.05, 0.2, 0.45, 0.25, 0.05]),
+        'Processor': _pick(rng, processors, n),
+        'GPU': _pick(rng, gpus, n),
+        'Display_Inch': rng.choice([13.3, 14.0, 15.6, 16.0, 17.3], n),
+    })
+    tier = {label: i for i, label in enumerate(processors)}
+    cpu = df['Processor'].map(tier).to_numpy()
+    gpu = df['GPU'].map({label: i for i, label in enumerate(gpus)}).to_numpy()
+    price = (20000 + 1500 * df['RAM'] + 15 * df['Storage_GB'] + 4000 * (len(processors) - cpu)
+             + 3000 * (len(gpus) - gpu) + 2000 * (df['Display_Inch'] - 13))
+    df['Price'] = np.round(price * rng.lognormal(0, 0.15, n), -1)
+    return df
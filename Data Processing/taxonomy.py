@@ -0,0 +1,182 @@
+import re
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Single source of truth for the processor and GPU keyword lists used by
+# process_data.py and process_v2_data.py. Rules are in priority order: a text is
+# labelled with the FIRST rule any of whose keywords occurs in it (lowercased),
+# exactly like the old chains of `if 'i9' in text: ...`. Adding a SKU is adding a
+# row here; matching cost does not grow linearly with the number of rules.
+
+# Bump when rules change, so cached extractions are recomputed
+TAXONOMY_VERSION = 1
+
+PROCESSORS = [
+    ('Intel Core i9', ['i9']),
+    ('Intel Core i7', ['i7']),
+    ('Intel Core i5', ['i5']),
+    ('Intel Core i3', ['i3']),
+    ('Apple M1', ['m1']),
+    ('Apple M2', ['m2']),
+    ('Apple M3', ['m3']),
+    ('AMD Ryzen 9', ['ryzen 9']),
+    ('AMD Ryzen 7', ['ryzen 7']),
+    ('AMD Ryzen 5', ['ryzen 5']),
+    ('AMD Ryzen 3', ['ryzen 3']),
+    ('Intel Celeron', ['celeron']),
+    ('Intel Pentium', ['pentium']),
+]
+
+GPUS = [
+    ('NVIDIA RTX 4090', ['rtx 4090']),
+    ('NVIDIA RTX 4080', ['rtx 4080']),
+    ('NVIDIA RTX 4070', ['rtx 4070']),
+    ('NVIDIA RTX 4060', ['rtx 4060']),
+    ('NVIDIA RTX 4050', ['rtx 4050']),
+    ('NVIDIA RTX 3080', ['rtx 3080']),
+    ('NVIDIA RTX 3070', ['rtx 3070']),
+    ('NVIDIA RTX 3060', ['rtx 3060']),
+    ('NVIDIA RTX 3050', ['rtx 3050']),
+    ('NVIDIA RTX 2050', ['rtx 2050']),
+    ('NVIDIA GTX 1650', ['gtx 1650']),
+    ('Intel Arc', ['intel arc']),
+    ('Intel Iris Xe', ['iris xe', 'intel iris']),
+    ('Intel UHD', ['uhd graphics', 'intel uhd']),
+    ('AMD Radeon', ['radeon']),
+    ('Apple Silicon GPU', ['m1', 'm2', 'm3']),
+]
+
+# (label when no keyword matches, label when there is no text at all)
+PROCESSOR_DEFAULTS = ('Other', 'Unknown')
+# process_v2_data used to say "Internal/Other" and clean_data "Other" for missing
+# text; the app and the trained model only know "Integrated/Other"
+GPU_DEFAULTS = ('Integrated/Other', 'Integrated/Other')
+
+
+def _trie_pattern(words, escape):
+    # Alternation factored by common prefix, longest alternative first, so the
+    # regex engine does work proportional to keyword length, not keyword count
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        ends = '' in node
+        branches = [escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if ends else body
+
+    return build(trie)
+
+def _python_escape(ch):
+    return re.escape(ch)
+
+def _re2_escape(ch):
+    return ch if ch.isalnum() or ch == ' ' else '\\' + ch
+
+def _expand_overlaps(words):
+    # A left-to-right scan consumes text, so "intel iris" would hide an
+    # overlapping "iris xe". Adding every overlap merge ("intel iris xe") as a
+    # keyword of its own lets one scan see both.
+    words = set(words)
+    changed = True
+    while changed:
+        changed = False
+        for a in list(words):
+            for b in list(words):
+                if a == b:
+                    continue
+                for size in range(min(len(a), len(b)) - 1, 0, -1):
+                    if a[-size:] == b[:size]:
+                        merged = a + b[size:]
+                        if merged not in words:
+                            words.add(merged)
+                            changed = True
+    return words
+
+
+class Taxonomy:
+    def __init__(self, rules, defaults):
+        self.rules = rules
+        self.labels = [label for label, _ in rules]
+        self.default, self.non_text = defaults
+
+        # Keyword -> best (lowest) rule index among all keywords it contains
+        priority = {}
+        for i, (_, keywords) in enumerate(rules):
+            for k in keywords:
+                priority.setdefault(k, i)
+        self.priority = {}
+        for word in _expand_overlaps(priority):
+            self.priority[word] = min(p for k, p in priority.items() if k in word)
+        self.scanner = re.compile(_trie_pattern(self.priority, _python_escape))
+        self._re2 = {}
+
+    def classify(self, text):
+        # Scalar path: one scan of the lowercased text
+        if not isinstance(text, str):
+            return self.non_text
+        best = len(self.rules)
+        for match in self.scanner.finditer(text.lower()):
+            best = min(best, self.priority[match.group()])
+            if best == 0:
+                break
+        return self.labels[best] if best < len(self.rules) else self.default
+
+    def classify_reference(self, text):
+        # The definition the fast paths must agree with
+        if not isinstance(text, str):
+            return self.non_text
+        text = text.lower()
+        for label, keywords in self.rules:
+            if any(k in text for k in keywords):
+                return label
+        return self.default
+
+    def _pattern(self, lo, hi):
+        # RE2 pattern matching any keyword of rules[lo:hi]
+        if (lo, hi) not in self._re2:
+            words = {k for _, keywords in self.rules[lo:hi] for k in keywords}
+            self._re2[(lo, hi)] = _trie_pattern(words, _re2_escape)
+        return self._re2[(lo, hi)]
+
+    def classify_arrow(self, lower):
+        # Vectorized path over an Arrow array of ASCII-lowercased text. Rows with
+        # any keyword binary-search the priority list: "is there a keyword in
+        # rules[lo:mid]?" halves every row's interval per pass, so R rules need
+        # log2(R) passes over the data instead of R.
+        n_rules = len(self.rules)
+        out = np.full(len(lower), self.default, dtype=object)
+        hit = pc.match_substring_regex(lower, self._pattern(0, n_rules)).to_numpy(zero_copy_only=False)
+        rows = np.flatnonzero(hit)
+        lo = np.zeros(len(rows), dtype=np.int64)
+        hi = np.full(len(rows), n_rules, dtype=np.int64)
+        texts = lower.take(pa.array(rows))
+        while len(rows) and (hi - lo > 1).any():
+            for a, b in set(zip(lo.tolist(), hi.tolist())):
+                if b - a <= 1:
+                    continue
+                mid = (a + b) // 2
+                group = np.flatnonzero((lo == a) & (hi == b))
+                found = pc.match_substring_regex(texts.take(pa.array(group)), self._pattern(a, mid))
+                found = found.to_numpy(zero_copy_only=False)
+                hi[group[found]] = mid
+                lo[group[~found]] = mid
+        out[rows] = np.asarray(self.labels, dtype=object)[lo]
+        return out
+
+
+PROCESSOR_TAXONOMY = Taxonomy(PROCESSORS, PROCESSOR_DEFAULTS)
+GPU_TAXONOMY = Taxonomy(GPUS, GPU_DEFAULTS)
+
+def classify_processor(text):
+    return PROCESSOR_TAXONOMY.classify(text)
+
+def classify_gpu(text):
+    return GPU_TAXONOMY.classify(text)
@@ -1,7 +1,10 @@
 import streamlit as st
-import joblib
-import pandas as pd
 import os
+import tempfile
+from serving import (FEATURES, BRANDS, PROCESSORS, GPUS, RAM_RANGE, STORAGE_RANGE, DISPLAY_RANGE, INTERVAL,
+                     ModelLoader, model_path, predict_interval_one)
+from prediction_cache import ModelFingerprint, PredictionCache, normalize
+from instrumentation import histogram, render_prometheus
 
 # Set page config
 st.set_page_config(
@@ -10,67 +13,179 @@ st.set_page_config(
     layout="centered"
 )
 
-# Load Model
+MODEL_DIR = os.path.join(os.path.dirname(__file__), 'models')
+# 'background' draws the form at once and loads the model (and its numpy or
+# sklearn imports) on a thread; 'eager' loads it before the first render
+STARTUP = os.environ.get('PRICE_APP_STARTUP', 'background')
+
+# Load Model: cached per model file hash, so a retrained model is picked up
 @st.cache_resource
-def load_model():
-    model_path = os.path.join(os.path.dirname(__file__), 'models', 'laptop_price_model.joblib')
-    if os.path.exists(model_path):
-        return joblib.load(model_path)
-    else:
-        return None
+def model_fingerprint():
+    return ModelFingerprint()
+
+@st.cache_resource(max_entries=1)
+def model_loader(model_hash):
+    # Model, price lattice (price_lattice.py, if built from this model) and a
+    # warm-up prediction
+    return ModelLoader(MODEL_DIR, lattice=True, model_hash=model_hash, background=STARTUP != 'eager')
 
-model = load_model()
+# Predictions shared by every session of this process
+@st.cache_resource
+def prediction_cache():
+    return PredictionCache()
+
+model_hash = model_fingerprint()(model_path(MODEL_DIR))
+loader = model_loader(model_hash)
+cache = prediction_cache()
+cache.use_model(model_hash)
+# Latency of model calls (cache misses) and of whole form submissions
+predict_seconds = histogram('price_predict_seconds', "Model predict latency per call", surface='app')
+request_seconds = histogram('price_request_seconds', "Request latency by route", route='app_form')
 
 # Title and Description
 st.title("💻 Laptop Price Predictor")
 st.write("Enter the laptop specifications below to get an estimated price.")
 
-if model is None:
+if model_hash is None:
     st.error("Model not found! Please run `train_models.py` first.")
 else:
-    # Input Form
-    with st.form("prediction_form"):
-        col1, col2 = st.columns(2)
+    single_tab, batch_tab = st.tabs(["Single Laptop", "Batch File"])
+
+    with single_tab:
+        # Input Form
+        with st.form("prediction_form"):
+            col1, col2 = st.columns(2)
         
-        with col1:
-            brand = st.selectbox("Brand", ["HP", "Dell", "Lenovo", "Asus", "Acer", "MSI", "Apple", "Samsung", "Other"])
-            ram = st.number_input("RAM (GB)", min_value=4, max_value=64, value=8, step=4)
-            storage = st.number_input("Storage (GB)", min_value=128, max_value=4096, value=512, step=128)
+            with col1:
+                brand = st.selectbox("Brand", BRANDS)
+                ram = st.number_input("RAM (GB)", min_value=RAM_RANGE[0], max_value=RAM_RANGE[1], value=8,
+                                      step=RAM_RANGE[2])
+                storage = st.number_input("Storage (GB)", min_value=STORAGE_RANGE[0], max_value=STORAGE_RANGE[1],
+                                          value=512, step=STORAGE_RANGE[2])
             
-        with col2:
-            processor = st.selectbox("Processor", [
-                "Intel Core i3", "Intel Core i5", "Intel Core i7", "Intel Core i9",
-                "AMD Ryzen 3", "AMD Ryzen 5", "AMD Ryzen 7", "AMD Ryzen 9",
-                "Apple M1", "Apple M2", "Apple M3",
-                "Intel Celeron", "Intel Pentium", "Other"
-            ])
-            gpu = st.selectbox("GPU", [
-                "Integrated/Other", "Intel Iris Xe", "Intel UHD", "AMD Radeon",
-                "NVIDIA RTX 3050", "NVIDIA RTX 4050", "NVIDIA RTX 4060",
-                "NVIDIA GTX 1650", "NVIDIA RTX 3060", "NVIDIA RTX 4070",
-                "Apple Silicon GPU", "Intel Arc"
-            ])
-            display = st.number_input("Display Size (Inch)", min_value=10.0, max_value=21.0, value=15.6, step=0.1)
+            with col2:
+                processor = st.selectbox("Processor", PROCESSORS)
+                gpu = st.selectbox("GPU", GPUS)
+                display = st.number_input("Display Size (Inch)", min_value=DISPLAY_RANGE[0],
+                                          max_value=DISPLAY_RANGE[1], value=15.6, step=DISPLAY_RANGE[2])
             
-        submitted = st.form_submit_button("Predict Price")
+            submitted = st.form_submit_button("Predict Price")
         
-        if submitted:
-            # Create DataFrame for prediction
-            input_data = pd.DataFrame({
-                'Brand': [brand],
-                'RAM': [ram],
-                'Storage_GB': [storage],
-                'Processor': [processor],
-                'GPU': [gpu],
-                'Display_Inch': [display]
-            })
+            if submitted:
+                input_data = {
+                    'Brand': brand,
+                    'RAM': ram,
+                    'Storage_GB': storage,
+                    'Processor': processor,
+                    'GPU': gpu,
+                    'Display_Inch': display
+                }
             
-            # Predict
+                # Predict: on the grid the lattice has the price and its range,
+                # without calling the model; off it, both come from one pass
+                # over the trees (repeated configurations from the cache)
+                try:
+                    row = dict(zip(FEATURES, normalize(input_data)))
+                    if not loader.ready.is_set():
+                        with st.spinner("Loading the model..."):
+                            loader.ready.wait()
+                    model, lattice = loader.get(), loader.lattice
+
+                    def compute():
+                        with predict_seconds.time():
+                            return predict_interval_one(model, row)
+                    with request_seconds.time():
+                        found = lattice.lookup_interval(row) if lattice is not None else None
+                        price, bounds = found if found is not None else cache.get(tuple(row.values()), compute)
+                    st.success(f"Estimated Price: ₹{price:,.2f}")
+                    if bounds is not None:
+                        st.write(f"Likely range: ₹{bounds[0]:,.0f} – ₹{bounds[1]:,.0f}")
+                        st.caption(f"{INTERVAL[0]}th to {INTERVAL[1]}th percentile of the forest's tree estimates")
+                    if lattice is not None and lattice.slots(row) is not None:
+                        # What-if curves for this configuration, straight from the lattice
+                        for name, label in (('RAM', 'RAM (GB)'), ('Storage_GB', 'Storage (GB)')):
+                            values, prices = lattice.curve(row, name)
+                            st.caption(f"Price vs {label}")
+                            st.line_chart({label: values, 'Price (₹)': prices}, x=label, y='Price (₹)', height=200)
+                except Exception as e:
+                    st.error(f"Error during prediction: {e}")
+
+    with batch_tab:
+        st.write(f"Upload a CSV or Parquet catalogue with the columns {', '.join(FEATURES)}. "
+                 "Every row is priced; other columns are kept as they are.")
+        upload = st.file_uploader("Catalogue file", type=['csv', 'parquet', 'pq'])
+        with_range = st.checkbox(f"Add price range columns (P{INTERVAL[0]} / P{INTERVAL[1]})")
+        if upload is not None and st.button("Price File"):
+            bar = st.progress(0.0)
+            status = st.empty()
+
+            def report(rows, fraction, rate):
+                if fraction is not None:
+                    bar.progress(fraction)
+                status.write(f"{rows:,} rows priced, {rate:,.0f} rows/sec")
+
+            suffix = '.parquet' if upload.name.lower().endswith(('.parquet', '.pq')) else '.csv'
+            output = tempfile.NamedTemporaryFile(suffix=suffix, delete=False).name
             try:
-                prediction = model.predict(input_data)[0]
-                st.success(f"Estimated Price: ₹{prediction:,.2f}")
-            except Exception as e:
-                st.error(f"Error during prediction: {e}")
+                from batch_predict import DEFAULT_CHUNKSIZE, price_file
+                stats = price_file(loader.get(), upload, output, DEFAULT_CHUNKSIZE, name=upload.name, progress=report,
+                                   interval=INTERVAL if with_range else None)
+                bar.progress(1.0)
+                st.success(f"Priced {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+                           f"({stats['rows_per_sec']:,.0f} rows/sec)")
+                if stats['invalid_numbers']:
+                    st.warning(f"{stats['invalid_numbers']:,} non-numeric RAM/Storage/Display values "
+                               "were treated as missing")
+                with open(output, 'rb') as f:
+                    st.download_button("Download Priced File", f.read(),
+                                       file_name=os.path.splitext(upload.name)[0] + '_priced' + suffix)
+            except ValueError as e:
+                st.error(str(e))
+            finally:
+                if os.path.exists(output):
+                    os.remove(output)
+
+# Admin view: open the app with ?admin=1
+if st.query_params.get('admin') == '1':
+    with st.sidebar:
+        st.header("Prediction Cache")
+        stats = cache.stats()
+        st.metric("Hit rate", f"{stats['hit_rate']:.1%}", help=f"{stats['hits']:,} hits, {stats['misses']:,} misses")
+        st.metric("Entries", f"{stats['entries']:,} / {stats['maxsize']:,}")
+        if stats['hit_ms_p50'] is not None:
+            st.metric("Hit latency (p50)", f"{stats['hit_ms_p50']:.3f} ms")
+        if stats['miss_ms_p50'] is not None:
+            st.metric("Miss latency (p50 / p99)", f"{stats['miss_ms_p50']:.2f} / {stats['miss_ms_p99']:.2f} ms")
+        st.write(f"Evictions: {stats['evictions']:,} · Expired: {stats['expired']:,} · "
+                 f"Model changes: {stats['invalidations']:,}")
+        st.caption(f"Model {os.path.basename(model_path(MODEL_DIR) or '-')} · sha256 {(stats['model_hash'] or '-')[:12]}")
+        st.header("Startup")
+        if not loader.ready.is_set():
+            st.caption(f"Model loading in the background ({STARTUP} startup)")
+        elif loader.error is not None:
+            st.caption(f"Model failed to load: {loader.error}")
+        elif loader.timings:
+            t = loader.timings
+            st.metric("Model ready in", f"{t['total_s'] * 1e3:,.0f} ms", help=f"{STARTUP} startup")
+            st.write(f"Import {t['import_s'] * 1e3:,.0f} ms · Deserialize {t['deserialize_s'] * 1e3:,.0f} ms · "
+                     f"First predict {t['first_predict_s'] * 1e3:,.1f} ms · Lattice {t['lattice_s'] * 1e3:,.0f} ms")
+            lattice = loader.lattice
+            if lattice is not None:
+                st.caption(f"Price lattice: {lattice.meta['grid_cells']:,} grid points in "
+                           f"{lattice.tensor[..., 0].size:,} slots, built {lattice.meta['built']}")
+            else:
+                st.caption("Price lattice: not built for this model (run price_lattice.py)")
+        st.header("Latency")
+        for label, h in (("Predict (cache misses)", predict_seconds), ("Form requests", request_seconds)):
+            count = sum(h.snapshot()[0])
+            if count:
+                st.write(f"{label}: {count:,} calls, p50 ≤ {h.quantile(0.5) * 1e3:g} ms, "
+                         f"p99 ≤ {h.quantile(0.99) * 1e3:g} ms")
+        with st.expander("Prometheus metrics"):
+            st.code(render_prometheus(), language='text')
+        if st.button("Clear cache"):
+            cache.clear()
+            st.rerun()
 
 st.markdown("---")
 st.caption("Built with Streamlit and Scikit-Learn")
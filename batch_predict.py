@@ -0,0 +1,180 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from serving import FEATURES, NUMERIC, INTERVAL, load_model, predict_interval
+from instrumentation import histogram, path_size, span
+
+# Prices whole catalogue files. The input (CSV or Parquet) is streamed in
+# chunks through the model's vectorized predict and every chunk is appended to
+# the output with a Predicted_Price column, so memory is bounded by the chunk
+# size whatever the file size. Other input columns pass through unchanged.
+# With an interval, each row also gets the percentiles of the forest's trees
+# (Predicted_Price_P5, Predicted_Price_P95) from the same pass over the trees.
+
+OUTPUT_COLUMN = 'Predicted_Price'
+DEFAULT_CHUNKSIZE = 50_000
+
+def interval_columns(percentiles):
+    return [f"{OUTPUT_COLUMN}_P{p:g}" for p in percentiles]
+
+def is_parquet(name):
+    return str(name).lower().endswith(('.parquet', '.pq'))
+
+def missing_features(columns):
+    return [c for c in FEATURES if c not in columns]
+
+def input_columns(source, name=None):
+    # Column names only (Parquet schema or CSV header); rewinds file objects
+    if is_parquet(name or source):
+        columns = pq.ParquetFile(source).schema_arrow.names
+    else:
+        columns = pd.read_csv(source, nrows=0).columns.tolist()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return columns
+
+def _size(handle):
+    try:
+        return os.fstat(handle.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        # In-memory uploads (Streamlit's UploadedFile has .size)
+        return getattr(handle, 'size', None)
+
+def iter_input(source, chunksize=DEFAULT_CHUNKSIZE, name=None):
+    # Yields (chunk, fraction of the input read so far or None)
+    if is_parquet(name or source):
+        parquet = pq.ParquetFile(source)
+        total, done = parquet.metadata.num_rows, 0
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            done += batch.num_rows
+            yield batch.to_pandas(), done / total if total else None
+        return
+    # Text in, text out: pass-through columns keep their exact spelling and
+    # every chunk has the same dtypes
+    handle = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    size = _size(handle)
+    try:
+        for chunk in pd.read_csv(handle, dtype=str, chunksize=chunksize):
+            yield chunk, min(handle.tell() / size, 1.0) if size else None
+    finally:
+        if handle is not source:
+            handle.close()
+
+def features_of(chunk):
+    # The model's inputs; numbers that do not parse become missing values,
+    # which the model imputes. Returns (features, count of such values).
+    X = chunk[FEATURES].copy()
+    invalid = 0
+    for col in NUMERIC:
+        values = pd.to_numeric(X[col], errors='coerce')
+        invalid += int((values.isna() & X[col].notna()).sum())
+        X[col] = values
+    return X, invalid
+
+
+class PricedWriter:
+    # Appends priced chunks to a CSV or Parquet file through <path>.tmp,
+    # renamed on close() so a half-written output is never left behind
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + '.tmp'
+        self.parquet = is_parquet(path)
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.parquet:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.tmp, table.schema)
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            df.to_csv(self.tmp, index=False, header=self.rows == 0, mode='w' if self.rows == 0 else 'a')
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        elif self.rows == 0:
+            pd.DataFrame(columns=[OUTPUT_COLUMN]).to_csv(self.tmp, index=False)
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def price_file(model, source, output_path, chunksize=DEFAULT_CHUNKSIZE, name=None, progress=None, interval=None):
+    # progress(rows done, fraction done or None, rows/sec) is called per chunk;
+    # interval: percentiles to add as columns, e.g. (5, 95)
+    missing = missing_features(input_columns(source, name))
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+    out = PricedWriter(output_path)
+    start = time.perf_counter()
+    invalid = 0
+    predict_seconds = histogram('price_predict_seconds', "Model predict latency per call", surface='batch')
+    with span('batch_predict', interval=list(interval) if interval else None) as stage:
+        try:
+            for chunk, fraction in iter_input(source, chunksize, name):
+                X, bad = features_of(chunk)
+                invalid += bad
+                with predict_seconds.time():
+                    if interval:
+                        prices, bounds = predict_interval(model, X, interval)
+                    else:
+                        prices, bounds = model.predict(X), None
+                if interval and bounds is None:
+                    raise ValueError("Price ranges need a forest model")
+                chunk[OUTPUT_COLUMN] = np.round(prices, 2)
+                if bounds is not None:
+                    for column, values in zip(interval_columns(interval), bounds.T):
+                        chunk[column] = np.round(values, 2)
+                out.write(chunk)
+                if progress:
+                    progress(out.rows, fraction, out.rows / (time.perf_counter() - start))
+        except BaseException:
+            out.abort()
+            raise
+        out.close()
+        stage.add(rows=out.rows, invalid_numbers=invalid, bytes_written=path_size(output_path))
+    elapsed = time.perf_counter() - start
+    return {'rows': out.rows, 'seconds': elapsed, 'rows_per_sec': out.rows / elapsed if elapsed else 0.0,
+            'invalid_numbers': invalid}
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Price every laptop in a CSV or Parquet catalogue file.")
+    parser.add_argument('input', help="CSV or Parquet file with " + ", ".join(FEATURES))
+    parser.add_argument('output', help="Priced output; .parquet/.pq writes Parquet, anything else CSV")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--interval', type=float, nargs=2, metavar=('LOW', 'HIGH'),
+                        help=f"Add these percentiles of the trees' prices as columns (e.g. {INTERVAL[0]} {INTERVAL[1]})")
+    parser.add_argument('--model-dir', default=os.path.join(base_dir, 'models'))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        raise SystemExit(f"{args.input} not found")
+    model = load_model(args.model_dir)
+    if model is None:
+        raise SystemExit(f"No model in {args.model_dir}; run train_models.py first")
+
+    def report(rows, fraction, rate):
+        done = f" ({fraction:.0%})" if fraction is not None else ""
+        print(f"\r{rows:,} rows priced{done}, {rate:,.0f} rows/sec", end='', flush=True)
+
+    try:
+        stats = price_file(model, args.input, args.output, args.chunksize, progress=report, interval=args.interval)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"\nPriced {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec), saved to {args.output}")
+    if stats['invalid_numbers']:
+        print(f"{stats['invalid_numbers']:,} non-numeric RAM/Storage/Display values were treated as missing")
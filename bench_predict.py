@@ -0,0 +1,82 @@
+import argparse
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from compact_model import CompactForest, load_compact
+from serving import INTERVAL, predict_interval
+
+# Compares the sklearn pipeline with the compact engine on the shipped model:
+# prediction parity, single-row latency and batch throughput. Batches are
+# timed with every row random (configs 0) and drawn from a pool of distinct
+# configurations, as in a catalogue where many SKUs share a spec. Price ranges
+# (per-tree percentiles) are checked against sklearn's trees and timed
+# alongside. tests/test_compact_model.py holds the parity checks.
+
+def random_rows(engine, n, rng, unknown=0.05):
+    # Known categories plus some unknown and missing values, and numeric
+    # values on and off the app's grid
+    data = {}
+    for cat in engine.categorical:
+        values = np.array(cat['categories'] + ['Unknown', None], dtype=object)
+        p = np.r_[np.full(len(cat['categories']), (1 - unknown) / len(cat['categories'])), unknown / 2, unknown / 2]
+        data[cat['name']] = values[rng.choice(len(values), n, p=p)]
+    data['RAM'] = rng.choice([4, 8, 12, 16, 24, 32, 64, np.nan], n)
+    data['Storage_GB'] = rng.choice([128, 256, 512, 1024, 2048, 4096, np.nan], n)
+    data['Display_Inch'] = np.round(rng.uniform(10, 21, n), 1)
+    return pd.DataFrame(data)
+
+def catalogue(engine, n, configs, rng):
+    if not configs:
+        return random_rows(engine, n, rng)
+    pool = random_rows(engine, configs, rng)
+    return pool.iloc[rng.integers(0, configs, n)].reset_index(drop=True)
+
+def best_of(func, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Pipeline.predict vs the compact forest engine.")
+    parser.add_argument('--model', default=os.path.join(base_dir, 'models', 'laptop_price_model.joblib'))
+    parser.add_argument('--compact', default=os.path.join(base_dir, 'models', 'laptop_price_model.forest'))
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--configs', type=int, nargs='+', default=[0, 5_000],
+                        help="Distinct configurations per batch (0: all random)")
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    engine = load_compact(args.compact) if os.path.exists(args.compact) else CompactForest.from_pipeline(pipeline)
+    rng = np.random.default_rng(0)
+
+    check = random_rows(engine, 20_000, rng)
+    diff = np.abs(engine.predict(check) - pipeline.predict(check))
+    print(f"Parity on {len(check):,} random rows ({engine.header['leaves']} leaves): max |diff| ₹{diff.max():.2e}")
+    bounds = np.abs(engine.predict_interval(check, INTERVAL)[1] - predict_interval(pipeline, check)[1])
+    print(f"Interval parity (P{INTERVAL[0]}-P{INTERVAL[1]} of the trees): max |diff| ₹{bounds.max():.2e}")
+
+    row = check.iloc[:1]
+    record = row.to_dict('records')[0]
+    pipeline_s = best_of(lambda: pipeline.predict(row), 50)
+    engine_s = best_of(lambda: engine.predict(row), 200)
+    row_s = best_of(lambda: engine.predict_row(record), 200)
+    print(f"\nSingle row: Pipeline.predict {pipeline_s * 1e3:.2f} ms, engine.predict(DataFrame) "
+          f"{engine_s * 1e3:.3f} ms, engine.predict_row(dict) {row_s * 1e3:.3f} ms "
+          f"({pipeline_s / row_s:.0f}x)")
+
+    print(f"\n{'configs':>7} {'rows':>9} {'distinct':>9} {'pipeline rows/s':>16} {'engine rows/s':>14} {'speedup':>8} "
+          f"{'interval rows/s':>16} {'vs predict':>10}")
+    for configs, n in ((configs, n) for configs in args.configs for n in args.rows):
+        batch = catalogue(engine, n, configs, rng)
+        distinct = len(batch.drop_duplicates())
+        pipeline_s = best_of(lambda: pipeline.predict(batch), 1)
+        engine_s = best_of(lambda: engine.predict(batch), 1)
+        interval_s = best_of(lambda: engine.predict_interval(batch, INTERVAL), 1)
+        print(f"{configs:>7,} {n:>9,} {distinct:>9,} {n / pipeline_s:>16,.0f} {n / engine_s:>14,.0f} "
+              f"{pipeline_s / engine_s:>7.1f}x {n / interval_s:>16,.0f} {interval_s / engine_s:>9.2f}x")
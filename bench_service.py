@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from price_lattice import grid_axes
+
+# Load generator for predict_service.py. Each of --concurrency clients keeps
+# one connection open and sends single-laptop requests back to back for
+# --duration seconds; latency is measured per request. By default it starts a
+# local instance per --window-ms value (to compare no batching with
+# micro-batching); --url points it at a running service instead.
+
+def sample_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    axes = grid_axes()
+    return [json.dumps({name: values[rng.integers(len(values))] for name, values in axes.items()}).encode()
+            for _ in range(n)]
+
+async def request(reader, writer, host, body):
+    writer.write(f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(host, port, bodies, deadline, latencies, errors, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await request(reader, writer, host, bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            i += 1
+    finally:
+        writer.close()
+
+async def load(host, port, concurrency, duration, bodies):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(client(host, port, bodies, deadline, latencies, errors, i * 7919)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1e3
+    return {'requests': len(ms), 'errors': len(errors), 'rps': len(ms) / elapsed,
+            'p50': float(np.percentile(ms, 50)), 'p99': float(np.percentile(ms, 99))}
+
+def start_service(port, window_ms, workers):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen([sys.executable, os.path.join(base_dir, 'predict_service.py'), '--port', str(port),
+                                '--window-ms', str(window_ms), '--workers', str(workers)],
+                               stdout=subprocess.DEVNULL)
+    # Ready once /health answers
+    for _ in range(200):
+        try:
+            asyncio.run(asyncio.wait_for(health('127.0.0.1', port), 1))
+            return process
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            time.sleep(0.05)
+    process.kill()
+    raise SystemExit("service did not start")
+
+async def health(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /health HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    writer.close()
+    return status
+
+def run(host, port, levels, duration, bodies, label):
+    for concurrency in levels:
+        r = asyncio.run(load(host, port, concurrency, duration, bodies))
+        print(f"{label:>14} {concurrency:>11} {r['requests']:>9,} {r['rps']:>9,.0f} {r['p50']:>8.2f} "
+              f"{r['p99']:>8.2f} {r['errors']:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and throughput of the prediction service.")
+    parser.add_argument('--url', help="host:port of a running service (default: start local instances)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per concurrency level")
+    parser.add_argument('--window-ms', type=float, nargs='+', default=[0.0, 2.0])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8601)
+    args = parser.parse_args()
+
+    bodies = sample_rows(5000)
+    print(f"{'service':>14} {'concurrency':>11} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7}")
+    if args.url:
+        host, port = args.url.rsplit(':', 1)
+        run(host, int(port), args.concurrency, args.duration, bodies, args.url)
+    else:
+        for window in args.window_ms:
+            service = start_service(args.port, window, args.workers)
+            try:
+                run('127.0.0.1', args.port, args.concurrency, args.duration, bodies, f"window {window:g} ms")
+            finally:
+                service.terminate()
+                service.wait()
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from project_paths import ROOT as BASE_DIR
+
+import numpy as np
+from synthetic_data import make_listings, make_ready, write_raw
+from process_data import (extract_brand_series, extract_ram_series, extract_storage_series, extract_processor_series,
+                          extract_gpu_series, extract_display_series, clean_price_series, extract_features, clean_data)
+from extractors import BACKENDS, extract_page, lxml
+from page_cache import DEFAULT_CACHE_DIR
+from bench_extract import cached_pages, synthetic_pages
+from model_selection import CANDIDATES, FEATURES, TARGET, make_pipeline
+from serving import WARMUP_ROW, load_model, model_path, predict_one, release
+
+# Reproducible benchmark suite for the whole project, on synthetic data built
+# from the extractors' and taxonomy's vocabularies (synthetic_data.py):
+#   parse    HTML extraction per backend, on recorded pages (page cache) or mock pages
+#   extract  each extract_*_series / clean_price_series, and extract_features
+#   clean    clean_data end-to-end on raw Amazon + Flipkart CSVs (cache off)
+#   train    the final Random Forest fit train_eval runs
+#   predict  single-row latency (p50/p99) and batch throughput of the served model
+# Each timing is the best of --repeats runs. `run` writes the results as JSON
+# (bench_results/<release>.json by default); `compare` flags every timing that
+# got slower than a baseline by more than --threshold.
+
+STAGES = ['parse', 'extract', 'clean', 'train', 'predict']
+DEFAULT_ROWS = [1_000, 100_000]
+DEFAULT_TRAIN_ROWS = [1_000, 10_000]
+THRESHOLD = 0.15
+SINGLE_CALLS = 200
+
+def best_of(func, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def result(stage, name, rows, seconds, unit='rows', **extra):
+    return {'stage': stage, 'name': name, 'rows': rows, 'unit': unit, 'seconds': seconds,
+            'rate': rows / seconds if seconds else None, **extra}
+
+def bench_parse(args):
+    pages = cached_pages(DEFAULT_CACHE_DIR) if os.path.isdir(DEFAULT_CACHE_DIR) else []
+    source = 'recorded'
+    if not pages:
+        pages, source = synthetic_pages(args.pages), 'synthetic'
+    for backend in BACKENDS:
+        if backend == 'lxml' and lxml is None:
+            continue
+        seconds = best_of(lambda: [extract_page(site, content, backend) for site, content in pages], args.repeats)
+        yield result('parse', f"extract_page[{backend}]", len(pages), seconds, unit='pages', pages=source)
+
+def bench_extract(args):
+    extractors = [
+        ('extract_brand_series', extract_brand_series, 'Title'),
+        ('extract_ram_series', extract_ram_series, 'Combined_Text'),
+        ('extract_storage_series', extract_storage_series, 'Combined_Text'),
+        ('extract_processor_series', extract_processor_series, 'Combined_Text'),
+        ('extract_gpu_series', extract_gpu_series, 'Combined_Text'),
+        ('extract_display_series', extract_display_series, 'Combined_Text'),
+        ('clean_price_series', clean_price_series, 'Price'),
+    ]
+    for n in args.rows:
+        df = make_listings(n, seed=args.seed)
+        for name, func, column in extractors:
+            yield result('extract', name, n, best_of(lambda: func(df[column]), args.repeats))
+        yield result('extract', 'extract_features', n, best_of(lambda: extract_features(df.copy()), args.repeats))
+        del df
+
+def bench_clean(args):
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_raw(data_dir, n, seed=args.seed)
+
+            def run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    clean_data(workers=args.workers, use_cache=False, data_dir=data_dir)
+            yield result('clean', 'clean_data', n, best_of(run, args.repeats), workers=args.workers)
+
+def bench_train(args):
+    for n in args.train_rows:
+        df = make_ready(n, seed=args.seed)
+        X, y = df[FEATURES], df[TARGET]
+        seconds = best_of(lambda: make_pipeline(args.model, n_jobs=-1).fit(X, y), args.repeats)
+        yield result('train', f"fit[{args.model}]", n, seconds)
+
+def bench_predict(args):
+    path = model_path(args.model_dir)
+    if path is None:
+        print(f"  no model in {args.model_dir}, skipping predict")
+        return
+    model = load_model(args.model_dir)
+    served = os.path.basename(path)
+    predict_one(model, WARMUP_ROW)
+    rows = make_ready(SINGLE_CALLS, seed=args.seed)[FEATURES].to_dict('records')
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        predict_one(model, row)
+        latencies.append(time.perf_counter() - start)
+    yield result('predict', 'predict_one', 1, float(np.percentile(latencies, 50)), model=served,
+                 p99_s=float(np.percentile(latencies, 99)))
+    for n in args.rows:
+        X = make_ready(n, seed=args.seed)[FEATURES]
+        yield result('predict', 'predict[batch]', n, best_of(lambda: model.predict(X), args.repeats), model=served)
+
+def run_suite(args):
+    benches = {'parse': bench_parse, 'extract': bench_extract, 'clean': bench_clean, 'train': bench_train,
+               'predict': bench_predict}
+    results = []
+    for stage in args.stages:
+        print(f"[{stage}]")
+        for r in benches[stage](args):
+            results.append(r)
+            print(f"  {r['name']:<30} {r['rows']:>12,} {r['unit']:<5} {r['seconds'] * 1e3:>12.2f} ms "
+                  f"{r['rate']:>14,.0f} {r['unit']}/s")
+    return {'release': release(), 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'config': {'rows': args.rows, 'train_rows': args.train_rows, 'repeats': args.repeats,
+                       'seed': args.seed, 'workers': args.workers, 'model': args.model},
+            'results': results}
+
+def compare(baseline, current, threshold=THRESHOLD):
+    # Prints each timing present in both runs; returns the regressions
+    key = lambda r: (r['stage'], r['name'], r['rows'])
+    before = {key(r): r for r in baseline['results']}
+    regressions = []
+    print(f"Baseline {baseline['release']} ({baseline['date']}) -> current {current['release']} ({current['date']})")
+    print(f"{'stage':<8} {'name':<30} {'rows':>12} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for r in current['results']:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        change = r['seconds'] / old['seconds'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append((r, change))
+        print(f"{r['stage']:<8} {r['name']:<30} {r['rows']:>12,} {old['seconds'] * 1e3:>12.2f} "
+              f"{r['seconds'] * 1e3:>12.2f} {change:>+8.1%}{flag}")
+    if baseline.get('cpus') != current.get('cpus') or baseline.get('machine') != current.get('machine'):
+        print("Note: the runs come from different machines")
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scraping, cleaning, training and inference.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_cmd = commands.add_parser('run', help="Run the suite and save the results as JSON")
+    run_cmd.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    run_cmd.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                         help="Listing counts for extract, clean and batch predict (up to 10M)")
+    run_cmd.add_argument('--train-rows', type=int, nargs='+', default=DEFAULT_TRAIN_ROWS)
+    run_cmd.add_argument('--pages', type=int, default=40, help="Synthetic pages per site when the page cache is empty")
+    run_cmd.add_argument('--repeats', type=int, default=3)
+    run_cmd.add_argument('--seed', type=int, default=0)
+    run_cmd.add_argument('--workers', type=int, default=None, help="clean_data worker processes (default: all cores)")
+    run_cmd.add_argument('--model', default="Random Forest", choices=list(CANDIDATES))
+    run_cmd.add_argument('--model-dir', default=os.path.join(BASE_DIR, 'models'))
+    run_cmd.add_argument('--out', help="Results file (default: bench_results/<release>.json)")
+    run_cmd.add_argument('--baseline', help="Compare against this results file when done")
+    run_cmd.add_argument('--threshold', type=float, default=THRESHOLD, help="Slowdown flagged as a regression")
+    compare_cmd = commands.add_parser('compare', help="Flag regressions of a run against a baseline")
+    compare_cmd.add_argument('baseline')
+    compare_cmd.add_argument('current')
+    compare_cmd.add_argument('--threshold', type=float, default=THRESHOLD, help="Slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        current = run_suite(args)
+        out = args.out or os.path.join(BASE_DIR, 'bench_results', f"{current['release']}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(current, f, indent=1)
+        print(f"Results saved to {out}")
+        baseline = load_results(args.baseline) if args.baseline else None
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} timings regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%}")
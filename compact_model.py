@@ -0,0 +1,482 @@
+import argparse
+import json
+import os
+import time
+from itertools import repeat
+import numpy as np
+
+# Flat, memory-mappable copy of the trained price pipeline. The fitted forest
+# and the preprocessing it needs (imputer fills and one-hot vocabularies) are
+# written as contiguous NumPy arrays behind a small JSON header:
+#   b'LPFOREST' | uint32 format version | uint32 header length | JSON header |
+#   arrays, each 64-byte aligned, at the offsets listed in the header
+# Loading maps the file read-only instead of unpickling sklearn objects, so it
+# takes milliseconds and every serving process on a machine shares the same
+# page-cache copy of the trees.
+#
+# All trees' nodes are concatenated; `roots` holds each tree's first node and
+# `children` each node's (left, right) global node indices. Leaves are their
+# own children, which is how a walk knows it has arrived.
+#
+# Batches are routed through leaf bitmasks instead (QuickScorer): a row
+# leaves every tree at the leftmost leaf outside the left subtrees of the
+# nodes it fails (x > threshold). Every split tests one of the six raw inputs,
+# so per input and per value interval (or category) the AND of those masks is
+# precomputed, and a row's leaves are the lowest set bits of six ANDed masks,
+# whatever the trees' depth.
+
+MAGIC = b'LPFOREST'
+FORMAT_VERSION = 2
+ALIGN = 64
+LEAF_ENCODINGS = ('float64', 'float32', 'uint16')
+BATCH_ROWS = 4096
+# Batches of at least this many rows use the leaf bitmasks, when trees have at
+# most MASK_WORDS * 64 leaves; other batches (single rows) walk the trees
+MASK_ROWS = 64
+MASK_WORDS = 8
+# Rows per step of the bitmask routing, so its (rows, trees, words) masks
+# stay about this size and in cache
+MASK_BYTES = 2 ** 21
+# Low k bits set, k = 0..64
+_LOW_BITS = np.array([(1 << k) - 1 for k in range(65)], dtype=np.uint64)
+
+
+def _below_float32(threshold):
+    # Largest float32 at or under each threshold. Trees compare float32 inputs,
+    # and for a float32 x, x <= t exactly when x <= this value, so float32
+    # thresholds give the same splits as the float64 originals.
+    lower = threshold.astype(np.float32)
+    over = lower.astype(np.float64) > threshold
+    lower[over] = np.nextafter(lower[over], np.float32(-np.inf))
+    return lower
+
+def _is_missing(value):
+    # None, NaN or pandas' NA
+    if value is None or type(value).__name__ == 'NAType':
+        return True
+    return isinstance(value, float) and value != value
+
+def _preprocessing(preprocessor):
+    # Imputer fills and one-hot vocabularies from the fitted ColumnTransformer,
+    # in the column order of its output
+    numeric, categorical = [], []
+    column = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == 'remainder':
+            continue
+        if name == 'num':
+            for col, fill in zip(columns, transformer.statistics_):
+                numeric.append({'name': col, 'fill': float(fill), 'column': column})
+                column += 1
+        else:
+            imputer = transformer.named_steps['imputer']
+            encoder = transformer.named_steps['onehot']
+            for col, fill, categories in zip(columns, imputer.statistics_, encoder.categories_):
+                categories = [str(c) for c in categories]
+                categorical.append({'name': col, 'fill': str(fill), 'categories': categories, 'column': column})
+                column += len(categories)
+    return numeric, categorical, column
+
+def flatten_forest(estimators):
+    roots, feature, threshold, children, value = [], [], [], [], []
+    depth, start = 0, 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        leaf = tree.children_left < 0
+        nodes = np.arange(tree.node_count)
+        roots.append(start)
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, 0.0, tree.threshold))
+        children.append(np.stack([np.where(leaf, nodes, tree.children_left),
+                                  np.where(leaf, nodes, tree.children_right)], axis=1) + start)
+        value.append(tree.value[:, 0, 0])
+        depth = max(depth, tree.max_depth)
+        start += tree.node_count
+    return {
+        'roots': np.asarray(roots, dtype=np.int32),
+        'feature': np.concatenate(feature).astype(np.int16),
+        'threshold': np.concatenate(threshold),
+        'children': np.concatenate(children).astype(np.int32),
+        'value': np.concatenate(value),
+    }, depth
+
+def compact_arrays(pipeline, thresholds='float32', leaves='float64'):
+    # thresholds: 'float32' (exact, see _below_float32) or 'float64'
+    # leaves: 'float64' (exact), 'float32' or 'uint16' (quantized between the
+    # smallest and largest leaf value)
+    if thresholds not in ('float32', 'float64') or leaves not in LEAF_ENCODINGS:
+        raise ValueError(f"Unsupported encoding: thresholds={thresholds!r}, leaves={leaves!r}")
+    model = pipeline.named_steps['model']
+    if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+        raise ValueError(f"{type(model).__name__} is not a tree ensemble; only forests can be exported")
+    numeric, categorical, n_features = _preprocessing(pipeline.named_steps['preprocessor'])
+    if n_features != model.n_features_in_:
+        raise ValueError(f"Preprocessing yields {n_features} columns, the model expects {model.n_features_in_}")
+
+    arrays, depth = flatten_forest(model.estimators_)
+    if thresholds == 'float32':
+        arrays['threshold'] = _below_float32(arrays['threshold'])
+    header = {'model': type(model).__name__, 'n_features': n_features, 'n_trees': len(arrays['roots']),
+              'n_nodes': len(arrays['feature']), 'max_depth': int(depth), 'numeric': numeric,
+              'categorical': categorical, 'leaves': leaves}
+    value = arrays['value']
+    if leaves == 'uint16':
+        low, high = float(value.min()), float(value.max())
+        scale = (high - low) / 65535 or 1.0
+        arrays['value'] = np.rint((value - low) / scale).astype(np.uint16)
+        header.update(leaf_offset=low, leaf_scale=scale)
+    else:
+        arrays['value'] = value.astype(leaves)
+    return header, arrays
+
+def export_compact(pipeline, path, thresholds='float32', leaves='float64'):
+    header, arrays = compact_arrays(pipeline, thresholds, leaves)
+    # Array offsets are relative to the end of the header block, which is
+    # padded to ALIGN so that they stay aligned in the file
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header['arrays'] = layout
+    blob = json.dumps(header).encode('utf-8')
+    start = -(-(len(MAGIC) + 8 + len(blob)) // ALIGN) * ALIGN
+
+    # Per process: app workers may export the same model at once
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([FORMAT_VERSION, len(blob)], dtype='<u4').tobytes())
+        f.write(blob)
+        for name, array in arrays.items():
+            f.seek(start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+class CompactForest:
+    # Inference engine over the flat arrays. Raw inputs (the six feature
+    # values, no DataFrame or sklearn transformers) are encoded straight into
+    # the model's float32 feature matrix, and every (row, tree) pair is walked
+    # at once, one tree level per step.
+    def __init__(self, header, arrays):
+        self.header = header
+        self.n_features = header['n_features']
+        self.n_trees = header['n_trees']
+        self.max_depth = header['max_depth']
+        self.numeric = header['numeric']
+        self.categorical = header['categorical']
+        self.names = [f['name'] for f in self.numeric + self.categorical]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.next_node = self.children.reshape(-1)
+        self.split_points = None
+        self.masks = None
+        # Category -> output column, per categorical input
+        self.vocab = [{c: cat['column'] + i for i, c in enumerate(cat['categories'])} for cat in self.categorical]
+
+    @classmethod
+    def from_pipeline(cls, pipeline, thresholds='float64', leaves='float64'):
+        # In-memory engine for a fitted pipeline, without writing a file
+        return cls(*compact_arrays(pipeline, thresholds, leaves))
+
+    def encode(self, columns):
+        # columns: a DataFrame or any mapping of input name -> sequence. Same
+        # output as the fitted ColumnTransformer, dense and float32: missing
+        # values take the imputer fill, unknown categories encode as all zeros
+        # (handle_unknown='ignore')
+        n = len(columns[self.names[0]])
+        X = np.zeros((n, self.n_features), dtype=np.float32)
+        for num in self.numeric:
+            values = np.asarray(columns[num['name']], dtype=np.float64)
+            X[:, num['column']] = np.where(np.isnan(values), num['fill'], values)
+        rows = np.arange(n)
+        for cat, vocab in zip(self.categorical, self.vocab):
+            values = np.asarray(columns[cat['name']], dtype=object)
+            index = np.fromiter(map(vocab.get, values, repeat(-1, n)), dtype=np.int64, count=n)
+            # Only misses need a closer look: missing values or non-strings
+            for i in np.flatnonzero(index < 0):
+                value = values[i]
+                index[i] = vocab.get(cat['fill'] if _is_missing(value) else str(value), -1)
+            known = index >= 0
+            X[rows[known], index[known]] = 1.0
+        return X
+
+    def encode_row(self, row):
+        # One laptop as a dict of input name -> value
+        X = np.zeros((1, self.n_features), dtype=np.float32)
+        for num in self.numeric:
+            value = row.get(num['name'])
+            X[0, num['column']] = num['fill'] if _is_missing(value) else value
+        for cat, vocab in zip(self.categorical, self.vocab):
+            value = row.get(cat['name'])
+            column = vocab.get(cat['fill'] if _is_missing(value) else str(value))
+            if column is not None:
+                X[0, column] = 1.0
+        return X
+
+    def _split_points(self):
+        # Sorted thresholds the forest uses on each numeric column
+        internal = self.next_node[0::2] != np.arange(len(self.feature))
+        return [np.unique(self.threshold[internal & (self.feature == num['column'])]) for num in self.numeric]
+
+    def bins(self, X):
+        # Per input, the value each row takes as far as the trees can tell:
+        # the interval between split points (numeric) or the category, with
+        # len(categories) for unknown. Returns (bins, number of bins) lists.
+        if self.split_points is None:
+            self.split_points = self._split_points()
+        bins, sizes = [], []
+        for num, points in zip(self.numeric, self.split_points):
+            bins.append(np.searchsorted(points, X[:, num['column']], side='left'))
+            sizes.append(len(points) + 1)
+        for cat in self.categorical:
+            k = len(cat['categories'])
+            block = X[:, cat['column']:cat['column'] + k]
+            bins.append(np.where(block.any(axis=1), block.argmax(axis=1), k))
+            sizes.append(k + 1)
+        return bins, sizes
+
+    def configurations(self, X):
+        # Rows that every tree routes identically get the same integer key:
+        # equal categories and numeric values between the same pair of split
+        # points. None when the key space would not fit in 63 bits.
+        bins, sizes = self.bins(X)
+        key = np.zeros(len(X), dtype=np.int64)
+        radix = 1
+        for b, size in zip(bins, sizes):
+            if radix * size > 2 ** 63:
+                return None
+            key += b * radix
+            radix *= size
+        return key
+
+    def distinct(self, X):
+        # Catalogue batches repeat configurations: (distinct rows, inverse) so
+        # that each one is walked once; inverse is None when nothing repeats
+        if len(X) > 1:
+            key = self.configurations(X)
+            if key is not None:
+                _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+                if len(first) < len(X):
+                    return X[first], inverse
+        return X, None
+
+    def leaves_of(self, X, batch_rows=BATCH_ROWS):
+        # (rows, trees) leaf node reached by each row in each tree
+        X, inverse = self.distinct(X)
+        leaves = np.concatenate([self._leaves(X[start:start + batch_rows]) for start in range(0, len(X), batch_rows)])
+        return leaves if inverse is None else leaves[inverse]
+
+    def _leaves(self, X):
+        if len(X) >= MASK_ROWS:
+            if self.masks is None:
+                self.masks = self._leaf_masks()
+            if self.masks:
+                return self._mask_walk(X)
+        return self._walk(X)
+
+    def _leaf_masks(self):
+        # (per input: (bins, trees, words) uint64 masks of the leaves a row in
+        # that bin can still exit at, (trees, words * 64) leaf node of each
+        # leaf bit), or () when trees are too large or a split tests a column
+        # outside the inputs' layout
+        nodes = np.arange(len(self.feature))
+        is_leaf = self.next_node[0::2] == nodes
+        tree = np.searchsorted(self.roots, nodes, side='right') - 1
+        if self.roots.min() != 0 or not np.array_equal(np.sort(self.roots), self.roots):
+            return ()
+        words = -(-np.bincount(tree[is_leaf], minlength=self.n_trees).max() // 64)
+        columns = [num['column'] for num in self.numeric]
+        for cat in self.categorical:
+            columns.extend(range(cat['column'], cat['column'] + len(cat['categories'])))
+        if words > MASK_WORDS or not np.isin(self.feature[~is_leaf], columns).all():
+            return ()
+
+        # Leaves numbered left to right within each tree; [first, end) are the
+        # numbers of the leaves under a node
+        left, right = self.children[:, 0].tolist(), self.children[:, 1].tolist()
+        first, end = [0] * len(nodes), [0] * len(nodes)
+        for root in self.roots.tolist():
+            rank, stack = 0, [(root, False)]
+            while stack:
+                node, visited = stack.pop()
+                if left[node] == node:
+                    first[node], end[node] = rank, rank + 1
+                    rank += 1
+                elif visited:
+                    first[node], end[node] = first[left[node]], end[right[node]]
+                else:
+                    stack += [(node, True), (right[node], False), (left[node], False)]
+        first, end = np.array(first), np.array(end)
+        leaf_node = np.zeros((self.n_trees, words * 64), dtype=np.int64)
+        leaf_node[tree[is_leaf], first[is_leaf]] = nodes[is_leaf]
+
+        # Failing a split rules out the leaves of its left subtree
+        internal = nodes[~is_leaf]
+        lo, hi = first[self.children[internal, 0]], end[self.children[internal, 0]]
+        offsets = np.arange(words) * 64
+        keep = ~(_LOW_BITS[np.clip(hi[:, None] - offsets, 0, 64)] ^ _LOW_BITS[np.clip(lo[:, None] - offsets, 0, 64)])
+        feature, threshold, tree = self.feature[internal], self.threshold[internal], tree[internal]
+
+        if self.split_points is None:
+            self.split_points = self._split_points()
+        masks = []
+        for num, points in zip(self.numeric, self.split_points):
+            # A value in bin b fails the splits on the first b split points
+            on = feature == num['column']
+            step = np.full((len(points) + 1, self.n_trees, words), _LOW_BITS[64])
+            np.bitwise_and.at(step, (np.searchsorted(points, threshold[on]) + 1, tree[on]), keep[on])
+            masks.append(np.bitwise_and.accumulate(step, axis=0))
+        for cat in self.categorical:
+            k = len(cat['categories'])
+            on = (feature >= cat['column']) & (feature < cat['column'] + k)
+            mask = np.full((k + 1, self.n_trees, words), _LOW_BITS[64])
+            for value in range(k + 1):
+                fails = on & ((feature == cat['column'] + value).astype(np.float32) > threshold)
+                np.bitwise_and.at(mask[value], tree[fails], keep[fails])
+            masks.append(mask)
+        return masks, leaf_node
+
+    def _mask_walk(self, X):
+        masks, leaf_node = self.masks
+        bins, _ = self.bins(X)
+        trees = np.arange(self.n_trees)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.int64)
+        step = max(1, MASK_BYTES // leaf_node.shape[1] // self.n_trees)
+        for start in range(0, len(X), step):
+            rows = slice(start, start + step)
+            alive = masks[0][bins[0][rows]]
+            for mask, b in zip(masks[1:], bins[1:]):
+                alive &= mask[b[rows]]
+            # Lowest set bit: its word, then its position in the word
+            word = (alive != 0).argmax(axis=2)
+            bits = np.take_along_axis(alive, word[..., None], axis=2)[..., 0]
+            bit = np.frexp((bits & (~bits + np.uint64(1))).astype(np.float64))[1] - 1
+            leaves[rows] = leaf_node[trees, word * 64 + bit]
+        return leaves
+
+    def _walk(self, X):
+        # Every (row, tree) pair steps down one level at a time. Pairs at a
+        # leaf step to themselves; they are dropped from the working set once
+        # they are half of it, so the cost follows the actual path lengths.
+        n = len(X)
+        leaves = np.empty(n * self.n_trees, dtype=np.int64)
+        flat_X = np.ascontiguousarray(X, dtype=np.float32).reshape(-1)
+        pair = np.arange(n * self.n_trees)
+        node = np.tile(self.roots.astype(np.int64), n)
+        row_start = np.repeat(np.arange(n, dtype=np.int64) * self.n_features, self.n_trees)
+        for _ in range(self.max_depth + 1):
+            go_right = flat_X[row_start + self.feature[node]] > self.threshold[node]
+            step = self.next_node[2 * node + go_right]
+            done = step == node
+            settled = np.count_nonzero(done)
+            if settled == len(node):
+                break
+            if settled * 2 > len(node):
+                leaves[pair[done]] = node[done]
+                live = ~done
+                pair, node, row_start = pair[live], step[live], row_start[live]
+            else:
+                node = step
+        leaves[pair] = node
+        return leaves.reshape(n, self.n_trees)
+
+    def leaf_values(self, leaves):
+        value = self.value[leaves]
+        if self.header['leaves'] == 'uint16':
+            return value * self.header['leaf_scale'] + self.header['leaf_offset']
+        return value.astype(np.float64)
+
+    def tree_values(self, X):
+        # (rows, trees) prediction of every tree for every row
+        return self.leaf_values(self.leaves_of(X))
+
+    def _aggregate(self, X, percentiles=(), batch_rows=BATCH_ROWS):
+        # Mean of the trees (column 0) and the given percentiles of the
+        # per-tree predictions, from one walk per distinct row. Memory stays
+        # at batch_rows x n_trees.
+        X, inverse = self.distinct(X)
+        out = np.empty((len(X), 1 + len(percentiles)))
+        for start in range(0, len(X), batch_rows):
+            values = self.leaf_values(self._leaves(X[start:start + batch_rows]))
+            out[start:start + batch_rows, 0] = values.mean(axis=1)
+            if len(percentiles):
+                out[start:start + batch_rows, 1:] = np.percentile(values, percentiles, axis=1).T
+        return out if inverse is None else out[inverse]
+
+    def predict_encoded(self, X, batch_rows=BATCH_ROWS):
+        return self._aggregate(X, batch_rows=batch_rows)[:, 0]
+
+    def predict(self, columns, batch_rows=BATCH_ROWS):
+        return self.predict_encoded(self.encode(columns), batch_rows)
+
+    def predict_row(self, row):
+        return float(self.predict_encoded(self.encode_row(row))[0])
+
+    def predict_interval(self, columns, percentiles, batch_rows=BATCH_ROWS):
+        # (mean, (rows, len(percentiles)) array): the price and where it falls
+        # among the trees, e.g. the 5th and 95th percentile of their predictions
+        out = self._aggregate(self.encode(columns), percentiles, batch_rows)
+        return out[:, 0], out[:, 1:]
+
+    def predict_row_interval(self, row, percentiles):
+        out = self._aggregate(self.encode_row(row), percentiles)[0]
+        return float(out[0]), out[1:].tolist()
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compact model file")
+        version, length = np.frombuffer(f.read(8), dtype='<u4')
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}; this loader reads {FORMAT_VERSION}")
+        header = json.loads(f.read(int(length)))
+    header['data_offset'] = -(-(len(MAGIC) + 8 + int(length)) // ALIGN) * ALIGN
+    return header
+
+def load_compact(path, mmap=True):
+    # mmap=True maps the file read-only (shared between processes); False
+    # reads it into private memory
+    header = read_header(path)
+    if mmap:
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            data = np.frombuffer(f.read(), dtype=np.uint8)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = header['data_offset'] + spec['offset']
+        count = int(np.prod(spec['shape']))
+        arrays[name] = data[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return CompactForest(header, arrays)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a trained forest pipeline to the compact format, or inspect one.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_cmd = commands.add_parser('export', help="Convert a joblib pipeline")
+    export_cmd.add_argument('model')
+    export_cmd.add_argument('path')
+    export_cmd.add_argument('--thresholds', default='float32', choices=['float32', 'float64'])
+    export_cmd.add_argument('--leaves', default='float64', choices=LEAF_ENCODINGS)
+    info_cmd = commands.add_parser('info', help="Print the header and time a load")
+    info_cmd.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        import joblib
+        size = export_compact(joblib.load(args.model), args.path, args.thresholds, args.leaves)
+        print(f"Wrote {args.path} ({size / 1e6:.2f} MB)")
+    else:
+        start = time.perf_counter()
+        model = load_compact(args.path)
+        elapsed = time.perf_counter() - start
+        header = model.header
+        print(f"{header['model']}: {header['n_trees']} trees, {header['n_nodes']} nodes, "
+              f"max depth {header['max_depth']}, {header['n_features']} features, leaves {header['leaves']}")
+        for name, spec in header['arrays'].items():
+            print(f"  {name:<10} {spec['dtype']:<5} {spec['shape']}")
+        print(f"Loaded in {elapsed * 1e3:.2f} ms")
@@ -0,0 +1,294 @@
+import argparse
+import bisect
+import collections
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+# Stage-level instrumentation for the scrapers, the cleaning steps, training
+# and serving. Standard library only.
+#
+#   with span('clean_data') as stage:     # wall and CPU time, peak RSS
+#       ...
+#       stage.add(rows=n, bytes_read=size)
+#
+# Spans are off unless PRICE_METRICS names a JSON-lines file ('-' for stderr):
+# span() then hands back a shared no-op object, so instrumented code pays one
+# function call per stage. When on, each finished span appends one record with
+# seconds, cpu_seconds, rows, bytes_read/bytes_written, peak_rss_mb (the peak
+# while the span was open, where /proc allows resetting it) and the peak of
+# finished child processes. `python instrumentation.py summary FILE` prints
+# the records per stage.
+#
+# PRICE_PROFILE=stage[,stage...] (or 'all') samples the stack of the thread
+# that opened those spans every 5 ms and writes folded stacks to
+# PRICE_PROFILE_DIR/<stage>-<pid>-<time>.folded when the span ends, ready for
+# flamegraph.pl or speedscope. Worker processes are not sampled.
+#
+# Latency histograms (histogram()) are always on, an observe is a bisect under
+# a lock; render_prometheus() gives them in Prometheus text format, which
+# predict_service.py serves at /metrics.
+
+METRICS_LOG = os.environ.get('PRICE_METRICS')
+PROFILE = {name.strip() for name in os.environ.get('PRICE_PROFILE', '').split(',') if name.strip()}
+PROFILE_DIR = os.environ.get('PRICE_PROFILE_DIR', 'profiles')
+SAMPLE_INTERVAL = 0.005
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def path_size(path):
+    # Bytes in a file, or in every file under a directory (a dataset)
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for folder, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(folder, name)) for name in files)
+    return total
+
+def _peak_rss_kb():
+    # High-water mark of this process since the last reset
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+); elsewhere the peak
+    # stays the process lifetime's
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class _Log:
+    def __init__(self, target):
+        self.target = target
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            if self.target == '-':
+                sys.stderr.write(line)
+            else:
+                with open(self.target, 'a') as f:
+                    f.write(line)
+
+_log = _Log(METRICS_LOG) if METRICS_LOG else None
+_open_spans = []
+_spans_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    # Samples one thread's Python stack at a fixed interval from a helper
+    # thread and counts identical stacks (folded format: root;...;leaf count)
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def _run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self, path):
+        self.done.set()
+        self.thread.join()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class Span:
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = fields
+        self.counts = {'rows': 0, 'bytes_read': 0, 'bytes_written': 0}
+        self.peak_kb = 0
+        self.profiler = None
+
+    def add(self, **counts):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def __enter__(self):
+        with _spans_lock:
+            # Spans still open keep the peak seen so far before it is reset
+            peak = _peak_rss_kb()
+            for outer in _open_spans:
+                outer.peak_kb = max(outer.peak_kb, peak)
+            _reset_peak_rss()
+            _open_spans.append(self)
+        if 'all' in PROFILE or self.stage in PROFILE:
+            self.profiler = SamplingProfiler(threading.get_ident()).start()
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        cpu_seconds = time.process_time() - self.cpu_start
+        with _spans_lock:
+            self.peak_kb = max(self.peak_kb, _peak_rss_kb())
+            _open_spans.remove(self)
+            for outer in _open_spans:
+                outer.peak_kb = max(outer.peak_kb, self.peak_kb)
+        histogram('price_stage_seconds', "Wall time of pipeline stages", stage=self.stage).observe(seconds)
+        record = {'ts': time.time(), 'stage': self.stage, 'pid': os.getpid(), 'status': 'error' if exc_type else 'ok',
+                  'seconds': round(seconds, 6), 'cpu_seconds': round(cpu_seconds, 6), **self.counts,
+                  'peak_rss_mb': round(self.peak_kb / 1024, 1),
+                  'children_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+                  **self.fields}
+        if self.profiler is not None:
+            name = f"{self.stage.replace('/', '_')}-{os.getpid()}-{int(time.time())}.folded"
+            record['profile'] = self.profiler.stop(os.path.join(PROFILE_DIR, name))
+        if _log is not None:
+            _log.write(record)
+        return False
+
+
+class _NullSpan:
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+def span(stage, **fields):
+    # Extra keyword fields go into the record as they are
+    if _log is None and not PROFILE:
+        return NULL_SPAN
+    return Span(stage, fields)
+
+
+class Histogram:
+    # Cumulative-bucket latency histogram in seconds, Prometheus style
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += seconds
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.sum
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th quantile (None if empty)
+        counts, _ = self.snapshot()
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= q * total:
+                return bound
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+def histogram(name, help='', **labels):
+    # One histogram per (name, labels), created on first use
+    key = (name, tuple(sorted(labels.items())))
+    found = _histograms.get(key)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(key, Histogram(name, help, dict(labels)))
+    return found
+
+def render_prometheus():
+    lines, described = [], set()
+    for (name, _), h in sorted(_histograms.items()):
+        if name not in described:
+            lines += [f"# HELP {name} {h.help}", f"# TYPE {name} histogram"]
+            described.add(name)
+        counts, total = h.snapshot()
+        labels = ','.join(f'{k}="{v}"' for k, v in sorted(h.labels.items()))
+        prefix = labels + ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(h.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ''
+        lines += [f"{name}_sum{suffix} {total:.6f}", f"{name}_count{suffix} {cumulative}"]
+    return '\n'.join(lines) + '\n'
+
+def summarize(path):
+    # Per stage: runs, last and slowest seconds, rows/sec, MB read/written, peak RSS
+    stages = collections.OrderedDict()
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            stages.setdefault(record['stage'], []).append(record)
+    print(f"{'stage':<28} {'runs':>5} {'last s':>9} {'max s':>9} {'rows/s':>12} {'read MB':>9} {'written MB':>11} "
+          f"{'peak RSS MB':>12}")
+    for stage, records in stages.items():
+        last = records[-1]
+        rate = last['rows'] / last['seconds'] if last['rows'] and last['seconds'] else 0
+        print(f"{stage:<28} {len(records):>5} {last['seconds']:>9.2f} {max(r['seconds'] for r in records):>9.2f} "
+              f"{rate:>12,.0f} {last['bytes_read'] / 1e6:>9.1f} {last['bytes_written'] / 1e6:>11.1f} "
+              f"{last['peak_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a PRICE_METRICS span log.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary_cmd = commands.add_parser('summary', help="Per-stage table of a JSON-lines span log")
+    summary_cmd.add_argument('path')
+    args = parser.parse_args()
+    summarize(args.path)
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from synthetic_data import make_ready
+from dataset_store import DatasetWriter
+from model_selection import FEATURES, TARGET, make_pipeline
+from out_of_core import fit_forest
+
+# Peak RSS and fit time of the Random Forest training paths on synthetic
+# partitioned datasets (1M and 10M rows by default):
+#   pipeline  what train_eval does: read the columns, Pipeline.fit
+#   full      out_of_core, every row in one dense float32 block
+#   sample    out_of_core, stratified reservoir sample of --sample-rows
+#   chunks    out_of_core, trees grown block by block (--chunk-rows)
+# Every run is a fresh interpreter, so its peak RSS is its own. MAE is on
+# unseen synthetic rows.
+
+MODES = ['pipeline', 'full', 'sample', 'chunks']
+
+def write_dataset(path, n, seed=0, chunksize=1_000_000):
+    writer = DatasetWriter(path, FEATURES + [TARGET], scrape_date='2026-10-01')
+    for i, start in enumerate(range(0, n, chunksize)):
+        df = make_ready(min(chunksize, n - start), seed=seed * 1_000_003 + i)
+        df['Source'] = np.where(np.arange(len(df)) % 2, 'Amazon', 'Flipkart')
+        writer.write(df)
+    writer.close()
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+
+def run_mode(mode, path, trees, sample_rows, chunk_rows):
+    start = time.perf_counter()
+    if mode == 'pipeline':
+        df = pd.read_parquet(path, columns=FEATURES + [TARGET])
+        pipeline = make_pipeline("Random Forest", n_jobs=-1, n_estimators=trees).fit(df[FEATURES], df[TARGET])
+        rows = len(df)
+        del df
+    else:
+        options = {'sample': {'sample_rows': sample_rows}, 'chunks': {'chunk_rows': chunk_rows}}.get(mode, {})
+        pipeline, info = fit_forest(path, n_estimators=trees, **options)
+        rows = info['fitted_rows']
+    seconds = time.perf_counter() - start
+    test = make_ready(20_000, seed=999)
+    mae = float(np.abs(pipeline.predict(test[FEATURES]) - test[TARGET]).mean())
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss_mb(), 'fitted_rows': rows, 'mae': mae}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory and time of the Random Forest training paths.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--sample-rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(*args.child, args.trees, args.sample_rows, args.chunk_rows)))
+        sys.exit()
+    print(f"{'rows':>11} {'mode':<9} {'fitted rows':>12} {'seconds':>9} {'peak RSS MB':>12} {'MAE':>9}")
+    for n in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'laptops_v2_ready')
+            write_dataset(path, n)
+            for mode in args.modes:
+                if mode == 'sample' and args.sample_rows >= n:
+                    continue
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path,
+                                      '--trees', str(args.trees), '--sample-rows', str(args.sample_rows),
+                                      '--chunk-rows', str(args.chunk_rows)],
+                                     capture_output=True, text=True, check=True).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{n:>11,} {mode:<9} {r['fitted_rows']:>12,} {r['seconds']:>9.1f} {r['peak_rss_mb']:>12.0f} "
+                      f"{r['mae']:>9,.0f}", flush=True)
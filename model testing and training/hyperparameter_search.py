@@ -0,0 +1,177 @@
+import math
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from model_selection import make_folds
+
+# Successive-halving search over Random Forest hyperparameters under a
+# wall-clock budget. Rung 0 cross-validates many sampled configurations on a
+# small slice of each training fold; every later rung keeps the best 1/factor
+# of them and multiplies the rows they train on by factor, until the last few
+# survivors see all of it. Folds are preprocessed once and memory-mapped into the worker
+# processes. Survivors are reported with single-row predict latency and pickled
+# size next to accuracy, since a serving model is chosen on all three.
+
+SEARCH_SPACE = {
+    'n_estimators': [25, 50, 100, 200, 400],
+    'max_depth': [None, 8, 12, 16, 24],
+    'min_samples_leaf': [1, 2, 4, 8],
+    'max_features': [1.0, 0.5, 0.33, 'sqrt'],
+}
+
+_FOLDS = None
+
+def _load_folds(path):
+    global _FOLDS
+    _FOLDS = joblib.load(path, mmap_mode='r')
+
+def sample_configs(n, space=SEARCH_SPACE, seed=42):
+    rng = np.random.default_rng(seed)
+    seen, configs = set(), []
+    total = math.prod(len(v) for v in space.values())
+    while len(configs) < min(n, total):
+        config = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        key = tuple(config.items())
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def single_row_latency(model, X, repeats=20):
+    # Best of `repeats` one-row predictions, in milliseconds
+    row = np.asarray(X[:1])
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+def evaluate(config_id, params, fold, n_rows, measure):
+    X_train, y_train, X_test, y_test = _FOLDS[fold]
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(X_train[:n_rows], y_train[:n_rows])
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    result = {'config': config_id, 'fold': fold, 'MAE': mean_absolute_error(y_test, y_pred),
+              'R2': r2_score(y_test, y_pred), 'Fit s': fit_s, 'Predict us/row': predict_s / len(y_test) * 1e6}
+    if measure:
+        result['1-row ms'] = single_row_latency(model, X_test)
+        result['Size MB'] = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6
+    return result
+
+def pareto(board, columns=('MAE', '1-row ms', 'Size MB')):
+    # True where no other row is at least as good on every column and better on one
+    values = board[list(columns)].to_numpy()
+    better_eq = (values[:, None, :] >= values[None, :, :]).all(axis=2)
+    strictly = (values[:, None, :] > values[None, :, :]).any(axis=2)
+    return ~(better_eq & strictly).any(axis=1)
+
+
+def successive_halving(X, y, n_candidates=27, factor=3, folds=3, budget_s=300, workers=None, min_rows=500, seed=42):
+    deadline = time.perf_counter() + budget_s
+    workers = workers or os.cpu_count() or 1
+    y = np.asarray(y, dtype=float)
+    configs = sample_configs(n_candidates, seed=seed)
+    # Halve until about `factor` finalists remain, so the last rung still offers
+    # a latency/accuracy choice
+    n_rungs = max(1, math.ceil(math.log(len(configs), factor)))
+
+    # Training rows are shuffled once per fold, so every slice is a random subset
+    rng = np.random.default_rng(seed)
+    shared = []
+    for X_train, y_train, X_test, y_test in make_folds(X, y, folds, seed):
+        order = rng.permutation(len(y_train))
+        shared.append((X_train[order].astype(np.float32), y_train[order], X_test.astype(np.float32), y_test))
+    full_rows = min(len(f[1]) for f in shared)
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'folds.joblib')
+    joblib.dump(shared, path)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_load_folds, initargs=(path,))
+
+    results, alive = [], list(range(len(configs)))
+    try:
+        for rung in range(n_rungs):
+            n_rows = full_rows if rung == n_rungs - 1 else max(min_rows, full_rows // factor ** (n_rungs - 1 - rung))
+            n_rows = min(n_rows, full_rows)
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                print(f"Budget spent before rung {rung}")
+                break
+            start = time.perf_counter()
+            futures = [pool.submit(evaluate, c, configs[c], f, n_rows, f == 0)
+                       for c in alive for f in range(folds)]
+            rung_results = []
+            try:
+                for future in as_completed(futures, timeout=remaining):
+                    rung_results.append(dict(future.result(), rung=rung, rows=n_rows))
+            except FuturesTimeout:
+                for future in futures:
+                    future.cancel()
+                # Keep the configurations that finished every fold of this rung
+                done = pd.Series([r['config'] for r in rung_results], dtype=int).value_counts()
+                complete = set(done[done == folds].index)
+                results.extend(r for r in rung_results if r['config'] in complete)
+                print(f"Budget spent during rung {rung} ({len(complete)} of {len(alive)} configs finished)")
+                break
+            results.extend(rung_results)
+            scores = pd.DataFrame(rung_results).groupby('config')['MAE'].mean().sort_values()
+            print(f"Rung {rung}: {len(alive)} configs x {folds} folds on {n_rows:,} rows "
+                  f"in {time.perf_counter() - start:.1f}s (best MAE ₹{scores.iloc[0]:,.0f})")
+            if rung < n_rungs - 1:
+                alive = scores.index[:max(1, len(alive) // factor)].tolist()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            os.remove(path)
+            os.rmdir(tmp)
+        except OSError:
+            pass
+
+    if not results:
+        return pd.DataFrame()
+    runs = pd.DataFrame(results)
+    board = runs.groupby(['config', 'rung']).agg(
+        rows=('rows', 'first'), MAE=('MAE', 'mean'), R2=('R2', 'mean'), fit_s=('Fit s', 'mean'),
+        predict=('Predict us/row', 'mean'), latency=('1-row ms', 'mean'), size=('Size MB', 'mean')).reset_index()
+    board = board.rename(columns={'fit_s': 'Fit s', 'predict': 'Predict us/row', 'latency': '1-row ms',
+                                  'size': 'Size MB'})
+    # Each configuration's furthest rung, most-trained first
+    board = board.sort_values('rung').groupby('config').tail(1)
+    board = board.sort_values(['rung', 'MAE'], ascending=[False, True]).reset_index(drop=True)
+    board['params'] = [configs[c] for c in board['config']]
+    top = board['rung'] == board['rung'].max()
+    board['pareto'] = False
+    board.loc[top, 'pareto'] = pareto(board[top])
+    return board
+
+def choose(board, mae_budget=None, tolerance=0.05):
+    # Among the most-trained configurations: lowest single-row latency (then
+    # size) with MAE within budget, or within `tolerance` of the best MAE
+    top = board[board['rung'] == board['rung'].max()]
+    budget = mae_budget if mae_budget is not None else top['MAE'].min() * (1 + tolerance)
+    eligible = top[top['MAE'] <= budget]
+    if eligible.empty:
+        eligible = top.nsmallest(1, 'MAE')
+    return eligible.sort_values(['1-row ms', 'Size MB']).iloc[0]['params']
+
+def print_board(board, limit=15, rank_by='MAE'):
+    shown = board[board['rung'] == board['rung'].max()].sort_values(rank_by).head(limit)
+    shown = pd.concat([shown, board[board['rung'] < board['rung'].max()].head(max(0, limit - len(shown)))])
+    params = pd.DataFrame(list(shown['params']), index=shown.index, dtype=object)
+    table = pd.concat([params, shown[['rung', 'rows', 'MAE', 'R2', 'Fit s', 'Predict us/row', '1-row ms',
+                                      'Size MB', 'pareto']]], axis=1)
+    print(table.to_string(index=False, formatters={
+        'MAE': '₹{:,.0f}'.format, 'R2': '{:.4f}'.format, 'Fit s': '{:.2f}'.format,
+        'Predict us/row': '{:.2f}'.format, '1-row ms': '{:.2f}'.format, 'Size MB': '{:.2f}'.format}))
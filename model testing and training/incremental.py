@@ -0,0 +1,146 @@
+import datetime
+import glob
+import os
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.tree._tree import Tree
+
+# Warm-start updates of the saved Random Forest pipeline from newly scraped
+# listings, without refitting what is already there:
+#   1. Categories never seen before (a new brand or GPU) are added to the
+#      fitted OneHotEncoder. Every existing tree's split features are renumbered
+#      into the wider layout; old trees never split on the new columns, so they
+#      treat a new category exactly as before (as unknown).
+#   2. New trees are grown on the new rows only (warm_start), through the
+#      fitted imputers and encoders.
+#   3. Trees whose data is older than max_age_days are dropped, then the oldest
+#      beyond max_trees, so stale scrapes age out of the average.
+# The result is still a plain sklearn Pipeline (and exports to the compact
+# format as before). Every tree remembers the newest scrape date it was fitted
+# on (forest.tree_dates_); forest.trained_through_ is the newest overall and
+# marks where the next update's rows start.
+#
+# Renumbering rebuilds trees through sklearn's private Tree state, whose
+# layout changes between releases, so updates run only on the scikit-learn
+# series pinned in requirements.txt.
+
+SKLEARN_SERIES = '1.6'
+
+def encoder_layout(preprocessor):
+    # (categorical column names, their onehot encoder, number of numeric columns)
+    pipeline = preprocessor.named_transformers_['cat']
+    columns = [c for name, _, c in preprocessor.transformers_ if name == 'cat'][0]
+    n_numeric = preprocessor.output_indices_['cat'].start
+    return list(columns), pipeline.named_steps['onehot'], n_numeric
+
+def extend_categories(preprocessor, X):
+    # Adds the categories of X the encoder does not know. Returns (old output
+    # column -> new output column, {column: [added categories]}) or (None, {})
+    # when nothing is new.
+    columns, encoder, n_numeric = encoder_layout(preprocessor)
+    imputer = preprocessor.named_transformers_['cat'].named_steps['imputer']
+    values = imputer.transform(X[columns])
+    added, categories = {}, []
+    for i, (name, known) in enumerate(zip(columns, encoder.categories_)):
+        new = sorted(set(values[:, i]) - set(known))
+        if new:
+            added[name] = new
+        categories.append(np.array(sorted(set(known) | set(new)), dtype=object))
+    if not added:
+        return None, {}
+
+    # Old output index -> new one: numeric columns stay, each category keeps
+    # its name but moves to its sorted place in the wider block
+    remap = list(range(n_numeric))
+    offset = n_numeric
+    for known, wider in zip(encoder.categories_, categories):
+        position = {c: offset + j for j, c in enumerate(wider)}
+        remap += [position[c] for c in known]
+        offset += len(wider)
+
+    wider_encoder = OneHotEncoder(categories=categories, handle_unknown='ignore',
+                                  sparse_output=encoder.sparse_output, dtype=encoder.dtype)
+    wider_encoder.fit(np.array([[c[0] for c in categories]], dtype=object))
+    cat_pipeline = preprocessor.named_transformers_['cat']
+    cat_pipeline.steps[-1] = ('onehot', wider_encoder)
+    preprocessor.output_indices_['cat'] = slice(n_numeric, offset)
+    return np.array(remap), added
+
+def renumber_features(forest, remap, n_features):
+    # Rebuilds every tree over the wider input; leaves (feature -2) are kept
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = state['nodes'].copy()
+        split = nodes['feature'] >= 0
+        nodes['feature'][split] = remap[nodes['feature'][split]]
+        state['nodes'] = nodes
+        tree = Tree(n_features, np.array([1], dtype=np.intp), estimator.n_outputs_)
+        tree.__setstate__(state)
+        estimator.tree_ = tree
+        estimator.n_features_in_ = n_features
+    forest.n_features_in_ = n_features
+
+def drop_stale(forest, today, max_age_days=None, max_trees=None):
+    # Keeps trees fitted on data newer than max_age_days, then the newest
+    # max_trees of those; always keeps at least the newest tree. Returns the
+    # number dropped.
+    dates = [datetime.date.fromisoformat(d) for d in forest.tree_dates_]
+    order = sorted(range(len(dates)), key=lambda i: dates[i], reverse=True)
+    keep = [i for i in order if max_age_days is None or (today - dates[i]).days <= max_age_days] or order[:1]
+    if max_trees is not None:
+        keep = keep[:max_trees]
+    keep = sorted(keep)
+    dropped = len(dates) - len(keep)
+    if dropped:
+        forest.estimators_ = [forest.estimators_[i] for i in keep]
+        forest.tree_dates_ = [forest.tree_dates_[i] for i in keep]
+        forest.n_estimators = len(keep)
+    return dropped
+
+def stamp(pipeline, scrape_date):
+    # Marks every tree of a freshly fitted pipeline with the data's scrape date
+    forest = pipeline.named_steps['model']
+    if hasattr(forest, 'estimators_'):
+        forest.tree_dates_ = [scrape_date] * len(forest.estimators_)
+        forest.trained_through_ = scrape_date
+
+def update_pipeline(pipeline, X, y, scrape_date, new_trees=10, max_age_days=None, max_trees=None, today=None):
+    # Adds new_trees fitted on (X, y) to the pipeline's forest in place.
+    # Returns a summary of what changed.
+    if not sklearn.__version__.startswith(SKLEARN_SERIES + '.'):
+        raise RuntimeError(f"incremental updates need scikit-learn {SKLEARN_SERIES}.x (installed: "
+                           f"{sklearn.__version__}); run a full training instead")
+    preprocessor = pipeline.named_steps['preprocessor']
+    forest = pipeline.named_steps['model']
+    if not hasattr(forest, 'tree_dates_'):
+        raise ValueError("the forest has no tree dates; it was not saved by a stamped full training")
+    remap, added = extend_categories(preprocessor, X)
+    Xt = preprocessor.transform(X)
+    if remap is not None:
+        renumber_features(forest, remap, Xt.shape[1])
+
+    before = len(forest.estimators_)
+    forest.set_params(warm_start=True, n_estimators=before + new_trees)
+    forest.fit(Xt, np.asarray(y, dtype=float))
+    forest.set_params(warm_start=False)
+    forest.tree_dates_ = list(forest.tree_dates_) + [scrape_date] * (len(forest.estimators_) - before)
+    forest.trained_through_ = max(forest.trained_through_, scrape_date)
+
+    dropped = drop_stale(forest, today or datetime.date.today(), max_age_days, max_trees)
+    return {'rows': len(X), 'added_categories': added, 'trees_added': len(forest.estimators_) + dropped - before,
+            'trees_dropped': dropped, 'trees': len(forest.estimators_), 'trained_through': forest.trained_through_}
+
+def latest_scrape_date(dataset_path):
+    # Newest scrape_date partition of a dataset, from the directory names alone
+    dates = [os.path.basename(p).split('=', 1)[1] for p in glob.glob(os.path.join(dataset_path, '*', 'scrape_date=*'))]
+    return max(dates) if dates else datetime.date.today().isoformat()
+
+def new_rows(dataset_path, columns, after):
+    # Rows of the partitioned dataset scraped after the given date (partition
+    # pruning skips everything older)
+    filters = [('scrape_date', '>', after)] if after else None
+    df = pd.read_parquet(dataset_path, columns=columns + ['scrape_date'], filters=filters)
+    df['scrape_date'] = df['scrape_date'].astype(str)
+    return df
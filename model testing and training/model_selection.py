@@ -0,0 +1,111 @@
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.model_selection import KFold
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+
+# k-fold model selection for the price model. The preprocessing is fitted once
+# per fold and the transformed folds are shared by every candidate: joblib hands
+# the same arrays to all worker processes through memory maps. Every
+# (model, fold) fit is its own task, so a run keeps all cores busy.
+
+FEATURES = ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch']
+TARGET = 'Price'
+CAT_COLS = ['Brand', 'Processor', 'GPU']
+NUM_COLS = ['RAM', 'Storage_GB', 'Display_Inch']
+
+# Heaviest first, so the long fits start while the pool is empty
+CANDIDATES = {
+    "Random Forest": lambda: RandomForestRegressor(n_estimators=100, random_state=42),
+    "Extra Trees": lambda: ExtraTreesRegressor(n_estimators=100, random_state=42),
+    "Hist Gradient Boosting": lambda: HistGradientBoostingRegressor(random_state=42),
+    "Ridge": lambda: Ridge(alpha=1.0),
+    "Linear Regression": lambda: LinearRegression(),
+}
+
+def make_preprocessor():
+    numerical_transformer = SimpleImputer(strategy='mean')
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore'))
+    ])
+    return ColumnTransformer(
+        transformers=[
+            ('num', numerical_transformer, NUM_COLS),
+            ('cat', categorical_transformer, CAT_COLS)
+        ])
+
+def make_pipeline(name, n_jobs=None, **params):
+    model = CANDIDATES[name]().set_params(**params)
+    if n_jobs is not None and 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    return Pipeline(steps=[('preprocessor', make_preprocessor()), ('model', model)])
+
+def _dense(X):
+    # Every candidate accepts dense input (HistGradientBoosting only dense)
+    return X.toarray() if sparse.issparse(X) else np.asarray(X)
+
+def make_folds(X, y, k=5, seed=42):
+    folds = []
+    for train, test in KFold(n_splits=k, shuffle=True, random_state=seed).split(X):
+        preprocessor = make_preprocessor().fit(X.iloc[train])
+        folds.append((_dense(preprocessor.transform(X.iloc[train])), y[train],
+                      _dense(preprocessor.transform(X.iloc[test])), y[test]))
+    return folds
+
+def fit_fold(name, fold, X_train, y_train, X_test, y_test):
+    model = CANDIDATES[name]()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    return {'Model': name, 'Fold': fold, 'MAE': mean_absolute_error(y_test, y_pred), 'R2': r2_score(y_test, y_pred),
+            'Fit s': fit_s, 'Predict s': predict_s, 'Rows': len(y_test)}
+
+def cross_validate_models(X, y, models=None, k=5, workers=-1):
+    models = models or list(CANDIDATES)
+    y = np.asarray(y, dtype=float)
+    start = time.perf_counter()
+    folds = make_folds(X, y, k)
+    prep_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    runs = Parallel(n_jobs=workers)(
+        delayed(fit_fold)(name, i, *fold) for name in models for i, fold in enumerate(folds))
+    wall_s = time.perf_counter() - start
+    print(f"Preprocessed {k} folds once in {prep_s:.2f}s; {len(runs)} fits took {wall_s:.2f}s wall-clock")
+    return pd.DataFrame(runs)
+
+def summarize(runs):
+    # One row per model: mean CV accuracy and per-fold cost, best MAE first
+    table = runs.groupby('Model').agg(
+        MAE=('MAE', 'mean'), MAE_std=('MAE', 'std'), R2=('R2', 'mean'),
+        fit_s=('Fit s', 'mean'), predict_s=('Predict s', 'sum'), rows=('Rows', 'sum'))
+    table['Predict us/row'] = table.pop('predict_s') / table.pop('rows') * 1e6
+    table = table.rename(columns={'MAE_std': 'MAE std', 'fit_s': 'Fit s/fold'})
+    return table.sort_values('MAE')
+
+def pick_model(table, mae_budget=None, tolerance=0.05):
+    # Fastest model (fit plus prediction time) whose CV MAE is within budget;
+    # without a budget, within `tolerance` of the best MAE
+    budget = mae_budget if mae_budget is not None else table['MAE'].min() * (1 + tolerance)
+    eligible = table[table['MAE'] <= budget]
+    if eligible.empty:
+        return table.index[0]
+    cost = eligible['Fit s/fold'] + eligible['Predict us/row'] * 1e-6
+    return cost.idxmin()
+
+def print_table(table):
+    print(table.to_string(formatters={
+        'MAE': '₹{:,.0f}'.format, 'MAE std': '₹{:,.0f}'.format, 'R2': '{:.4f}'.format,
+        'Fit s/fold': '{:.2f}'.format, 'Predict us/row': '{:.2f}'.format}))
@@ -0,0 +1,243 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from sklearn.pipeline import Pipeline
+from model_selection import CANDIDATES, FEATURES, TARGET, CAT_COLS, NUM_COLS, make_preprocessor
+
+# Random Forest training on scraped histories that do not fit in memory as a
+# DataFrame. Only the six inputs and Price are read, a chunk at a time, with
+# compact dtypes (categoricals stay dictionary-encoded, numbers are float32),
+# and every category is turned into a small integer code once, on the way in:
+#   1. scan()              one pass: row count, each categorical column's
+#                          vocabulary and counts, numeric means, stratum sizes
+#   2. fit_preprocessor()  the usual ColumnTransformer, fitted from the scan
+#                          (the categories and modes of fitting on every row,
+#                          the means to float32 precision), so the saved model
+#                          is the usual Pipeline
+#   3. dense_block()       the preprocessor's output for a block of coded rows,
+#                          built straight from the codes as float32
+# The forest is then fitted either on a stratified reservoir sample (every
+# stratum keeps its share of sample_rows, and at least min_per_stratum rows)
+# or out of core: the data is streamed in chunk_rows blocks and each block
+# grows its share of the trees (warm_start), so only one block is ever
+# expanded. Trees are fitted on dense float32 blocks: sklearn's trees are an
+# order of magnitude slower on the sparse one-hot matrix the pipeline produces.
+
+CHUNK_ROWS = 1_000_000
+MIN_PER_STRATUM = 20
+STRATA = CAT_COLS
+MISSING = -1
+
+def iter_frames(path, chunk_rows=CHUNK_ROWS):
+    # DataFrames of the inputs and Price, from the Parquet dataset or a CSV
+    columns = FEATURES + [TARGET]
+    if os.path.isdir(path):
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    else:
+        dtypes = {**{c: 'category' for c in CAT_COLS}, **{c: 'float32' for c in NUM_COLS}, TARGET: 'float64'}
+        yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+
+
+class Vocabulary:
+    # Category -> int16 code per categorical column, numbered in order of first
+    # sight; MISSING for missing values
+    def __init__(self):
+        self.codes = {c: {} for c in CAT_COLS}
+
+    def encode(self, df):
+        out = np.empty((len(df), len(CAT_COLS)), dtype=np.int16)
+        for j, name in enumerate(CAT_COLS):
+            column = df[name]
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype('category')
+            known = self.codes[name]
+            # The chunk's own codes, looked up in the running vocabulary; the
+            # appended MISSING is where pandas' -1 lands
+            lookup = np.array([known.setdefault(v, len(known)) for v in column.cat.categories] + [MISSING],
+                              dtype=np.int16)
+            out[:, j] = lookup[column.cat.codes.to_numpy()]
+        return out
+
+def encode_frame(df, vocabulary):
+    # (codes, numeric, price) of the rows that have a price
+    df = df[df[TARGET].notna()]
+    numeric = np.column_stack([df[c].to_numpy(dtype=np.float32, na_value=np.nan) for c in NUM_COLS])
+    return vocabulary.encode(df), numeric, df[TARGET].to_numpy(dtype=np.float64)
+
+def iter_blocks(path, vocabulary, chunk_rows=CHUNK_ROWS):
+    # Coded rows regrouped into blocks of chunk_rows (the last may be shorter);
+    # dataset batches stop at file boundaries and are often smaller
+    pending, size = [], 0
+    for frame in iter_frames(path, chunk_rows):
+        block = encode_frame(frame, vocabulary)
+        pending.append(block)
+        size += len(block[2])
+        while size >= chunk_rows:
+            merged = [np.concatenate(parts) for parts in zip(*pending)]
+            yield [part[:chunk_rows] for part in merged]
+            pending = [[part[chunk_rows:] for part in merged]]
+            size -= chunk_rows
+    if size:
+        yield [np.concatenate(parts) for parts in zip(*pending)]
+
+def stratum_keys(codes, columns=STRATA):
+    # One int64 per row for its combination of the strata columns' codes
+    keys = np.zeros(len(codes), dtype=np.int64)
+    for name in columns:
+        keys = (keys << 16) | (codes[:, CAT_COLS.index(name)].astype(np.int64) - MISSING)
+    return keys
+
+def _add_counts(total, codes):
+    found = np.bincount(codes[codes != MISSING], minlength=len(total))
+    found[:len(total)] += total
+    return found
+
+def scan(path, strata=STRATA, chunk_rows=CHUNK_ROWS):
+    # The first pass. Returns the vocabulary and a summary of the data.
+    vocabulary = Vocabulary()
+    counts = [np.zeros(0, dtype=np.int64) for _ in CAT_COLS]
+    sums = np.zeros(len(NUM_COLS))
+    present = np.zeros(len(NUM_COLS), dtype=np.int64)
+    strata_counts = pd.Series(dtype=np.int64)
+    rows = 0
+    for frame in iter_frames(path, chunk_rows):
+        codes, numeric, price = encode_frame(frame, vocabulary)
+        rows += len(price)
+        counts = [_add_counts(total, codes[:, j]) for j, total in enumerate(counts)]
+        sums += np.nansum(numeric, axis=0, dtype=np.float64)
+        present += (~np.isnan(numeric)).sum(axis=0)
+        found = pd.Series(stratum_keys(codes, strata)).value_counts()
+        strata_counts = strata_counts.add(found, fill_value=0).astype(np.int64)
+    return vocabulary, {'rows': rows, 'counts': counts, 'means': sums / np.maximum(present, 1),
+                        'strata': strata, 'strata_counts': strata_counts.sort_index()}
+
+def fit_preprocessor(vocabulary, summary):
+    # make_preprocessor() fitted on a synopsis of the data: every category seen
+    # once, padded with its column's mode (so the mode is the most frequent),
+    # and every numeric column at its mean
+    columns = {}
+    for name, counts in zip(CAT_COLS, summary['counts']):
+        values = np.array(list(vocabulary.codes[name]), dtype=object)[:len(counts)]
+        seen = sorted(values[counts > 0])
+        # The imputer breaks ties towards the smallest value
+        top = counts.max()
+        columns[name] = seen, min(values[counts == top])
+    n = max(len(seen) for seen, _ in columns.values()) + 1
+    synopsis = pd.DataFrame({name: seen + [mode] * (n - len(seen)) for name, (seen, mode) in columns.items()})
+    for name, mean in zip(NUM_COLS, summary['means']):
+        synopsis[name] = mean
+    return make_preprocessor().fit(synopsis[FEATURES])
+
+def output_layout(preprocessor, vocabulary):
+    # Per categorical column, code -> output column (-1 for a category the
+    # encoder ignores); index MISSING (the last entry) is where the imputer's
+    # value goes. Plus the numeric fill values and the output width.
+    cat_pipeline = preprocessor.named_transformers_['cat']
+    fill = cat_pipeline.named_steps['imputer'].statistics_
+    encoder = cat_pipeline.named_steps['onehot']
+    offset = preprocessor.output_indices_['cat'].start
+    lookups = []
+    for name, categories, mode in zip(CAT_COLS, encoder.categories_, fill):
+        position = {c: offset + i for i, c in enumerate(categories)}
+        known = list(vocabulary.codes[name])
+        lookups.append(np.array([position.get(c, -1) for c in known] + [position.get(mode, -1)], dtype=np.int32))
+        offset += len(categories)
+    means = preprocessor.named_transformers_['num'].statistics_.astype(np.float32)
+    return lookups, means, offset
+
+def dense_block(layout, codes, numeric, out=None):
+    # Equal to preprocessor.transform(rows).toarray() in float32, the dtype
+    # the trees split on (tests/test_out_of_core.py); written into out (rows
+    # of a larger matrix) if given
+    lookups, means, width = layout
+    X = np.zeros((len(codes), width), dtype=np.float32) if out is None else out
+    X[:, :len(NUM_COLS)] = np.where(np.isnan(numeric), means, numeric)
+    rows = np.arange(len(codes))
+    for j, lookup in enumerate(lookups):
+        # MISSING (-1) indexes the lookup's last entry, the imputed value
+        column = lookup[codes[:, j]]
+        hit = column >= 0
+        X[rows[hit], column[hit]] = 1
+    return X
+
+def allocate(strata_counts, n, min_per_stratum=MIN_PER_STRATUM):
+    # Proportional share of n per stratum, at least min_per_stratum (or the
+    # whole stratum when it is smaller); the floor shrinks when there are so
+    # many strata that it alone would exceed n
+    counts = strata_counts.to_numpy()
+    share = np.round(n * counts / counts.sum()).astype(np.int64)
+    floor = min(min_per_stratum, n // len(counts))
+    return np.minimum(np.maximum(share, floor), counts)
+
+def stratified_sample(path, vocabulary, summary, n, min_per_stratum=MIN_PER_STRATUM, seed=42,
+                      chunk_rows=CHUNK_ROWS):
+    # Second pass: a reservoir per stratum. Every row draws a random priority
+    # and each stratum keeps its quota of lowest priorities, which is a uniform
+    # sample without replacement; memory is the sample plus one block.
+    keys = summary['strata_counts'].index.to_numpy()
+    quotas = allocate(summary['strata_counts'], n, min_per_stratum)
+    rng = np.random.default_rng(seed)
+    kept = None
+    for codes, numeric, price in iter_blocks(path, vocabulary, chunk_rows):
+        stratum = np.searchsorted(keys, stratum_keys(codes, summary['strata']))
+        block = (stratum, rng.random(len(price)), codes, numeric, price)
+        if kept is not None:
+            block = tuple(np.concatenate(parts) for parts in zip(kept, block))
+        stratum, priority = block[0], block[1]
+        order = np.lexsort((priority, stratum))
+        ordered = stratum[order]
+        starts = np.r_[0, np.flatnonzero(ordered[1:] != ordered[:-1]) + 1]
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep = np.sort(order[rank < quotas[ordered]])
+        kept = tuple(part[keep] for part in block)
+    if kept is None:
+        return np.empty((0, len(CAT_COLS)), np.int16), np.empty((0, len(NUM_COLS)), np.float32), np.empty(0)
+    return kept[2], kept[3], kept[4]
+
+def fit_forest(path, sample_rows=None, chunk_rows=None, strata=STRATA, min_per_stratum=MIN_PER_STRATUM,
+               n_jobs=-1, seed=42, **params):
+    # A fitted Pipeline(preprocessor, Random Forest) and a summary of the fit.
+    # With neither sample_rows nor chunk_rows every row is fitted in one block.
+    vocabulary, summary = scan(path, strata, chunk_rows or CHUNK_ROWS)
+    if not summary['rows']:
+        raise ValueError(f"no priced rows in {path}")
+    preprocessor = fit_preprocessor(vocabulary, summary)
+    layout = output_layout(preprocessor, vocabulary)
+    forest = CANDIDATES["Random Forest"]().set_params(n_jobs=n_jobs, **params)
+    info = {'rows': summary['rows'], 'strata': len(summary['strata_counts']), 'features': layout[2]}
+
+    if chunk_rows:
+        # Spread the trees over the blocks; blocks are made large enough that
+        # each one grows at least one tree
+        n_trees = forest.n_estimators
+        chunk_rows = max(chunk_rows, -(-summary['rows'] // n_trees))
+        n_chunks = -(-summary['rows'] // chunk_rows)
+        shares = [len(part) for part in np.array_split(np.arange(n_trees), n_chunks)]
+        forest.set_params(warm_start=True)
+        for share, (codes, numeric, price) in zip(shares, iter_blocks(path, vocabulary, chunk_rows)):
+            forest.set_params(n_estimators=len(getattr(forest, 'estimators_', [])) + share)
+            forest.fit(dense_block(layout, codes, numeric), price)
+        forest.set_params(warm_start=False)
+        info.update(fitted_rows=summary['rows'], chunks=n_chunks, chunk_rows=chunk_rows)
+    else:
+        if sample_rows and sample_rows < summary['rows']:
+            codes, numeric, price = stratified_sample(path, vocabulary, summary, sample_rows, min_per_stratum, seed,
+                                                      CHUNK_ROWS)
+            X = dense_block(layout, codes, numeric)
+        else:
+            # Every row: each block is expanded into its slice of one matrix
+            X = np.zeros((summary['rows'], layout[2]), dtype=np.float32)
+            price = np.empty(summary['rows'])
+            start = 0
+            for codes, numeric, block_price in iter_blocks(path, vocabulary, CHUNK_ROWS):
+                end = start + len(block_price)
+                dense_block(layout, codes, numeric, out=X[start:end])
+                price[start:end] = block_price
+                start = end
+        forest.fit(X, price)
+        info.update(fitted_rows=len(price), chunks=1, chunk_rows=len(price))
+    return Pipeline(steps=[('preprocessor', preprocessor), ('model', forest)]), info
@@ -1,6 +1,12 @@
 import joblib
 import pandas as pd
+import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from compact_model import load_compact
 
 def test_model():
     model_path = os.path.join(os.path.dirname(__file__), 'models', 'laptop_price_model.joblib')
@@ -24,5 +30,14 @@ def test_model():
     pred = model.predict(sample_data)
     print(f"Prediction: {pred[0]}")
 
+    # The compact export must price it the same way
+    compact_path = os.path.join(os.path.dirname(__file__), 'models', 'laptop_price_model.forest')
+    if os.path.exists(compact_path):
+        compact = load_compact(compact_path)
+        compact_pred = compact.predict(sample_data)
+        print(f"Compact model prediction: {compact_pred[0]} ({compact.header['leaves']} leaves)")
+        if compact.header['leaves'] == 'float64':
+            assert np.allclose(compact_pred, pred), "Compact model disagrees with the joblib pipeline"
+
 if __name__ == "__main__":
     test_model()
@@ -1,94 +1,208 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import sys
 import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
+from model_selection import (CANDIDATES, FEATURES, TARGET, CAT_COLS, cross_validate_models, summarize, pick_model,
+                             print_table, make_pipeline)
+from hyperparameter_search import successive_halving, print_board, choose
+from incremental import latest_scrape_date, new_rows, stamp, update_pipeline
+from out_of_core import fit_forest
+from sklearn.metrics import mean_absolute_error
 
-def train_eval():
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from compact_model import LEAF_ENCODINGS, export_compact
+from instrumentation import span, path_size
+
+def train_eval(folds=5, workers=-1, models=None, model_name="Random Forest", mae_budget=None,
+               search=False, budget_s=300, candidates=27, rank_by='MAE', export=True, thresholds='float32',
+               leaves='float64'):
     base_dir = os.path.dirname(os.path.abspath(__file__))
+    dataset_path = os.path.join(base_dir, 'data', 'laptops_v2_ready')
     data_path = os.path.join(base_dir, 'data', 'laptops_v2_ready.csv')
     
-    if not os.path.exists(data_path):
-        print("Data file not found!")
-        return
-        
-    df = pd.read_csv(data_path)
-    
     # Selected Features
-    features = ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch']
-    target = 'Price'
+    features = FEATURES
+    target = TARGET
+    
+    # Only the feature columns and the target are read: from the partitioned
+    # Parquet dataset when there is one (typed, categorical), else the CSV
+    with span('train.load') as stage:
+        if os.path.isdir(dataset_path):
+            df = pd.read_parquet(dataset_path, columns=features + [target])
+            stage.add(bytes_read=path_size(dataset_path))
+        elif os.path.exists(data_path):
+            df = pd.read_csv(data_path, usecols=features + [target], dtype={c: 'category' for c in CAT_COLS})
+            stage.add(bytes_read=path_size(data_path))
+        else:
+            print("Data file not found!")
+            return
+        stage.add(rows=len(df))
+    print(f"Loaded {len(df)} rows ({df.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
     
     X = df[features]
     y = df[target]
     
-    # Handle missing values in X if any are left (though we filled them in cleaning)
-    # Categorical columns
-    cat_cols = ['Brand', 'Processor', 'GPU']
-    num_cols = ['RAM', 'Storage_GB', 'Display_Inch']
-    
-    # Preprocessing
-    numerical_transformer = SimpleImputer(strategy='mean')
-    categorical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='most_frequent')),
-        ('onehot', OneHotEncoder(handle_unknown='ignore'))
-    ])
-    
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numerical_transformer, num_cols),
-            ('cat', categorical_transformer, cat_cols)
-        ])
-    
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Models
-    models = {
-        "Linear Regression": LinearRegression(),
-        "Random Forest": RandomForestRegressor(n_estimators=100, random_state=42)
-    }
-    
-    results = {}
-    
-    print("Training Models...\n")
-    
-    for name, model in models.items():
-        # Create pipeline
-        clf = Pipeline(steps=[('preprocessor', preprocessor),
-                              ('model', model)])
-        
-        clf.fit(X_train, y_train)
-        y_pred = clf.predict(X_test)
-        
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-        
-        results[name] = {"MAE": mae, "R2": r2}
-        
-        print(f"--- {name} ---")
-        print(f"MAE: ₹{mae:,.2f}")
-        print(f"R2 Score: {r2:.4f}")
-        print("-" * 20)
-        
-    print("\nSummary:")
-    print(results)
+    params = {}
+    if search:
+        # Tune the Random Forest with successive halving inside the time budget
+        print(f"Searching Random Forest hyperparameters ({budget_s:.0f}s budget)...\n")
+        with span('train.search', candidates=candidates, budget_s=budget_s) as stage:
+            board = successive_halving(X, y, n_candidates=candidates, folds=min(folds, 3), budget_s=budget_s,
+                                       workers=None if workers == -1 else workers)
+            stage.add(rows=len(X))
+        if board.empty:
+            print("No configuration finished within the budget; keeping the defaults")
+        else:
+            print_board(board, rank_by=rank_by)
+            params = choose(board, mae_budget)
+            print(f"\nLowest-latency configuration within the MAE budget: {params}")
+        model_name = "Random Forest"
+    else:
+        # Cross-validate every candidate in parallel on shared, preprocessed folds
+        print("Cross-validating models...\n")
+        with span('train.cv', folds=folds) as stage:
+            runs = cross_validate_models(X, y, models=models, k=folds, workers=workers)
+            stage.add(rows=len(X))
+        table = summarize(runs)
+        print_table(table)
+
+        if model_name is None:
+            model_name = pick_model(table, mae_budget)
+            print(f"\nFastest model within the MAE budget: {model_name}")
     
-    # Feature Importance for Random Forest
-    rf_pipeline = Pipeline(steps=[('preprocessor', preprocessor),
-                                  ('model', models['Random Forest'])])
-    rf_pipeline.fit(X, y) # Retrain on full data for final model
+    # Retrain on full data for final model, on every core
+    final_pipeline = make_pipeline(model_name, n_jobs=-1, **params)
+    with span('train.fit', model=model_name) as stage:
+        final_pipeline.fit(X, y)
+        stage.add(rows=len(X))
+    if 'n_jobs' in final_pipeline.named_steps['model'].get_params():
+        # Single-row predictions in the app are faster without a thread pool
+        final_pipeline.set_params(model__n_jobs=None)
     
-    # Save Model
+    if os.path.isdir(dataset_path):
+        # Trees remember the newest scrape they saw, for incremental updates
+        stamp(final_pipeline, latest_scrape_date(dataset_path))
+    save_model(final_pipeline, model_name, base_dir, export, thresholds, leaves)
+
+def save_model(pipeline, model_name, base_dir, export=True, thresholds='float32', leaves='float64'):
     model_path = os.path.join(base_dir, 'models', 'laptop_price_model.joblib')
-    joblib.dump(rf_pipeline, model_path)
-    print(f"\nModel saved to {model_path}")
-    
+    with span('train.save') as stage:
+        joblib.dump(pipeline, model_path)
+        stage.add(bytes_written=path_size(model_path))
+    print(f"\nModel ({model_name}) saved to {model_path}")
+
+    # Flat, memory-mappable copy for serving (forests only)
+    compact_path = os.path.join(base_dir, 'models', 'laptop_price_model.forest')
+    if export and hasattr(pipeline.named_steps['model'], 'estimators_'):
+        with span('train.export', thresholds=thresholds, leaves=leaves) as stage:
+            size = export_compact(pipeline, compact_path, thresholds, leaves)
+            stage.add(bytes_written=size)
+        print(f"Compact model ({thresholds} thresholds, {leaves} leaves, {size / 1e6:.2f} MB) saved to {compact_path}")
+    elif os.path.exists(compact_path):
+        # A stale export would shadow the new model in the app
+        os.remove(compact_path)
+
+def train_large(sample_rows=None, chunk_rows=None, workers=-1, export=True, thresholds='float32', leaves='float64'):
+    # Random Forest on data too large for train_eval: read in chunks with
+    # compact dtypes, fitted on a stratified sample or chunk by chunk (no
+    # cross-validation)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    dataset_path = os.path.join(base_dir, 'data', 'laptops_v2_ready')
+    data_path = os.path.join(base_dir, 'data', 'laptops_v2_ready.csv')
+    path = dataset_path if os.path.isdir(dataset_path) else data_path
+    if not os.path.exists(path):
+        print("Data file not found!")
+        return
+
+    with span('train.fit', model="Random Forest", sample_rows=sample_rows, chunk_rows=chunk_rows) as stage:
+        pipeline, info = fit_forest(path, sample_rows=sample_rows, chunk_rows=chunk_rows, n_jobs=workers)
+        stage.add(rows=info['rows'], bytes_read=path_size(path))
+    print(f"Fitted {info['fitted_rows']:,} of {info['rows']:,} rows ({info['strata']:,} strata, "
+          f"{info['features']} features) in {info['chunks']} block(s) of up to {info['chunk_rows']:,}")
+    pipeline.set_params(model__n_jobs=None)
+    if path == dataset_path:
+        stamp(pipeline, latest_scrape_date(dataset_path))
+    save_model(pipeline, "Random Forest", base_dir, export, thresholds, leaves)
+
+def train_incremental(new_trees=10, max_age_days=None, max_trees=None, export=True, thresholds='float32',
+                      leaves='float64'):
+    # Nightly update: grow new_trees on the listings scraped since the saved
+    # forest was last trained, instead of refitting everything
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    dataset_path = os.path.join(base_dir, 'data', 'laptops_v2_ready')
+    model_path = os.path.join(base_dir, 'models', 'laptop_price_model.joblib')
+    if not os.path.isdir(dataset_path) or not os.path.exists(model_path):
+        print("Incremental training needs the laptops_v2_ready dataset and a saved model; run a full training first")
+        return
+    pipeline = joblib.load(model_path)
+    forest = pipeline.named_steps['model']
+    if not hasattr(forest, 'trained_through_'):
+        print("The saved model predates incremental training (no scrape dates on its trees); run a full training")
+        return
+
+    with span('train.load', incremental=True) as stage:
+        df = new_rows(dataset_path, FEATURES + [TARGET], forest.trained_through_)
+        df = df.dropna(subset=[TARGET])
+        stage.add(rows=len(df))
+    if df.empty:
+        print(f"No listings scraped after {forest.trained_through_}; model unchanged")
+        return
+    X, y = df[FEATURES], df[TARGET]
+    print(f"{len(df)} new rows scraped after {forest.trained_through_}")
+    # The saved model has not seen these rows: an honest check of how stale it is
+    print(f"MAE of the saved model on them: {mean_absolute_error(y, pipeline.predict(X)):,.0f}")
+
+    with span('train.update', new_trees=new_trees) as stage:
+        summary = update_pipeline(pipeline, X, y, df['scrape_date'].max(), new_trees=new_trees,
+                                  max_age_days=max_age_days, max_trees=max_trees)
+        stage.add(rows=len(df))
+    for name, categories in summary['added_categories'].items():
+        print(f"New {name} categories: {', '.join(categories)}")
+    print(f"Added {summary['trees_added']} trees, dropped {summary['trees_dropped']} stale ones; "
+          f"{summary['trees']} trees, trained through {summary['trained_through']}")
+    print(f"MAE of the updated model on them: {mean_absolute_error(y, pipeline.predict(X)):,.0f}")
+    save_model(pipeline, "Random Forest (incremental)", base_dir, export, thresholds, leaves)
+
 if __name__ == "__main__":
-    train_eval()
+    parser = argparse.ArgumentParser(description="Cross-validate candidate models and save the chosen one.")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=-1, help="Worker processes (default: all cores)")
+    parser.add_argument('--models', nargs='+', choices=list(CANDIDATES), help="Candidates to evaluate")
+    parser.add_argument('--model', choices=list(CANDIDATES), help="Model to save (default: Random Forest)")
+    parser.add_argument('--mae-budget', type=float, help="Save the fastest model with CV MAE at or under this")
+    parser.add_argument('--search', action='store_true', help="Tune the Random Forest by successive halving")
+    parser.add_argument('--budget', type=float, default=300, help="Search wall-clock budget in seconds")
+    parser.add_argument('--candidates', type=int, default=27, help="Configurations sampled for the first rung")
+    parser.add_argument('--rank-by', default='MAE', choices=['MAE', '1-row ms', 'Size MB'],
+                        help="Sort the search results by accuracy, latency or size")
+    parser.add_argument('--no-export', action='store_true',
+                        help="Skip the compact serving export (the app builds it after loading the model)")
+    parser.add_argument('--thresholds', default='float32', choices=['float32', 'float64'],
+                        help="Split threshold type in the compact export (float32 is exact)")
+    parser.add_argument('--leaves', default='float64', choices=LEAF_ENCODINGS,
+                        help="Leaf value encoding in the compact export (uint16 is quantized)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Add trees fitted on the listings scraped since the saved model, instead of retraining")
+    parser.add_argument('--new-trees', type=int, default=10, help="Trees added by an incremental update")
+    parser.add_argument('--max-age-days', type=int, help="Incremental: drop trees fitted on older scrapes")
+    parser.add_argument('--max-trees', type=int, help="Incremental: keep at most this many (newest) trees")
+    parser.add_argument('--sample-rows', type=int,
+                        help="Fit the Random Forest on a stratified sample of this many rows (no CV; large data)")
+    parser.add_argument('--chunk-rows', type=int,
+                        help="Fit the Random Forest out of core, in blocks of this many rows (no CV; large data)")
+    args = parser.parse_args()
+    if args.sample_rows or args.chunk_rows:
+        train_large(sample_rows=args.sample_rows, chunk_rows=args.chunk_rows, workers=args.workers,
+                    export=not args.no_export, thresholds=args.thresholds, leaves=args.leaves)
+        sys.exit()
+    if args.incremental:
+        train_incremental(new_trees=args.new_trees, max_age_days=args.max_age_days, max_trees=args.max_trees,
+                          export=not args.no_export, thresholds=args.thresholds, leaves=args.leaves)
+        sys.exit()
+    model_name = args.model or (None if args.mae_budget is not None else "Random Forest")
+    train_eval(folds=args.folds, workers=args.workers, models=args.models, model_name=model_name,
+               mae_budget=args.mae_budget, search=args.search, budget_s=args.budget, candidates=args.candidates,
+               rank_by=args.rank_by, export=not args.no_export, thresholds=args.thresholds, leaves=args.leaves)
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from serving import FEATURES, NUMERIC, load_model, model_path, predict_rows
+from instrumentation import histogram, render_prometheus
+
+# JSON prediction service for the pricing backend. The model is loaded once per
+# worker process from models/ (the compact export is memory-mapped, so workers
+# share one copy). Single-laptop requests that arrive within --window-ms of
+# each other are priced together in one vectorized predict call; bulk requests
+# go straight to the model. Workers are forked after the listening socket is
+# bound and the kernel spreads connections between them.
+#
+#   POST /predict        {"Brand": "HP", "RAM": 8, ...}     -> {"price": 42094.5}
+#   POST /predict/bulk   {"rows": [{...}, ...]}             -> {"prices": [...]}
+#   GET  /health, GET /stats
+#   GET  /metrics                                         -> Prometheus text format
+#
+# Plain HTTP/1.1 with keep-alive on asyncio streams, no framework needed.
+
+WINDOW_MS = 2.0
+MAX_BATCH = 256
+MAX_BODY = 16 << 20
+ROUTES = ('/predict', '/predict/bulk', '/health', '/stats', '/metrics')
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+def row_error(row):
+    # Why a row cannot be priced, or None
+    if not isinstance(row, dict):
+        return "each row must be a JSON object"
+    missing = [name for name in FEATURES if name not in row]
+    if missing:
+        return f"missing fields: {', '.join(missing)}"
+    for name in FEATURES:
+        value = row[name]
+        if value is None:
+            continue
+        if name in NUMERIC and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f"{name} must be a number or null"
+        if name not in NUMERIC and not isinstance(value, str):
+            return f"{name} must be a string or null"
+    return None
+
+
+class MicroBatcher:
+    # Collects single rows for up to window_ms after the first one arrives (or
+    # until max_batch), then prices them together on a worker thread so the
+    # event loop keeps accepting requests meanwhile
+    def __init__(self, model, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = self.rows = self.largest = 0
+        self.predict_seconds = histogram('price_predict_seconds', "Model predict latency per call", surface='service')
+
+    async def predict(self, row):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        return await future
+
+    def timed_predict(self, rows):
+        with self.predict_seconds.time():
+            return predict_rows(self.model, rows)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            rows = [row for row, _ in batch]
+            try:
+                prices = await loop.run_in_executor(self.executor, self.timed_predict, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), price in zip(batch, prices):
+                if not future.done():
+                    future.set_result(float(price))
+            self.batches += 1
+            self.rows += len(batch)
+            self.largest = max(self.largest, len(batch))
+
+
+class PredictService:
+    def __init__(self, model, model_name, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.model = model
+        self.model_name = model_name
+        self.batcher = MicroBatcher(model, window_ms, max_batch)
+        self.requests = 0
+        self.started = time.time()
+
+    async def route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'model': self.model_name, 'pid': os.getpid()}
+        if path == '/stats':
+            b = self.batcher
+            return 200, {'pid': os.getpid(), 'requests': self.requests, 'batches': b.batches, 'batched_rows': b.rows,
+                         'mean_batch': b.rows / b.batches if b.batches else 0.0, 'largest_batch': b.largest,
+                         'window_ms': b.window * 1000, 'uptime_s': round(time.time() - self.started, 1)}
+        if path == '/metrics':
+            return 200, render_prometheus()
+        if path not in ('/predict', '/predict/bulk'):
+            return 404, {'error': f"no route {path}"}
+        if method != 'POST':
+            return 405, {'error': "use POST"}
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': "body is not valid JSON"}
+        if path == '/predict':
+            error = row_error(payload)
+            if error:
+                return 400, {'error': error}
+            return 200, {'price': await self.batcher.predict(payload)}
+        rows = payload.get('rows') if isinstance(payload, dict) else None
+        if not isinstance(rows, list):
+            return 400, {'error': 'expected {"rows": [...]}'}
+        for i, row in enumerate(rows):
+            error = row_error(row)
+            if error:
+                return 400, {'error': f"row {i}: {error}"}
+        if not rows:
+            return 200, {'prices': []}
+        loop = asyncio.get_running_loop()
+        prices = await loop.run_in_executor(self.batcher.executor, self.batcher.timed_predict, rows)
+        return 200, {'prices': [float(p) for p in prices]}
+
+    async def handle(self, reader, writer):
+        # One keep-alive connection: request line, headers, Content-Length body
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {'error': f"body over {MAX_BODY} bytes"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    self.requests += 1
+                    path = target.split('?')[0]
+                    start = time.perf_counter()
+                    try:
+                        status, payload = await self.route(method, path, body)
+                    except Exception as e:
+                        status, payload = 500, {'error': str(e)}
+                    histogram('price_request_seconds', "Request latency by route",
+                              route=path if path in ROUTES else 'other').observe(time.perf_counter() - start)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode(), 'application/json'
+                head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                        f"Content-Length: {len(data)}\r\n")
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write((head + "\r\n").encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, sock):
+        runner = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, sock=sock)
+        async with server:
+            await server.serve_forever()
+        runner.cancel()
+
+
+def serve_worker(sock, model_dir, window_ms, max_batch):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    model = load_model(model_dir)
+    service = PredictService(model, os.path.basename(model_path(model_dir)), window_ms, max_batch)
+    asyncio.run(service.serve(sock))
+
+def bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Serve price predictions over HTTP with micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes sharing the port")
+    parser.add_argument('--window-ms', type=float, default=WINDOW_MS,
+                        help="How long a single request waits for others to batch with (0: no wait)")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--model-dir', default=os.path.join(base_dir, 'models'))
+    args = parser.parse_args()
+
+    if model_path(args.model_dir) is None:
+        raise SystemExit(f"No model in {args.model_dir}; run train_models.py first")
+    sock = bind(args.host, args.port)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=serve_worker, args=(sock, args.model_dir, args.window_ms, args.max_batch),
+                               daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    print(f"Serving {os.path.basename(model_path(args.model_dir))} on http://{args.host}:{args.port} "
+          f"({args.workers} workers, {args.window_ms:g} ms batching window)", flush=True)
+
+    def stop(*_):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
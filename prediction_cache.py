@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Bounded LRU cache of single-laptop predictions, with a time-to-live. The
+# app's inputs come from small fixed domains and users repeat configurations,
+# so most clicks are answered without touching the model. One instance is
+# shared by every session of a Streamlit process (sessions run in threads,
+# hence the lock). Entries belong to one model: when the served model file's
+# hash changes, the cache empties itself.
+
+MAXSIZE = 4096
+TTL_SECONDS = 6 * 3600
+RECENT = 1000
+
+def percentile(values, q):
+    # Nearest-rank percentile; the cache stays free of numpy
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else None
+
+def normalize(row):
+    # Canonical key for the six inputs: trimmed text, whole numbers as int and
+    # the display size at the widget's 0.1" step (15.600000000000001 -> 15.6)
+    def number(value):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    return (str(row['Brand']).strip(), number(row['RAM']), number(row['Storage_GB']),
+            str(row['Processor']).strip(), str(row['GPU']).strip(), round(float(row['Display_Inch']), 1))
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelFingerprint:
+    # sha256 of a file, recomputed only when its size or mtime changes
+    def __init__(self):
+        self.stat = None
+        self.value = None
+
+    def __call__(self, path):
+        if path is None or not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        if (path, stat.st_size, stat.st_mtime_ns) != self.stat:
+            self.value = file_hash(path)
+            self.stat = (path, stat.st_size, stat.st_mtime_ns)
+        return self.value
+
+
+class PredictionCache:
+    def __init__(self, maxsize=MAXSIZE, ttl=TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.model_hash = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.expired = self.invalidations = 0
+        self.hit_latency = deque(maxlen=RECENT)
+        self.miss_latency = deque(maxlen=RECENT)
+
+    def use_model(self, model_hash):
+        # Drop every entry computed with a different model
+        with self.lock:
+            if model_hash != self.model_hash:
+                if self.entries:
+                    self.invalidations += 1
+                self.entries.clear()
+                self.model_hash = model_hash
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get(self, key, compute):
+        # compute() runs outside the lock; concurrent misses on the same key
+        # may both compute, which is harmless
+        start = time.perf_counter()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    self.hit_latency.append(time.perf_counter() - start)
+                    return value
+                del self.entries[key]
+                self.expired += 1
+        value = compute()
+        with self.lock:
+            self.entries[key] = (value, now + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.misses += 1
+            self.miss_latency.append(time.perf_counter() - start)
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            hit_ms = [t * 1e3 for t in self.hit_latency]
+            miss_ms = [t * 1e3 for t in self.miss_latency]
+            return {
+                'entries': len(self.entries), 'maxsize': self.maxsize, 'ttl_s': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions, 'expired': self.expired, 'invalidations': self.invalidations,
+                'hit_ms_p50': percentile(hit_ms, 50),
+                'miss_ms_p50': percentile(miss_ms, 50),
+                'miss_ms_p99': percentile(miss_ms, 99),
+                'model_hash': self.model_hash,
+            }
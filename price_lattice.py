@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import json
+import os
+import time
+import numpy as np
+from compact_model import CompactForest
+from prediction_cache import file_hash
+from serving import (FEATURES, BRANDS, PROCESSORS, GPUS, RAM_RANGE, STORAGE_RANGE, DISPLAY_RANGE, INTERVAL, load_model,
+                     model_path, predict_interval)
+
+# Offline price lattice: the model evaluated ahead of time over every input
+# the app's widgets can produce, so the app answers with an array lookup and
+# can draw what-if curves without calling the model.
+#
+# The tensor has one axis per input (FEATURES order) plus a last axis holding
+# the price and, for a forest, its INTERVAL percentiles over the trees, so the
+# app's price range needs no model call either. It is saved as a memory-mapped
+# .npy next to the model, with a JSON sidecar holding the axis values, the
+# percentiles and the model hash it was built from. For a forest, grid values the
+# forest cannot tell apart (the same category code, or numbers between the same
+# two split points) share one slot: each axis maps grid index -> slot, which
+# keeps lookups O(1) and shrinks the 86M-cell widget grid to a few million.
+
+LATTICE_FILE = 'laptop_price_lattice.npy'
+LATTICE_VERSION = 2
+BLOCK_CELLS = 1 << 18
+
+def steps(low, high, step):
+    count = int(round((high - low) / step)) + 1
+    return [round(low + i * step, 1) if isinstance(step, float) else low + i * step for i in range(count)]
+
+def grid_axes():
+    return {
+        'Brand': BRANDS, 'RAM': steps(*RAM_RANGE), 'Storage_GB': steps(*STORAGE_RANGE),
+        'Processor': PROCESSORS, 'GPU': GPUS, 'Display_Inch': steps(*DISPLAY_RANGE),
+    }
+
+def forest_slots(model, name, values):
+    # Per grid value, what the forest sees: category column (-1 unknown) or
+    # the split-point interval of the number, as float32 like the trees
+    for cat, vocab in zip(model.categorical, model.vocab):
+        if cat['name'] == name:
+            return np.array([vocab.get(v, -1) for v in values])
+    if model.split_points is None:
+        model.split_points = model._split_points()
+    for num, points in zip(model.numeric, model.split_points):
+        if num['name'] == name:
+            return np.searchsorted(points, np.asarray(values, dtype=np.float32), side='left')
+    raise KeyError(name)
+
+def build_lattice(model, model_hash, path, full=False, progress=None):
+    import pandas as pd
+    axes = grid_axes()
+    index, slots = {}, {}
+    for name, values in axes.items():
+        if isinstance(model, CompactForest) and not full:
+            _, first, inverse = np.unique(forest_slots(model, name, values), return_index=True, return_inverse=True)
+            # Slots in grid order, each represented by its first grid value
+            order = np.argsort(first)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            index[name] = rank[inverse].tolist()
+            slots[name] = [values[i] for i in np.sort(first)]
+        else:
+            index[name] = list(range(len(values)))
+            slots[name] = list(values)
+    shape = tuple(len(slots[name]) for name in FEATURES)
+    cells = int(np.prod(shape))
+
+    start = time.perf_counter()
+    tmp = path + '.tmp.npy'
+    tensor = flat = percentiles = None
+    for begin in range(0, cells, BLOCK_CELLS):
+        coords = np.unravel_index(np.arange(begin, min(begin + BLOCK_CELLS, cells)), shape)
+        block = pd.DataFrame({name: np.asarray(slots[name], dtype=object if name in ('Brand', 'Processor', 'GPU')
+                                                else float)[coord] for name, coord in zip(FEATURES, coords)})
+        prices, bounds = predict_interval(model, block, INTERVAL)
+        if tensor is None:
+            # Bounds only for a forest; other models store the price alone
+            percentiles = list(INTERVAL) if bounds is not None else []
+            tensor = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32,
+                                               shape=shape + (1 + len(percentiles),))
+            flat = tensor.reshape(cells, -1)
+        flat[begin:begin + len(block), 0] = prices
+        if percentiles:
+            flat[begin:begin + len(block), 1:] = bounds
+        if progress:
+            progress(begin + len(block), cells, time.perf_counter() - start)
+    tensor.flush()
+    del tensor, flat
+    os.replace(tmp, path)
+
+    meta = {'version': LATTICE_VERSION, 'model_hash': model_hash, 'features': FEATURES, 'axes': axes, 'index': index,
+            'shape': list(shape), 'percentiles': percentiles, 'grid_cells': int(np.prod([len(v) for v in axes.values()])),
+            'built': datetime.datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(time.perf_counter() - start, 1)}
+    with open(path[:-len('.npy')] + '.json', 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+class PriceLattice:
+    def __init__(self, path):
+        with open(path[:-len('.npy')] + '.json') as f:
+            self.meta = json.load(f)
+        self.tensor = np.load(path, mmap_mode='r')
+        self.model_hash = self.meta['model_hash']
+        self.percentiles = self.meta.get('percentiles', [])
+        self.axes = self.meta['axes']
+        self.index = {name: np.asarray(self.meta['index'][name]) for name in FEATURES}
+        self.lookup_tables = {name: {v: i for i, v in enumerate(self.axes[name])}
+                              for name in ('Brand', 'Processor', 'GPU')}
+
+    def position(self, name, value):
+        # Grid index of a value, or None when the widgets could not produce it
+        if name in self.lookup_tables:
+            return self.lookup_tables[name].get(value)
+        low, step = self.axes[name][0], self.axes[name][1] - self.axes[name][0]
+        i = int(round((float(value) - low) / step))
+        if 0 <= i < len(self.axes[name]) and abs(self.axes[name][i] - float(value)) < 1e-6:
+            return i
+        return None
+
+    def slots(self, row):
+        positions = [self.position(name, row[name]) for name in FEATURES]
+        if any(p is None for p in positions):
+            return None
+        return [self.index[name][p] for name, p in zip(FEATURES, positions)]
+
+    def lookup(self, row):
+        slots = self.slots(row)
+        return None if slots is None else float(self.tensor[tuple(slots)][0])
+
+    def lookup_interval(self, row):
+        # (price, [low, high] or None) like predict_interval_one, or None off
+        # the grid
+        slots = self.slots(row)
+        if slots is None:
+            return None
+        cell = self.tensor[tuple(slots)].tolist()
+        return cell[0], cell[1:] if self.percentiles else None
+
+    def curve(self, row, name):
+        # Price along one axis with the other inputs fixed: (values, prices)
+        slots = self.slots(row)
+        if slots is None:
+            return None
+        axis = FEATURES.index(name)
+        slots[axis] = self.index[name]
+        return self.axes[name], np.asarray(self.tensor[tuple(slots) + (0,)], dtype=float)
+
+def load_lattice(model_dir, model_hash):
+    # None unless a lattice built from this exact model file, in the current
+    # format, exists
+    path = os.path.join(model_dir, LATTICE_FILE)
+    if not os.path.exists(path):
+        return None
+    lattice = PriceLattice(path)
+    if lattice.meta.get('version') != LATTICE_VERSION or lattice.model_hash != model_hash:
+        return None
+    return lattice
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Precompute the model's prices over the app's whole input grid.")
+    parser.add_argument('--model-dir', default=os.path.join(base_dir, 'models'))
+    parser.add_argument('--full', action='store_true',
+                        help="One slot per grid value (no merging of values the forest treats alike)")
+    args = parser.parse_args()
+
+    source = model_path(args.model_dir)
+    if source is None:
+        raise SystemExit(f"No model in {args.model_dir}; run train_models.py first")
+    model = load_model(args.model_dir)
+    path = os.path.join(args.model_dir, LATTICE_FILE)
+
+    def report(done, total, elapsed):
+        print(f"\r{done:,} / {total:,} cells ({done / elapsed:,.0f} cells/sec)", end='', flush=True)
+
+    meta = build_lattice(model, file_hash(source), path, args.full, progress=report)
+    print(f"\nLattice for {os.path.basename(source)}: {meta['grid_cells']:,} grid points in "
+          f"{int(np.prod(meta['shape'])):,} slots {tuple(meta['shape'])}, {os.path.getsize(path) / 1e6:.1f} MB, "
+          f"built in {meta['seconds']}s -> {path}")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+# The code lives in folders that are not packages ('Data Processing' has a
+# space in its name) and the modules import each other by name across them.
+# Importing this module puts the repo root and every source folder on
+# sys.path, once; it is the only place that knows the layout. A script run
+# from inside a folder reaches it with
+#     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+#     import project_paths
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FOLDERS = ['Data Processing', 'scrapers', 'model testing and training']
+
+for _path in [ROOT] + [os.path.join(ROOT, folder) for folder in FOLDERS]:
+    if _path not in sys.path:
+        # After the running script's own folder, ahead of site-packages
+        sys.path.insert(1, _path)
@@ -1,86 +1,52 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
 import os
+from fetch_engine import FetchEngine, DEFAULT_HEADERS, crawl_site
+from extractors import extract_page, field_names
+from record_sink import RecordSink
 
-def get_amazon_data():
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.3; Win 64 ; x64) Apple WeKit /537.36(KHTML , like Gecko) Chrome/80.0.3987.162 Safari/537.36'}
-    
-    # URLs to scrape (Amazon laptop search results)
-    base_url = "https://www.amazon.in/s?k=laptops&page={}"
-    
-    laptops = []
-    
-    for page in range(1, 41): # Scraping first 40 pages to aim for 500+ items
-        print(f"Scraping Amazon Page {page}...")
-        try:
-            url = base_url.format(page)
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                if page == 1:
-                    with open("debug_amazon.html", "w", encoding="utf-8") as f:
-                        f.write(response.text)
-                        
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                valid_items = soup.find_all("div", attrs={"data-component-type": "s-search-result"})
-                
-                for item in valid_items:
-                    data = {}
-                    
-                    # Title
-                    title_tag = item.find("h2")
-                    if title_tag:
-                        data['Title'] = title_tag.text.strip()
-                    else:
-                        # Fallback try finding span with text
-                        spans = item.find_all("span")
-                        for s in spans:
-                            if len(s.text) > 30:
-                                data['Title'] = s.text.strip()
-                                break
-                        if 'Title' not in data:
-                            continue
-                        
-                    # Price
-                    price_tag = item.find("span", class_="a-price")
-                    if price_tag:
-                        offscreen = price_tag.find("span", class_="a-offscreen")
-                        if offscreen:
-                            data['Price'] = offscreen.text.strip().replace('₹', '').replace(',', '')
-                        else:
-                            # Try to construct from whole + fraction if simple text fails
-                            whole = price_tag.find("span", class_="a-price-whole")
-                            if whole:
-                                data['Price'] = whole.text.strip().replace(',', '').replace('.', '')
-                            else:
-                                data['Price'] = price_tag.text.strip().replace('₹', '').replace(',', '')
-                    else:
-                        data['Price'] = None
-                    
-                    # Rating
-                    rating_tag = item.find("span", class_="a-icon-alt")
-                    if rating_tag:
-                        data['Rating'] = rating_tag.text.split(" ")[0]
-                    else:
-                        data['Rating'] = None
-                        
-                    laptops.append(data)
-                
-                print(f"Found {len(valid_items)} items on page {page}")
-            else:
-                print(f"Failed to retrieve Amazon page {page}. Status: {response.status_code}")
-                
-            time.sleep(2) # Respectful delay
-            
-        except Exception as e:
-            print(f"Error scraping Amazon page {page}: {e}")
-            
-    df = pd.DataFrame(laptops)
-    output_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'amazon_laptops.csv')
-    df.to_csv(output_path, index=False)
+# URLs to scrape (Amazon laptop search results)
+BASE_URL = "https://www.amazon.in/s?k=laptops&page={}"
+PAGES = range(1, 41) # Scraping first 40 pages to aim for 500+ items
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+def parse_amazon_page(content, backend=None):
+    # Field selectors and their fallbacks live in extractors.SITE_SELECTORS
+    return extract_page("amazon", content, backend)
+
+def handle_amazon_page(page, response):
+    if response.status_code != 200:
+        print(f"Failed to retrieve Amazon page {page}. Status: {response.status_code}")
+        return None
+
+    if page == 1 and not getattr(response, 'replayed', False):
+        with open("debug_amazon.html", "w", encoding="utf-8") as f:
+            f.write(response.text)
+
+    laptops, found = parse_amazon_page(response.content)
+    print(f"Found {found} items on page {page}")
+    return laptops
+
+def get_amazon_data(pages=PAGES, engine=None, base_url=BASE_URL):
+    own_engine = engine is None
+    if own_engine:
+        engine = FetchEngine(headers=DEFAULT_HEADERS)
+
+    # Records are flushed to data/amazon_laptops/ as pages complete; an interrupted
+    # crawl of the same URL resumes after the last saved page
+    sink = RecordSink(os.path.join(DATA_DIR, 'amazon_laptops'), field_names("amazon"), source=base_url)
+    try:
+        crawl_site(engine, "Amazon", base_url, sink.pending(pages), handle_amazon_page, sink=sink)
+    except BaseException:
+        sink.close(complete=False)
+        raise
+    finally:
+        if own_engine:
+            engine.close()
+            engine.stats.report()
+    sink.close()
+
+    output_path = os.path.join(DATA_DIR, 'amazon_laptops.csv')
+    sink.export_csv(output_path)
     print(f"Amazon data saved to {output_path}")
 
 if __name__ == "__main__":
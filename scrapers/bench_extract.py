@@ -0,0 +1,68 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+from extractors import extract_page, BACKENDS, lxml
+from page_cache import PageCache, DEFAULT_CACHE_DIR
+from mock_server import ROUTES, RENDERERS
+
+# Compares the extraction backends on cached pages: pages/sec, peak traced memory,
+# and whether every backend returns exactly the records of the bs4 reference path
+# (exits non-zero when one does not; tests/test_extractors.py checks the same).
+
+def cached_pages(cache_dir):
+    pages = []
+    cache = PageCache(cache_dir)
+    for path in glob.glob(os.path.join(cache_dir, 'index', '*.json')):
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        parts = urlsplit(entry['url'])
+        site = ROUTES.get(parts.path)
+        if site is None:
+            site = 'amazon' if 'amazon' in parts.netloc else 'flipkart'
+        pages.append((site, cache.read(entry)))
+    return pages
+
+def synthetic_pages(count):
+    return [(site, render(p).encode("utf-8")) for p in range(1, count + 1) for site, render in RENDERERS.items()]
+
+def run(backend, pages, repeat):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract_page(site, content, backend)[0] for site, content in pages]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, len(pages) * repeat / elapsed, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extraction backends.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--synthetic', type=int, default=40, help="Synthetic pages per site when the cache is empty")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = cached_pages(args.cache_dir) if os.path.isdir(args.cache_dir) else []
+    if not pages:
+        print("Page cache empty, using synthetic pages.")
+        pages = synthetic_pages(args.synthetic)
+    print(f"Benchmarking {len(pages)} pages x {args.repeat}")
+
+    backends = [name for name in BACKENDS if name != 'lxml' or lxml is not None]
+    reference = None
+    mismatched = []
+    for name in backends:
+        results, rate, peak = run(name, pages, args.repeat)
+        if reference is None:
+            reference = results
+        identical = results == reference
+        if not identical:
+            mismatched.append(name)
+        print(f"{name:>5}: {rate:8.1f} pages/sec, peak {peak / 1e6:7.2f} MB, identical to bs4: {identical}")
+    if mismatched:
+        sys.exit(f"Records differ from bs4 for: {', '.join(mismatched)}")
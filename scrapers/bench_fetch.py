@@ -0,0 +1,64 @@
+import argparse
+import threading
+import time
+from fetch_engine import FetchEngine, crawl_site, parse_page_range
+from mock_server import start_server
+from amazon_scraper import parse_amazon_page
+from flipkart_scraper import parse_flipkart_page
+
+# Offline throughput benchmark: crawls the local stand-in server with the shared
+# engine (both sites in parallel) and parses every page, without writing any CSVs.
+
+def parse_only(parse):
+    def handle(page, response):
+        if response.status_code != 200:
+            return None
+        return parse(response.content)[0]
+    return handle
+
+def run(host, pages, **engine_options):
+    engine = FetchEngine(**engine_options)
+    counts = {}
+
+    def crawl(name, path, parse):
+        records = crawl_site(engine, name, host + path, pages, parse_only(parse))
+        counts[name] = len(records)
+
+    threads = [
+        threading.Thread(target=crawl, args=("Amazon", "/s?k=laptops&page={}", parse_amazon_page)),
+        threading.Thread(target=crawl, args=("Flipkart", "/search?q=laptops&page={}", parse_flipkart_page)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.close()
+    return engine.stats, counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fetch engine against the local stand-in server.")
+    parser.add_argument('--pages', default='1-40')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    parser.add_argument('--pages-dir', default=None)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0.0, help="Requests/sec per host, 0 = unlimited")
+    args = parser.parse_args()
+
+    server, host = start_server(pages_dir=args.pages_dir, latency=args.latency, fail_rate=args.fail_rate)
+    pages = parse_page_range(args.pages)
+
+    # Baseline: one request at a time per host (the old sequential loop, minus its fixed sleep)
+    start = time.perf_counter()
+    stats, counts = run(host, pages, max_workers=2, per_host_concurrency=1, per_host_rate=0, backoff=0.05)
+    print(f"\nSequential per site: {time.perf_counter() - start:.2f}s, items {counts}")
+    stats.report()
+
+    start = time.perf_counter()
+    stats, counts = run(host, pages, max_workers=args.workers, per_host_concurrency=args.per_host,
+                        per_host_rate=args.rate, backoff=0.05)
+    print(f"\nConcurrent engine: {time.perf_counter() - start:.2f}s, items {counts}")
+    stats.report()
+
+    server.shutdown()
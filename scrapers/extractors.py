@@ -0,0 +1,238 @@
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError: # lxml is optional, the BeautifulSoup backend always works
+    lxml = None
+
+# Declarative selector table. Each site names its result container and, for every
+# output field, a chain of alternatives tried in order. An alternative is a path of
+# steps (tag, class, min_text_len), each taking the FIRST match inside the previous
+# one, plus the cleaner applied to the text of the last element. Field order here
+# is the column order of the scraped CSVs.
+#   class None        -> any element with that tag
+#   min_text_len n    -> only elements whose text is longer than n characters
+#   many=True         -> collect every match of the last step instead of the first
+
+SITE_SELECTORS = {
+    'amazon': {
+        'container': ('div', {'data-component-type': 's-search-result'}),
+        'fields': [
+            ('Title', {
+                'required': True,
+                'chain': [
+                    ([('h2', None, None)], 'strip'),
+                    # Fallback try finding span with text
+                    ([('span', None, 30)], 'strip'),
+                ],
+            }),
+            ('Price', {
+                'default': None,
+                'chain': [
+                    ([('span', 'a-price', None), ('span', 'a-offscreen', None)], 'price'),
+                    # Try to construct from whole + fraction if simple text fails
+                    ([('span', 'a-price', None), ('span', 'a-price-whole', None)], 'price_whole'),
+                    ([('span', 'a-price', None)], 'price'),
+                ],
+            }),
+            ('Rating', {
+                'default': None,
+                'chain': [
+                    ([('span', 'a-icon-alt', None)], 'first_word'),
+                ],
+            }),
+        ],
+    },
+    'flipkart': {
+        # Layout found in debug: data-id based
+        'container': ('div', {'data-id': True}),
+        'fields': [
+            ('Title', {
+                'required': True,
+                'chain': [
+                    ([('div', 'RG5Slk', None)], 'strip'),
+                    ([('div', '_4rR01T', None)], 'strip'), # Old class
+                    ([('a', 's1Q9rs', None)], 'strip'), # Grid class
+                ],
+            }),
+            ('Price', {
+                'default': None,
+                'chain': [
+                    ([('div', 'hZ3P6w', None)], 'price'),
+                    ([('div', '_30jeq3', None)], 'price'), # Old class
+                ],
+            }),
+            ('Rating', {
+                'default': None,
+                'chain': [
+                    ([('div', 'MKiFS6', None)], 'strip'),
+                    ([('div', '_3LWZlK', None)], 'strip'), # Old class
+                ],
+            }),
+            ('Features', {
+                'default': "",
+                'chain': [
+                    ([('ul', 'HwRTzP', None), ('li', None, None)], 'join_items'),
+                    ([('ul', '_1xgFaf', None), ('li', None, None)], 'join_items'), # Old class
+                ],
+                'many': True,
+            }),
+        ],
+    },
+}
+
+# Marks a field none of whose alternatives matched
+MISSING = object()
+
+CLEANERS = {
+    'strip': lambda text: text.strip(),
+    'price': lambda text: text.strip().replace('₹', '').replace(',', ''),
+    'price_whole': lambda text: text.strip().replace(',', '').replace('.', ''),
+    'first_word': lambda text: text.split(" ")[0],
+    'join_items': lambda texts: " | ".join(texts),
+}
+
+
+class Backend:
+    def __init__(self, site):
+        self.spec = SITE_SELECTORS[site]
+
+    def field(self, item, rule):
+        for steps, cleaner in rule['chain']:
+            el = item
+            for step in steps[:-1]:
+                el = self._find(el, step)
+                if el is None:
+                    break
+            if el is None:
+                continue
+            if rule.get('many'):
+                return CLEANERS[cleaner]([self._text(e) for e in self._find(el, steps[-1], many=True)])
+            el = self._find(el, steps[-1])
+            if el is not None:
+                return CLEANERS[cleaner](self._text(el))
+        return MISSING
+
+
+class BS4Backend(Backend):
+    # Reference path: full html.parser tree and item.find() per step, as the
+    # scrapers have always done it
+    name = 'bs4'
+
+    def _text(self, el):
+        return el.text
+
+    def _find(self, el, step, many=False):
+        tag, cls, min_len = step
+        if min_len is not None:
+            for candidate in el.find_all(tag):
+                if len(candidate.text) > min_len:
+                    return candidate
+            return None
+        kwargs = {'class_': cls} if cls else {}
+        if many:
+            return el.find_all(tag, **kwargs)
+        return el.find(tag, **kwargs)
+
+    def extract(self, content):
+        soup = BeautifulSoup(content, "html.parser")
+        tag, attrs = self.spec['container']
+        items = soup.find_all(tag, attrs=attrs)
+        return extract_items(self, items), len(items)
+
+
+class LxmlBackend(Backend):
+    # Fast path: libxml2 parser and XPath expressions compiled once per site
+    name = 'lxml'
+
+    def __init__(self, site):
+        super().__init__(site)
+        tag, attrs = self.spec['container']
+        self.container = etree.XPath(f"//{tag}{self._attr_predicates(attrs)}")
+        # Text as BeautifulSoup's .text sees it: no comments, no script/style bodies
+        self.text = etree.XPath(".//text()[not(ancestor::script) and not(ancestor::style)]")
+        self.steps = {}
+        for _, rule in self.spec['fields']:
+            for steps, _ in rule['chain']:
+                for step in steps:
+                    if step not in self.steps:
+                        self.steps[step] = etree.XPath(self._step_xpath(step))
+
+    def _attr_predicates(self, attrs):
+        preds = []
+        for key, value in attrs.items():
+            preds.append(f"[@{key}]" if value is True else f"[@{key}='{value}']")
+        return "".join(preds)
+
+    def _step_xpath(self, step):
+        tag, cls, _ = step
+        xpath = f".//{tag}"
+        if cls:
+            xpath += f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+        return xpath
+
+    def _text(self, el):
+        return "".join(self.text(el))
+
+    def _find(self, el, step, many=False):
+        matches = self.steps[step](el)
+        if many:
+            return matches
+        min_len = step[2]
+        for candidate in matches:
+            if min_len is None or len(self._text(candidate)) > min_len:
+                return candidate
+        return None
+
+    def extract(self, content):
+        if isinstance(content, bytes):
+            content = decode(content)
+        if not content.strip():
+            return [], 0
+        doc = lxml.html.document_fromstring(content)
+        items = self.container(doc)
+        return extract_items(self, items), len(items)
+
+
+def decode(content):
+    # Same charset detection BeautifulSoup applies to raw bytes
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        from bs4.dammit import UnicodeDammit
+        return UnicodeDammit(content, is_html=True).unicode_markup
+
+def extract_items(backend, items):
+    records = []
+    for item in items:
+        data = {}
+        for name, rule in backend.spec['fields']:
+            value = backend.field(item, rule)
+            if value is MISSING:
+                if rule.get('required'):
+                    break
+                value = rule['default']
+            data[name] = value
+        else:
+            records.append(data)
+    return records
+
+BACKENDS = {'bs4': BS4Backend, 'lxml': LxmlBackend}
+DEFAULT_BACKEND = 'lxml' if lxml is not None else 'bs4'
+
+_compiled = {}
+
+def get_backend(site, backend=None):
+    # Selectors are compiled once per (site, backend) and reused for every page
+    key = (site, backend or DEFAULT_BACKEND)
+    if key not in _compiled:
+        _compiled[key] = BACKENDS[key[1]](site)
+    return _compiled[key]
+
+def field_names(site):
+    return [name for name, _ in SITE_SELECTORS[site]['fields']]
+
+def extract_page(site, content, backend=None):
+    # Returns (records, number of result containers on the page)
+    return get_backend(site, backend).extract(content)
@@ -0,0 +1,200 @@
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import threading
+import random
+import time
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import project_paths
+from instrumentation import span
+
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.3; Win 64 ; x64) Apple WeKit /537.36(KHTML , like Gecko) Chrome/80.0.3987.162 Safari/537.36'}
+
+# Status codes worth retrying (rate limited or transient server errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostLimiter:
+    # Caps in-flight requests to one host and spaces out request starts
+    def __init__(self, concurrency, rate):
+        self.slots = threading.Semaphore(concurrency)
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def __enter__(self):
+        self.slots.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc):
+        self.slots.release()
+
+
+class FetchStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def add_page(self, size):
+        with self.lock:
+            self.pages += 1
+            self.bytes += size
+
+    def add_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def add_error(self):
+        with self.lock:
+            self.errors += 1
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'pages': self.pages,
+            'bytes': self.bytes,
+            'retries': self.retries,
+            'errors': self.errors,
+            'seconds': elapsed,
+            'pages_per_sec': self.pages / elapsed,
+            'bytes_per_sec': self.bytes / elapsed,
+        }
+
+    def report(self):
+        s = self.summary()
+        print(f"Fetched {s['pages']} pages ({s['bytes'] / 1e6:.2f} MB) in {s['seconds']:.1f}s "
+              f"- {s['pages_per_sec']:.2f} pages/sec, {s['bytes_per_sec'] / 1e6:.2f} MB/sec, "
+              f"{s['retries']} retries, {s['errors']} errors")
+
+
+class FetchEngine:
+    # Shared worker pool for all scrapers. Connections are kept alive per host
+    # and every host gets its own concurrency cap and request rate.
+    def __init__(self, max_workers=8, per_host_concurrency=2, per_host_rate=1.0,
+                 max_retries=3, backoff=1.0, timeout=30, headers=None):
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.sessions = {}
+        self.limiters = {}
+        self.lock = threading.Lock()
+        self.stats = FetchStats()
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _session(self, host):
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_concurrency)
+                session.mount(host, adapter)
+                self.sessions[host] = session
+                self.limiters[host] = HostLimiter(self.per_host_concurrency, self.per_host_rate)
+            return self.sessions[host], self.limiters[host]
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    def fetch(self, url, headers=None):
+        session, limiter = self._session(self._host(url))
+        attempt = 0
+        while True:
+            try:
+                with limiter:
+                    response = session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self.stats.add_error()
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    if response.status_code >= 400:
+                        self.stats.add_error()
+                    self.stats.add_page(len(response.content))
+                    return response
+            self.stats.add_retry()
+            time.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    def submit(self, url, headers=None):
+        return self.pool.submit(self.fetch, url, headers)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for session in self.sessions.values():
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_page_range(spec):
+    # "1-40" -> range(1, 41), "3" -> range(3, 4)
+    if '-' in spec:
+        first, last = spec.split('-', 1)
+        return range(int(first), int(last) + 1)
+    return range(int(spec), int(spec) + 1)
+
+
+def crawl_site(engine, name, base_url, pages, handle_page, sink=None):
+    # Fetch every page of one site through the engine and hand each response to
+    # handle_page(page, response). Records come back in page order so the output
+    # matches a sequential crawl. With a sink, records are streamed to it as pages
+    # complete and nothing is accumulated here.
+    with span(f'scrape.{name.lower()}') as stage:
+        futures = {}
+        for page in pages:
+            print(f"Scraping {name} Page {page}...")
+            futures[engine.submit(base_url.format(page))] = page
+
+        by_page = {}
+        for future in as_completed(futures):
+            # Drop our reference so the response can be freed once handled
+            page = futures.pop(future)
+            try:
+                response = future.result()
+                start = time.perf_counter()
+                records = handle_page(page, response)
+                stage.add(pages=1, bytes_read=len(response.content), rows=len(records or []),
+                          parse_seconds=time.perf_counter() - start)
+            except Exception as e:
+                print(f"Error scraping {name} page {page}: {e}")
+                records = None
+            if sink is not None:
+                sink.add_page(page, records)
+            elif records is not None:
+                by_page[page] = records
+
+    records = []
+    for page in sorted(by_page):
+        records.extend(by_page[page])
+    return records
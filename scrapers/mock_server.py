@@ -0,0 +1,138 @@
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Local stand-in for the Amazon and Flipkart search pages so the crawler can be
+# benchmarked offline. Recorded pages are served from --pages-dir when present
+# ("amazon_page_3.html", or "debug_amazon.html" for every page); otherwise a
+# synthetic page using the same markup the scrapers parse is generated.
+
+ROUTES = {'/s': 'amazon', '/search': 'flipkart'}
+
+BRANDS = ["HP", "Dell", "Lenovo", "ASUS", "Acer", "MSI", "Apple", "Samsung"]
+CPUS = ["Intel Core i3", "Intel Core i5", "Intel Core i7", "Intel Core i9", "AMD Ryzen 5",
+        "AMD Ryzen 7", "Apple M1", "Apple M2", "Intel Celeron"]
+GPUS = ["Intel Iris Xe Graphics", "Intel UHD Graphics", "NVIDIA GeForce RTX 4050",
+        "NVIDIA GeForce RTX 3050", "AMD Radeon Graphics", "NVIDIA GeForce GTX 1650"]
+
+def synthetic_listing(rng):
+    brand = rng.choice(BRANDS)
+    ram = rng.choice([4, 8, 16, 32])
+    storage = rng.choice(["256 GB SSD", "512 GB SSD", "1 TB SSD", "1 TB HDD"])
+    display = rng.choice(["14 Inch", "15.6 Inch", "39.62 cm", "16 Inch"])
+    title = f"{brand} {rng.choice(CPUS)} Laptop ({ram} GB/{storage}/Windows 11) {rng.choice(GPUS)} {display}"
+    price = rng.randrange(20000, 250000)
+    rating = round(rng.uniform(3.0, 5.0), 1)
+    return title, price, rating, ram, storage, display
+
+def render_amazon_page(page, items=24):
+    rng = random.Random(f"amazon-{page}")
+    cards = []
+    for _ in range(items):
+        title, price, rating, _, _, _ = synthetic_listing(rng)
+        cards.append(
+            '<div data-component-type="s-search-result" class="s-result-item">'
+            f'<h2 class="a-size-mini"><a href="#"><span>{title}</span></a></h2>'
+            f'<span class="a-price"><span class="a-offscreen">₹{price:,}</span>'
+            f'<span class="a-price-whole">{price:,}</span></span>'
+            f'<i class="a-icon a-icon-star-small"><span class="a-icon-alt">{rating} out of 5 stars</span></i>'
+            '</div>'
+        )
+    return f"<html><head><title>Amazon.in : laptops</title></head><body><div class=\"s-main-slot\">{''.join(cards)}</div></body></html>"
+
+def render_flipkart_page(page, items=24):
+    rng = random.Random(f"flipkart-{page}")
+    cards = []
+    for i in range(items):
+        title, price, rating, ram, storage, display = synthetic_listing(rng)
+        features = [f"{ram} GB DDR4 RAM", storage, f"{display} Display", "Windows 11 Operating System"]
+        lis = ''.join(f'<li class="J+igdf">{f}</li>' for f in features)
+        cards.append(
+            f'<div data-id="LAP{page:03d}{i:03d}"><a class="k7wcnx" href="#">'
+            f'<div class="RG5Slk">{title}</div>'
+            f'<div><div class="MKiFS6">{rating}<img src="star.svg"/></div></div>'
+            f'<ul class="HwRTzP">{lis}</ul>'
+            f'<div class="hZ3P6w">₹{price:,}</div>'
+            '</a></div>'
+        )
+    return f"<html><head><title>Flipkart laptops</title></head><body><div id=\"container\">{''.join(cards)}</div></body></html>"
+
+RENDERERS = {'amazon': render_amazon_page, 'flipkart': render_flipkart_page}
+
+def load_page(pages_dir, site, page):
+    if pages_dir:
+        for name in (f"{site}_page_{page}.html", f"debug_{site}.html"):
+            path = os.path.join(pages_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return f.read()
+    return RENDERERS[site](page).encode("utf-8")
+
+def make_handler(pages_dir=None, latency=0.0, fail_rate=0.0):
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            site = ROUTES.get(parts.path)
+            if site is None:
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+            with rng_lock:
+                fail = rng.random() < fail_rate
+            if fail:
+                body = b"Service Unavailable"
+                self.send_response(503)
+            else:
+                page = int(parse_qs(parts.query).get('page', ['1'])[0])
+                body = load_page(pages_dir, site, page)
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def start_server(port=0, pages_dir=None, latency=0.0, fail_rate=0.0):
+    # Starts the stand-in in a background thread; returns (server, base host URL)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(pages_dir, latency, fail_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded/synthetic search pages locally.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pages-dir', default=None, help="Directory with recorded *.html pages")
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated server time per request (seconds)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.pages_dir, args.latency, args.fail_rate))
+    print(f"Serving on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
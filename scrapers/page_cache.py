@@ -0,0 +1,165 @@
+from concurrent.futures import Future
+from fetch_engine import FetchStats
+import hashlib
+import gzip
+import json
+import os
+import threading
+import time
+
+# Content-addressed store for raw search pages.
+#   objects/ab/abcdef....html.gz  - gzip'd page body, named by the SHA-256 of the body
+#   index/<sha1 of url>.json      - url, body hash, ETag / Last-Modified, fetch time
+# Identical pages share one object, so re-crawls that return unchanged HTML cost no disk.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'page_cache')
+DEFAULT_TTL = 24 * 3600 # Pages younger than this are served without touching the network
+
+
+class CachedResponse:
+    # Minimal stand-in for requests.Response used by the page handlers.
+    # replayed marks pages served by --replay, which handlers leave as they are
+    # (no debug dumps).
+    def __init__(self, url, content, status_code=200, headers=None, replayed=False):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.from_cache = True
+        self.replayed = replayed
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+
+class PageCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, 'index'), exist_ok=True)
+
+    def _index_path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, 'index', key + '.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest + '.html.gz')
+
+    def _count(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def lookup(self, url):
+        path = self._index_path(url)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read(self, entry):
+        with gzip.open(self._object_path(entry['sha256']), "rb") as f:
+            return f.read()
+
+    def _write_entry(self, url, entry):
+        # Write-then-rename so a crash never leaves a half-written index entry
+        path = self._index_path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def store(self, url, response):
+        digest = hashlib.sha256(response.content).hexdigest()
+        obj = self._object_path(digest)
+        if not os.path.exists(obj):
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            tmp = f"{obj}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(response.content)
+            os.replace(tmp, obj)
+        entry = {
+            'url': url,
+            'sha256': digest,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'size': len(response.content),
+        }
+        self._write_entry(url, entry)
+        return entry
+
+    def fetch(self, engine, url):
+        entry = self.lookup(url)
+        if entry and time.time() - entry['fetched_at'] < self.ttl:
+            # Counted in the engine's pages like a fetched or replayed page
+            self._count('hits')
+            content = self.read(entry)
+            engine.stats.add_page(len(content))
+            return CachedResponse(url, content)
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = engine.fetch(url, headers=headers or None)
+        if response.status_code == 304 and entry:
+            # Unchanged upstream: keep the stored body and restart its TTL
+            self._count('revalidated')
+            entry['fetched_at'] = time.time()
+            self._write_entry(url, entry)
+            return CachedResponse(url, self.read(entry))
+
+        self._count('misses')
+        if response.status_code == 200:
+            self.store(url, response)
+        return response
+
+    def report(self):
+        print(f"Page cache: {self.hits} fresh hits, {self.revalidated} revalidated (304), {self.misses} fetched")
+
+
+class CachingEngine:
+    # Wraps a FetchEngine so every page goes through the cache. With replay=True
+    # pages come only from the cache and the network is never touched.
+    def __init__(self, engine, cache, replay=False):
+        self.engine = engine
+        self.cache = cache
+        self.replay = replay
+        self.stats = engine.stats if engine is not None else FetchStats()
+
+    def _replay(self, url):
+        entry = self.cache.lookup(url)
+        if entry is None:
+            return CachedResponse(url, b"", status_code=404, replayed=True)
+        content = self.cache.read(entry)
+        self.stats.add_page(len(content))
+        return CachedResponse(url, content, replayed=True)
+
+    def fetch(self, url, headers=None):
+        if self.replay:
+            return self._replay(url)
+        return self.cache.fetch(self.engine, url)
+
+    def submit(self, url, headers=None):
+        if self.replay:
+            future = Future()
+            try:
+                future.set_result(self._replay(url))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.engine.pool.submit(self.cache.fetch, self.engine, url)
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+        self.cache.report()
@@ -0,0 +1,123 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+import json
+import os
+
+# Streams scraped records to disk as pages complete instead of holding the whole
+# crawl in memory. Records land in an append-only directory of Parquet parts:
+#   data/amazon_laptops/part-00000.parquet, part-00001.parquet, ...
+#   data/amazon_laptops/_checkpoint.json
+# Pages are written strictly in page order (out-of-order completions wait in a
+# small reorder buffer), so the checkpoint only needs the last completed page.
+# A part counts only once the checkpoint lists it; parts left behind by a crash
+# before their checkpoint update are deleted on the next start.
+
+class RecordSink:
+    def __init__(self, path, columns, batch_size=500, source=None):
+        self.path = path
+        self.columns = list(columns)
+        self.schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self.batch_size = batch_size
+        self.checkpoint_path = os.path.join(path, '_checkpoint.json')
+        self.buffer = []
+        self.buffer_last_page = None
+        self.order = []
+        self.ready = {}
+        os.makedirs(path, exist_ok=True)
+
+        state = self._load_checkpoint()
+        if state and not state['complete'] and state['source'] == source:
+            print(f"Resuming after page {state['last_page']} ({state['rows']} records already saved)")
+        else:
+            state = {'source': source, 'last_page': 0, 'failed': [], 'parts': [], 'rows': 0, 'complete': False}
+        self.state = state
+        self._remove_orphans()
+        self._save_checkpoint()
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_checkpoint(self):
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _remove_orphans(self):
+        keep = set(self.state['parts'])
+        for name in os.listdir(self.path):
+            if name.startswith('part-') and name not in keep:
+                os.remove(os.path.join(self.path, name))
+
+    @property
+    def last_page(self):
+        return self.state['last_page']
+
+    def pending(self, pages):
+        # Pages still to crawl: everything after the checkpoint plus earlier failures
+        failed = set(self.state['failed'])
+        todo = [p for p in pages if p > self.state['last_page'] or p in failed]
+        self.state['failed'] = []
+        self.order = list(todo)
+        return todo
+
+    def add_page(self, page, records):
+        # records=None marks a page that could not be fetched or parsed
+        self.ready[page] = records
+        while self.order and self.order[0] in self.ready:
+            done = self.order.pop(0)
+            recs = self.ready.pop(done)
+            if recs is None:
+                self.state['failed'].append(done)
+            else:
+                self.buffer.extend(recs)
+            self.buffer_last_page = done
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if self.buffer_last_page is None:
+            return
+        if self.buffer:
+            name = f"part-{len(self.state['parts']):05d}.parquet"
+            table = pa.Table.from_pylist(
+                [{c: (None if r.get(c) is None else str(r.get(c))) for c in self.columns} for r in self.buffer],
+                schema=self.schema)
+            tmp = os.path.join(self.path, name + '.tmp')
+            pq.write_table(table, tmp)
+            os.replace(tmp, os.path.join(self.path, name))
+            self.state['parts'].append(name)
+            self.state['rows'] += len(self.buffer)
+        self.state['last_page'] = max(self.state['last_page'], self.buffer_last_page)
+        self._save_checkpoint()
+        self.buffer = []
+        self.buffer_last_page = None
+
+    def close(self, complete=True):
+        # A crawl with failed pages stays incomplete, so the next run resumes
+        # it and pending() retries them
+        self.flush()
+        if complete and not self.order and not self.state['failed']:
+            self.state['complete'] = True
+            self._save_checkpoint()
+        elif complete and self.state['failed']:
+            print(f"{len(self.state['failed'])} pages failed; the next run retries them")
+
+    def iter_batches(self):
+        for name in self.state['parts']:
+            yield pq.read_table(os.path.join(self.path, name)).to_pandas()
+
+    def export_csv(self, csv_path):
+        # Writes the parts out one at a time, so memory stays at one part
+        tmp = csv_path + '.tmp'
+        header = True
+        for df in self.iter_batches():
+            df.to_csv(tmp, index=False, header=header, mode='w' if header else 'a')
+            header = False
+        if header:
+            pd.DataFrame().to_csv(tmp, index=False)
+        os.replace(tmp, csv_path)
@@ -0,0 +1,68 @@
+import argparse
+import threading
+from fetch_engine import FetchEngine, parse_page_range
+from instrumentation import span
+from page_cache import PageCache, CachingEngine, DEFAULT_CACHE_DIR, DEFAULT_TTL
+from amazon_scraper import get_amazon_data, BASE_URL as AMAZON_URL
+from flipkart_scraper import get_flipkart_data, BASE_URL as FLIPKART_URL
+from urllib.parse import urlsplit
+
+# Site name -> (scrape function, search URL template)
+SITES = {
+    'amazon': (get_amazon_data, AMAZON_URL),
+    'flipkart': (get_flipkart_data, FLIPKART_URL),
+}
+
+def redirect(base_url, host):
+    # Point a site's URL template at another host (e.g. the local mock server)
+    parts = urlsplit(base_url)
+    return host.rstrip('/') + parts.path + '?' + parts.query
+
+def scrape_all(sites=('amazon', 'flipkart'), pages=range(1, 41), host=None,
+               cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, use_cache=True, replay=False, **engine_options):
+    if replay:
+        # Re-run extraction from cached pages only, no network
+        engine = CachingEngine(None, PageCache(cache_dir, ttl), replay=True)
+    elif use_cache:
+        engine = CachingEngine(FetchEngine(**engine_options), PageCache(cache_dir, ttl))
+    else:
+        engine = FetchEngine(**engine_options)
+    threads = []
+    with span('scrape', sites=list(sites), replay=replay) as stage:
+        for name in sites:
+            scrape, base_url = SITES[name]
+            if host:
+                base_url = redirect(base_url, host)
+            # Each site runs in its own thread; the shared engine enforces per-host politeness
+            t = threading.Thread(target=scrape, kwargs={'pages': pages, 'engine': engine, 'base_url': base_url})
+            t.start()
+            threads.append(t)
+
+        for t in threads:
+            t.join()
+        engine.close()
+        summary = engine.stats.summary()
+        stage.add(pages=summary['pages'], bytes_read=summary['bytes'], retries=summary['retries'],
+                  errors=summary['errors'])
+    engine.stats.report()
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the laptop search results of several sites in parallel.")
+    parser.add_argument('--sites', nargs='+', default=list(SITES), choices=list(SITES))
+    parser.add_argument('--pages', default='1-40', help="Page range, e.g. 1-40 or 5")
+    parser.add_argument('--workers', type=int, default=8, help="Total worker threads")
+    parser.add_argument('--per-host', type=int, default=2, help="Max in-flight requests per host")
+    parser.add_argument('--rate', type=float, default=1.0, help="Max requests per second per host")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--host', default=None, help="Send all requests to this host instead, e.g. http://127.0.0.1:8765")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL, help="Seconds before a cached page is revalidated")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the page cache")
+    parser.add_argument('--replay', action='store_true', help="Extract from cached pages only, without network access")
+    args = parser.parse_args()
+
+    scrape_all(args.sites, parse_page_range(args.pages), host=args.host,
+               cache_dir=args.cache_dir, ttl=args.ttl, use_cache=not args.no_cache, replay=args.replay,
+               max_workers=args.workers, per_host_concurrency=args.per_host,
+               per_host_rate=args.rate, max_retries=args.retries)
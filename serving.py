@@ -0,0 +1,240 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# What the serving surfaces share: the model inputs and the app's input
+# domains, picking and loading the model, and warming it up in the background.
+# Only the standard library is imported here; numpy, pandas and sklearn load
+# when a model does, so a fresh app worker can draw its form first.
+
+FEATURES = ['Brand', 'RAM', 'Storage_GB', 'Processor', 'GPU', 'Display_Inch']
+NUMERIC = ['RAM', 'Storage_GB', 'Display_Inch']
+
+BRANDS = ["HP", "Dell", "Lenovo", "Asus", "Acer", "MSI", "Apple", "Samsung", "Other"]
+PROCESSORS = [
+    "Intel Core i3", "Intel Core i5", "Intel Core i7", "Intel Core i9",
+    "AMD Ryzen 3", "AMD Ryzen 5", "AMD Ryzen 7", "AMD Ryzen 9",
+    "Apple M1", "Apple M2", "Apple M3",
+    "Intel Celeron", "Intel Pentium", "Other"
+]
+GPUS = [
+    "Integrated/Other", "Intel Iris Xe", "Intel UHD", "AMD Radeon",
+    "NVIDIA RTX 3050", "NVIDIA RTX 4050", "NVIDIA RTX 4060",
+    "NVIDIA GTX 1650", "NVIDIA RTX 3060", "NVIDIA RTX 4070",
+    "Apple Silicon GPU", "Intel Arc"
+]
+# (min, max, step) of the number inputs
+RAM_RANGE = (4, 64, 4)
+STORAGE_RANGE = (128, 4096, 128)
+DISPLAY_RANGE = (10.0, 21.0, 0.1)
+
+# Price range shown with a prediction: 5th to 95th percentile of the trees
+INTERVAL = (5, 95)
+
+WARMUP_ROW = {'Brand': 'HP', 'RAM': 8, 'Storage_GB': 512, 'Processor': 'Intel Core i5', 'GPU': 'Intel Iris Xe',
+              'Display_Inch': 15.6}
+
+def export_compact_model(model_dir, pipeline):
+    # The compact export is derived from the joblib model and not committed.
+    # Writes it for a loaded forest pipeline that has none yet (or an older
+    # one); other models, and a read-only model dir, keep serving the joblib
+    # file. Returns the export's path, or None.
+    joblib_path = os.path.join(model_dir, 'laptop_price_model.joblib')
+    compact_path = os.path.join(model_dir, 'laptop_price_model.forest')
+    if not hasattr(getattr(pipeline, 'named_steps', {}).get('model'), 'estimators_'):
+        return None
+    if os.path.exists(compact_path) and os.path.getmtime(compact_path) >= os.path.getmtime(joblib_path):
+        return compact_path
+    from compact_model import export_compact
+    try:
+        export_compact(pipeline, compact_path)
+    except OSError:
+        return None
+    return compact_path
+
+def model_path(model_dir):
+    # The compact export maps in milliseconds and is shared between worker
+    # processes; serve it unless the joblib model was saved after it (or it
+    # does not exist yet: ModelLoader writes it after loading the joblib)
+    joblib_path = os.path.join(model_dir, 'laptop_price_model.joblib')
+    compact_path = os.path.join(model_dir, 'laptop_price_model.forest')
+    if os.path.exists(compact_path) and (not os.path.exists(joblib_path)
+                                         or os.path.getmtime(compact_path) >= os.path.getmtime(joblib_path)):
+        return compact_path
+    return joblib_path if os.path.exists(joblib_path) else None
+
+def import_model_modules(path):
+    # What deserializing this model needs: numpy for the compact export,
+    # sklearn for a pickled pipeline
+    if path.endswith('.forest'):
+        import compact_model
+    else:
+        import joblib
+        import sklearn.compose, sklearn.ensemble, sklearn.pipeline
+
+def read_model(path):
+    if path.endswith('.forest'):
+        from compact_model import load_compact
+        return load_compact(path)
+    import joblib
+    return joblib.load(path)
+
+def load_model(model_dir):
+    path = model_path(model_dir)
+    return None if path is None else read_model(path)
+
+def _frame(data):
+    # Rows (list of dicts) or columns (dict of lists) as the pipeline's input
+    # frame. Missing values become NaN: a single-row column holding only None
+    # would otherwise stay an object column the imputer does not fill
+    import numpy as np
+    import pandas as pd
+    return pd.DataFrame(data, columns=FEATURES).fillna(np.nan)
+
+def predict_one(model, row):
+    if hasattr(model, 'predict_row'):
+        # Compact engine: straight from the raw inputs, no DataFrame or transformers
+        return model.predict_row(row)
+    return float(model.predict(_frame([row]))[0])
+
+def predict_rows(model, rows):
+    # A list of row dicts in one vectorized call
+    if hasattr(model, 'predict_row'):
+        return model.predict({name: [row.get(name) for row in rows] for name in FEATURES})
+    return model.predict(_frame(rows))
+
+def predict_interval(model, columns, percentiles=INTERVAL):
+    # (prices, (rows, len(percentiles)) array of the per-tree percentiles), or
+    # (prices, None) for a model that is not a forest
+    if hasattr(model, 'predict_interval'):
+        return model.predict_interval(columns, percentiles)
+    import numpy as np
+    X = _frame(columns)
+    forest = model.named_steps['model']
+    if not hasattr(forest, 'estimators_'):
+        return model.predict(X), None
+    # sklearn fallback: one predict per tree on the transformed rows
+    Xt = model.named_steps['preprocessor'].transform(X)
+    values = np.stack([tree.predict(Xt) for tree in forest.estimators_], axis=1)
+    return values.mean(axis=1), np.percentile(values, percentiles, axis=1).T
+
+def predict_interval_one(model, row, percentiles=INTERVAL):
+    # (price, [low, high] or None)
+    if hasattr(model, 'predict_row_interval'):
+        return model.predict_row_interval(row, percentiles)
+    prices, bounds = predict_interval(model, {name: [row.get(name)] for name in FEATURES}, percentiles)
+    return float(prices[0]), None if bounds is None else bounds[0].tolist()
+
+
+class ModelLoader:
+    # Loads the served model (and optionally the price lattice) on a background
+    # thread and runs one prediction so the first real request is fast. The
+    # phases are timed: import, deserialize, first predict. In the background,
+    # a forest loaded from joblib is then exported to the compact format for
+    # the next processes, once the model is already serving.
+    def __init__(self, model_dir, lattice=False, model_hash=None, background=True):
+        self.model_dir = model_dir
+        self.with_lattice = lattice
+        self.model_hash = model_hash
+        self.model = self.lattice = self.error = None
+        self.timings = {}
+        self.ready = threading.Event()
+        self.path = None
+        if background:
+            threading.Thread(target=self._load_and_export, name='model-warmup', daemon=True).start()
+        else:
+            self._load()
+
+    def _load_and_export(self):
+        self._load()
+        if self.model is not None and self.path.endswith('.joblib'):
+            export_compact_model(self.model_dir, self.model)
+
+    def _load(self):
+        try:
+            path = self.path = model_path(self.model_dir)
+            if path is None:
+                return
+            start = time.perf_counter()
+            import_model_modules(path)
+            loaded = time.perf_counter()
+            model = read_model(path)
+            deserialized = time.perf_counter()
+            predict_one(model, WARMUP_ROW)
+            predicted = time.perf_counter()
+            self.timings = {'import_s': loaded - start, 'deserialize_s': deserialized - loaded,
+                            'first_predict_s': predicted - deserialized}
+            if self.with_lattice:
+                from price_lattice import load_lattice
+                self.lattice = load_lattice(self.model_dir, self.model_hash)
+                self.timings['lattice_s'] = time.perf_counter() - predicted
+            self.timings['total_s'] = time.perf_counter() - start
+            self.model = model
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def get(self, timeout=None):
+        # The model once loaded (None if there is none); re-raises load errors
+        self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.model
+
+
+def measure_startup(model_dir):
+    # One cold start, timed in this (fresh) interpreter
+    start = time.perf_counter()
+    import streamlit
+    import prediction_cache
+    app_imports = time.perf_counter() - start
+    loader = ModelLoader(model_dir, background=False)
+    if loader.error is not None:
+        raise loader.error
+    return dict(app_imports_s=app_imports, **loader.timings)
+
+def release():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Cold-start breakdown of the served model, per release.")
+    parser.add_argument('--model-dir', default=os.path.join(base_dir, 'models'))
+    parser.add_argument('--repeats', type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument('--log', help="Append the result as one JSON line to this file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_startup(args.model_dir)))
+        sys.exit()
+    path = model_path(args.model_dir)
+    if path is None:
+        raise SystemExit(f"No model in {args.model_dir}; run train_models.py first")
+    runs = []
+    for _ in range(args.repeats):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', '--model-dir', args.model_dir],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    # Median of each phase over the fresh starts
+    phases = {key: sorted(run[key] for run in runs)[len(runs) // 2] for key in runs[0]}
+    record = {'release': release(), 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+              'model': os.path.basename(path), 'repeats': len(runs), **{k: round(v, 4) for k, v in phases.items()}}
+    print(f"Cold start of {record['model']} (median of {len(runs)} fresh interpreters, release {record['release']}):")
+    for key, value in phases.items():
+        print(f"  {key[:-2]:<15} {value * 1e3:9.1f} ms")
+    if args.log:
+        with open(args.log, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"Appended to {args.log}")
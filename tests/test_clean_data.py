@@ -0,0 +1,32 @@
+import os
+import pandas as pd
+from process_data import clean_data
+
+# clean_data end to end on small raw CSVs: prices must come out as the
+# single-frame version typed them, whatever the chunking.
+
+def write_raw(data_dir, amazon_prices, flipkart_prices):
+    pd.DataFrame({'Title': [f"HP Laptop {i} (8 GB/512 GB SSD)" for i in range(len(amazon_prices))],
+                  'Price': amazon_prices}).to_csv(os.path.join(data_dir, 'amazon_laptops.csv'), index=False)
+    pd.DataFrame({'Title': [f"Dell Inspiron {i}" for i in range(len(flipkart_prices))],
+                  'Price': flipkart_prices,
+                  'Features': ["16 GB RAM | 1 TB SSD | 15.6 Inch"] * len(flipkart_prices)}).to_csv(
+        os.path.join(data_dir, 'flipkart_laptops.csv'), index=False)
+
+def cleaned_prices(data_dir, chunksize=2):
+    clean_data(chunksize=chunksize, workers=1, use_cache=False, csv=True, data_dir=data_dir)
+    with open(os.path.join(data_dir, 'cleaned_laptops.csv')) as f:
+        return pd.read_csv(f, dtype={'Price': str})['Price'].tolist()
+
+def test_decimal_prices_keep_their_point(tmp_path):
+    write_raw(tmp_path, [54990.50, 61999.99, 45000], [72990.75, 39999])
+    assert cleaned_prices(tmp_path) == ['54990.5', '61999.99', '45000.0', '72990.75', '39999.0']
+
+def test_whole_number_prices_stay_integers(tmp_path):
+    write_raw(tmp_path, [54990, 61999, 45000], [72990, 39999])
+    assert cleaned_prices(tmp_path) == ['54990', '61999', '45000', '72990', '39999']
+
+def test_text_prices_are_cleaned(tmp_path):
+    # A column with text is cleaned value by value; the numbers in it are kept
+    write_raw(tmp_path, ['₹54,990', '61999.50', 'Currently unavailable'], ['39,999', '72990'])
+    assert cleaned_prices(tmp_path) == ['54990.0', '61999.5', '39999.0', '72990.0']
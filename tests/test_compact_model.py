@@ -0,0 +1,70 @@
+import copy
+import numpy as np
+import pytest
+from compact_model import CompactForest, MASK_ROWS, MASK_WORDS, export_compact, load_compact
+from serving import FEATURES, INTERVAL, predict_interval
+from synthetic_data import make_ready
+from model_selection import TARGET, make_pipeline
+from bench_predict import random_rows
+
+# The compact engine must price rows exactly like Pipeline.predict, over the
+# tree walk (single rows) and the leaf bitmasks (batches) alike, including
+# unknown categories and missing numbers.
+
+@pytest.fixture(scope='module', params=[{}, {'max_leaf_nodes': 40}, {'min_samples_leaf': 8}],
+                ids=['full', 'best-first', 'min-leaf'])
+def pipeline(request):
+    df = make_ready(3_000, seed=5)
+    return make_pipeline("Random Forest", n_estimators=12, **request.param).fit(df[FEATURES], df[TARGET])
+
+@pytest.fixture(scope='module', params=['float64', 'file'])
+def engine(request, pipeline, tmp_path_factory):
+    if request.param == 'float64':
+        return CompactForest.from_pipeline(pipeline)
+    path = str(tmp_path_factory.mktemp('compact') / 'model.forest')
+    export_compact(pipeline, path)
+    return load_compact(path)
+
+def rows(engine, n, seed=0):
+    return random_rows(engine, n, np.random.default_rng(seed), unknown=0.2)
+
+@pytest.mark.parametrize('n', [1, MASK_ROWS - 1, MASK_ROWS, 5_000])
+def test_predict_matches_pipeline(pipeline, engine, n):
+    batch = rows(engine, n)
+    assert batch.isna().any().any() or n < MASK_ROWS
+    np.testing.assert_allclose(engine.predict(batch), pipeline.predict(batch), rtol=1e-12)
+
+def test_predict_interval_matches_pipeline(pipeline, engine):
+    batch = rows(engine, 2_000, seed=1)
+    prices, bounds = engine.predict_interval(batch, INTERVAL)
+    expected_prices, expected_bounds = predict_interval(pipeline, batch, INTERVAL)
+    np.testing.assert_allclose(prices, expected_prices, rtol=1e-12)
+    np.testing.assert_allclose(bounds, expected_bounds, rtol=1e-12)
+
+def test_predict_row_matches_pipeline(pipeline, engine):
+    batch = rows(engine, 50, seed=2)
+    expected = pipeline.predict(batch)
+    for record, price in zip(batch.to_dict('records'), expected):
+        assert np.isclose(engine.predict_row(record), price, rtol=1e-12)
+
+def max_leaves(engine):
+    nodes = np.arange(len(engine.feature))
+    tree = np.searchsorted(engine.roots, nodes, side='right') - 1
+    return np.bincount(tree[engine.children[:, 0] == nodes]).max()
+
+def test_bitmasks_reach_the_walked_leaves(engine):
+    X = engine.encode(rows(engine, 3_000, seed=3))
+    engine._leaves(X[:MASK_ROWS])
+    if max_leaves(engine) > MASK_WORDS * 64:
+        # Larger trees are walked
+        assert engine.masks == ()
+    else:
+        np.testing.assert_array_equal(engine._mask_walk(X), engine._walk(X))
+
+def test_configurations_overflow(engine):
+    X = engine.encode(rows(engine, 100, seed=4))
+    assert engine.configurations(X) is not None
+    wide = copy.copy(engine)
+    # Split points enough for a key space past 63 bits after the numeric inputs
+    wide.split_points = [np.arange(2 ** 21, dtype=np.float32)] * len(engine.numeric)
+    assert wide.configurations(X) is None
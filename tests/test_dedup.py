@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from dataset_store import DatasetWriter, load
+from dedup import MinHasher, block_keys, cluster, dedup_dataset, title_signatures
+
+# Near-duplicate removal deletes rows from the cleaned dataset: it must merge
+# copies of a listing, keep different laptops apart, and give the same
+# clusters on every run.
+
+SPEC = {'Brand': 'HP', 'Processor': 'Intel Core i5', 'RAM': 16, 'Storage_GB': 512, 'GPU': 'Intel Iris Xe',
+        'Display_Inch': 15.6}
+TITLE = "HP Pavilion 15 Intel Core i5 1235U 16GB RAM 512GB SSD Windows 11 Natural Silver"
+
+def listings(rows):
+    # rows: (title, price, spec overrides)
+    return pd.DataFrame([{**SPEC, **spec, 'Title': title, 'Price': price} for title, price, spec in rows])
+
+def labels_of(df, seed=1):
+    sig = title_signatures(MinHasher(seed=seed), df['Title'])
+    return cluster(block_keys(df), sig)[0]
+
+def test_exact_and_near_duplicates_collapse():
+    df = listings([
+        (TITLE, 60000, {}),
+        (TITLE, 61000, {}),
+        (TITLE.upper(), 59000, {}),
+        (TITLE.replace("Natural Silver", "Natural Silver, "), 62000, {}),
+        (TITLE + " Backlit", 60500, {}),
+    ])
+    assert len(set(labels_of(df))) == 1
+
+def test_similar_but_distinct_listings_kept():
+    df = listings([
+        (TITLE, 60000, {}),
+        # Same title, different laptop (the block differs)
+        (TITLE.replace("16GB", "8GB"), 52000, {'RAM': 8}),
+        (TITLE, 64000, {'Storage_GB': 1024}),
+        # Same spec, half the words in common
+        ("HP Victus Gaming 15 Intel Core i5 16GB 512GB Mica Silver Laptop", 65000, {}),
+        ("Dell Inspiron 3520 Intel Core i5 16GB RAM 512GB SSD Carbon Black", 58000, {}),
+        ("", 1, {}),
+    ])
+    labels = labels_of(df)
+    assert len(set(labels)) == len(df)
+
+def test_deterministic_for_a_seed():
+    rng = np.random.default_rng(0)
+    words = np.array(TITLE.split() + ["Renewed", "2024", "Thin", "Backlit", "Keyboard", "Gaming"], dtype=object)
+    titles = [" ".join(rng.choice(words, 12, replace=False)) for _ in range(300)]
+    df = listings([(title, 50000 + i, {'RAM': [8, 16][i % 2]}) for i, title in enumerate(titles)])
+    first = labels_of(df, seed=3)
+    np.testing.assert_array_equal(labels_of(df, seed=3), first)
+    np.testing.assert_array_equal(title_signatures(MinHasher(seed=3), df['Title']),
+                                  title_signatures(MinHasher(seed=3), df['Title']))
+    assert not np.array_equal(title_signatures(MinHasher(seed=4), df['Title']),
+                              title_signatures(MinHasher(seed=3), df['Title']))
+
+def test_dedup_dataset_keeps_one_row_per_cluster(tmp_path):
+    df = listings([
+        (TITLE, 60000, {}),
+        ("Dell Inspiron 3520 Intel Core i5 16GB RAM 512GB SSD Carbon Black", 58000, {}),
+        (TITLE.upper(), 62000, {}),
+        (TITLE, 52000, {'RAM': 8}),
+        (TITLE + " Backlit", 64000, {}),
+    ])
+    df['Source'] = ['Amazon', 'Amazon', 'Flipkart', 'Amazon', 'Flipkart']
+    source, output = str(tmp_path / 'cleaned'), str(tmp_path / 'dedup')
+    writer = DatasetWriter(source, list(df.columns), scrape_date='2026-10-01')
+    writer.write(df)
+    writer.close()
+
+    labels = dedup_dataset(source, output, chunksize=2)
+    out = load(output).sort_values('Price_Min').reset_index(drop=True)
+    assert len(out) == len(set(labels)) == 3
+    merged = out[out['Listings'] == 3].iloc[0]
+    assert (merged['Price_Min'], merged['Price_Max'], merged['Price_Median']) == (60000, 64000, 62000)
+    assert merged['Price'] == 62000
+    assert sorted(out['Listings']) == [1, 1, 3]
+    assert set(out['RAM']) == {8, 16}
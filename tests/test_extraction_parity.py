@@ -0,0 +1,97 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from process_data import (extract_brand, extract_ram, extract_storage, extract_processor, extract_gpu,
+                          extract_display, clean_price, extract_brand_series, extract_ram_series,
+                          extract_storage_series, extract_processor_series, extract_gpu_series,
+                          extract_display_series, clean_price_series, parse_prices)
+from synthetic_data import make_listings
+
+# The vectorized extractors clean_data uses must return exactly what
+# Series.apply(<row-by-row extractor>) returns, values and dtype alike.
+
+TEXTS = [
+    "HP Pavilion Intel Core i5 1235U (16 GB/512 GB SSD) NVIDIA GeForce RTX 3050 15.6 Inch",
+    "Lenovo IdeaPad AMD Ryzen 7 7840HS 16gb 1 TB SSD AMD Radeon Graphics 39.62 cm",
+    "Apple MacBook Air M2 chip 8GB 256GB SSD 13.6 inch",
+    "ASUS TUF RTX 4060 8GB 32 GB 2TB SSD 16 Inch",
+    "Dell 1tb hdd 4 GB Intel UHD Graphics 14 Inch",
+    "MSI 16\x1cGB 512\x1fGB\vSSD Intel Arc A370M 15.6\tInch",
+    "Acer १६ GB RAM 512 GB SSD",
+    "Samsung Galaxy Book ５１２ GB SSD 15.6 Inch",
+    "  leading spaces HP 8 GB",
+    "",
+    " ",
+    "Currently unavailable",
+    np.nan,
+    None,
+    16,
+    15.6,
+]
+
+EXTRACTORS = [
+    (extract_brand_series, extract_brand),
+    (extract_ram_series, extract_ram),
+    (extract_storage_series, extract_storage),
+    (extract_processor_series, extract_processor),
+    (extract_gpu_series, extract_gpu),
+    (extract_display_series, extract_display),
+]
+
+PRICES = ["54990", "₹1,23,990", "39,999", "74990.", "54990.50", "", "Currently unavailable", "1_000", " 45000 ",
+          np.nan, None]
+
+def assert_same(got, expected):
+    pd.testing.assert_series_equal(got, expected, check_exact=True, check_names=False)
+    assert got.to_csv(index=False, header=False) == expected.to_csv(index=False, header=False)
+
+@pytest.mark.parametrize('series_func, func', EXTRACTORS, ids=lambda f: getattr(f, '__name__', ''))
+def test_extractor_edge_cases(series_func, func):
+    s = pd.Series(TEXTS, dtype=object)
+    assert_same(series_func(s), s.apply(func))
+
+@pytest.mark.parametrize('series_func, func', EXTRACTORS, ids=lambda f: getattr(f, '__name__', ''))
+def test_extractor_on_blank_and_missing_only(series_func, func):
+    s = pd.Series(["", np.nan, None, " "], dtype=object)
+    assert_same(series_func(s), s.apply(func))
+
+@pytest.mark.parametrize('series_func, func', EXTRACTORS, ids=lambda f: getattr(f, '__name__', ''))
+def test_extractor_on_non_text_column(series_func, func):
+    # A GPU or title column read as numbers (or all missing)
+    for s in (pd.Series([1650, 3050, 4060]), pd.Series([np.nan, np.nan])):
+        assert_same(series_func(s), s.apply(func))
+
+@pytest.mark.parametrize('series_func, func', EXTRACTORS, ids=lambda f: getattr(f, '__name__', ''))
+def test_extractor_on_synthetic_listings(series_func, func):
+    df = make_listings(2_000, seed=7, irregular=0.2)
+    for column in ('Title', 'Combined_Text'):
+        assert_same(series_func(df[column]), df[column].apply(func))
+
+def test_clean_price_edge_cases():
+    s = pd.Series(PRICES + [45000, 61999.99], dtype=object)
+    assert_same(clean_price_series(s), s.apply(clean_price))
+
+@pytest.mark.parametrize('values', [[54990.50, 61999.99, np.nan], [54990, 61999], [54990, np.nan]])
+def test_clean_price_numeric_column(values):
+    s = pd.Series(values)
+    assert_same(clean_price_series(s), s.apply(clean_price))
+
+@pytest.mark.parametrize('fields, prices', [
+    (["54990.50", "61999.99", "45000"], [54990.5, 61999.99, 45000]),
+    (["54990", "61999"], [54990, 61999]),
+    (["54990", "", "61999"], [54990, np.nan, 61999]),
+    # A column with text: only the text values lose their ',' and '.'
+    (["₹54,990", "61999.50", "Currently unavailable", "1,23,990.00"], [54990, 61999.5, np.nan, 12399000]),
+])
+def test_prices_read_as_text(fields, prices):
+    # clean_data reads raw chunks as text; parse_prices turns the numbers back
+    # into numbers before clean_price_series
+    raw = "Title,Price\n" + "".join(f'Laptop,"{field}"\n' for field in fields)
+    text = pd.read_csv(io.StringIO(raw), dtype=str)['Price']
+    got = clean_price_series(parse_prices(text))
+    np.testing.assert_array_equal(got.to_numpy(dtype=float), np.array(prices, dtype=float))
+    typed = pd.read_csv(io.StringIO(raw))['Price']
+    if pd.api.types.is_numeric_dtype(typed):
+        # Same as the column read_csv types on its own
+        assert_same(got, typed.apply(clean_price))
@@ -0,0 +1,82 @@
+import os
+import pytest
+from extractors import BACKENDS, SITE_SELECTORS, extract_page, lxml
+from mock_server import RENDERERS
+from page_cache import DEFAULT_CACHE_DIR
+from bench_extract import cached_pages, synthetic_pages
+
+# Every extraction backend must return exactly the records (and container
+# counts) of the bs4 reference path, so a selector that drifts between the
+# BeautifulSoup and XPath translations of SITE_SELECTORS fails here.
+
+pytestmark = pytest.mark.skipif(lxml is None, reason="lxml is not installed")
+
+OTHER_BACKENDS = [name for name in BACKENDS if name != 'bs4']
+
+# Pages that take the fallbacks of the selector chains, one card per case
+AMAZON_EDGE_CASES = (
+    '<html><body>'
+    # No h2: the first span with more than 30 characters is the title
+    '<div data-component-type="s-search-result"><span>short</span>'
+    '<span>Lenovo IdeaPad Slim 3 Intel Core i5 16 GB 512 GB SSD</span>'
+    '<span class="a-price"><span class="a-price-whole">54,990.</span></span></div>'
+    # Price without a-offscreen or a-price-whole; rating present
+    '<div data-component-type="s-search-result"><h2> HP Victus <b>RTX 4050</b> </h2>'
+    '<span class="a-price">₹71,990</span><span class="a-icon-alt">4.3 out of 5 stars</span></div>'
+    # No title at all: dropped
+    '<div data-component-type="s-search-result"><span class="a-price">₹1</span></div>'
+    # Multiple classes, a comment and a script inside the title
+    '<div data-component-type="s-search-result"><h2 class="a-size-mini s-line-clamp-2">Dell <!-- x -->Inspiron'
+    '<script>var x = 1;</script> 15</h2><span class="a-price a-text-price">'
+    '<span class="a-offscreen">₹45,000</span></span></div>'
+    '</body></html>'
+)
+
+FLIPKART_EDGE_CASES = (
+    '<html><body>'
+    # Old class names throughout
+    '<div data-id="A1"><div class="_4rR01T">ASUS Vivobook 15</div><div class="_30jeq3">₹39,990</div>'
+    '<div class="_3LWZlK">4.2</div><ul class="_1xgFaf"><li>8 GB RAM</li><li>512 GB SSD</li></ul></div>'
+    # Grid layout title, no price, rating or features
+    '<div data-id="A2"><a class="s1Q9rs" href="#">Acer Aspire 7 RTX 3050</a></div>'
+    # No title: dropped
+    '<div data-id="A3"><div class="hZ3P6w">₹10</div></div>'
+    # Current classes with an empty feature list
+    '<div data-id="A4"><div class="RG5Slk"> MSI Thin GF63 </div><div class="hZ3P6w">₹52,990</div>'
+    '<ul class="HwRTzP"></ul></div>'
+    '</body></html>'
+)
+
+def assert_backends_agree(site, content):
+    expected = extract_page(site, content, 'bs4')
+    for backend in OTHER_BACKENDS:
+        assert extract_page(site, content, backend) == expected, f"{backend} differs from bs4 on {site}"
+    return expected
+
+@pytest.mark.parametrize('site', sorted(SITE_SELECTORS))
+def test_synthetic_pages(site):
+    for page_site, content in synthetic_pages(3):
+        if page_site == site:
+            records, count = assert_backends_agree(site, content)
+            assert records and len(records) == count
+
+def test_amazon_fallbacks():
+    records, count = assert_backends_agree('amazon', AMAZON_EDGE_CASES.encode("utf-8"))
+    assert count == 4 and len(records) == 3
+
+def test_flipkart_fallbacks():
+    records, count = assert_backends_agree('flipkart', FLIPKART_EDGE_CASES.encode("utf-8"))
+    assert count == 4 and len(records) == 3
+
+@pytest.mark.parametrize('site', sorted(RENDERERS))
+def test_non_utf8_and_empty_pages(site):
+    content = RENDERERS[site](1).replace("₹", "Rs ").encode("latin-1", errors="replace") + b"\xe9"
+    assert_backends_agree(site, content)
+    assert_backends_agree(site, b"")
+
+def test_recorded_pages():
+    pages = cached_pages(DEFAULT_CACHE_DIR) if os.path.isdir(DEFAULT_CACHE_DIR) else []
+    if not pages:
+        pytest.skip("no recorded pages in the page cache")
+    for site, content in pages:
+        assert_backends_agree(site, content)
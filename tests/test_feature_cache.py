@@ -0,0 +1,87 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import feature_cache
+import process_data
+from feature_cache import FeatureCache
+
+# Cached features are only reused while the extractor and taxonomy versions
+# they were computed with still hold, and compaction keeps only fingerprints
+# that are still live.
+
+def features(fingerprints, gpu='Intel Iris Xe'):
+    return pd.DataFrame({'fingerprint': np.asarray(fingerprints, dtype=np.uint64), 'GPU': gpu})
+
+def parts(path):
+    return sorted(name for name in os.listdir(path) if name.startswith('part-'))
+
+def test_reused_for_the_same_version(tmp_path):
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    cache.add(features([1, 2, 3]))
+    cache.commit()
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    assert cache.missing(np.array([1, 2, 3, 4], dtype=np.uint64)).tolist() == [False, False, False, True]
+    assert cache.get(np.array([3, 1], dtype=np.uint64))['GPU'].tolist() == ['Intel Iris Xe'] * 2
+
+def test_version_change_discards_everything(tmp_path):
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    cache.add(features([1, 2, 3]))
+    cache.commit()
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.2')
+    assert cache.missing(np.array([1, 2, 3], dtype=np.uint64)).all()
+    assert parts(str(tmp_path)) == [] and len(cache.frame) == 0
+
+def test_commit_with_live_prunes_dead_fingerprints(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_cache, 'MAX_PARTS', 2)
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    for run in range(2):
+        cache.add(features([10 * run + 1, 10 * run + 2]))
+        cache.commit(live=np.array([1, 2, 11, 12], dtype=np.uint64))
+    assert len(parts(str(tmp_path))) == 2 and len(cache.frame) == 4
+    # Past MAX_PARTS, only the fingerprints seen in this run survive, in one part
+    cache.add(features([21, 22]))
+    cache.commit(live=np.array([2, 21, 22, 2], dtype=np.uint64))
+    assert parts(str(tmp_path)) == ['part-00000.parquet']
+    assert sorted(cache.frame['fingerprint'].tolist()) == [2, 21, 22]
+    reopened = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    assert sorted(reopened.frame['fingerprint'].tolist()) == [2, 21, 22]
+    assert reopened.missing(np.array([1, 2, 11, 21], dtype=np.uint64)).tolist() == [True, False, True, False]
+
+def test_commit_without_live_keeps_everything(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_cache, 'MAX_PARTS', 1)
+    cache = FeatureCache(str(tmp_path), ['GPU'], '2.1')
+    for run in range(3):
+        cache.add(features([run]))
+        cache.commit()
+    assert len(parts(str(tmp_path))) == 3 and sorted(cache.frame['fingerprint'].tolist()) == [0, 1, 2]
+
+
+@pytest.fixture
+def extracted_rows(monkeypatch):
+    # Rows clean_data hands to the extractor, per run
+    counts = []
+    extract = process_data.extract_chunk
+
+    def counting(chunk, source):
+        counts[-1] += len(chunk)
+        return extract(chunk, source)
+
+    monkeypatch.setattr(process_data, 'extract_chunk', counting)
+
+    def run(data_dir):
+        counts.append(0)
+        process_data.clean_data(chunksize=2, workers=1, data_dir=str(data_dir))
+        return counts[-1]
+    return run
+
+def test_version_bump_forces_reextraction(tmp_path, monkeypatch, extracted_rows):
+    pd.DataFrame({'Title': [f"HP Laptop {i} (8 GB/512 GB SSD) NVIDIA RTX 3050" for i in range(5)],
+                  'Price': [50000 + i for i in range(5)]}).to_csv(tmp_path / 'amazon_laptops.csv', index=False)
+    assert extracted_rows(tmp_path) == 5
+    assert extracted_rows(tmp_path) == 0
+    monkeypatch.setattr(process_data, 'EXTRACTOR_VERSION', process_data.EXTRACTOR_VERSION + 1)
+    assert extracted_rows(tmp_path) == 5
+    assert extracted_rows(tmp_path) == 0
+    monkeypatch.setattr(process_data, 'TAXONOMY_VERSION', process_data.TAXONOMY_VERSION + 1)
+    assert extracted_rows(tmp_path) == 5
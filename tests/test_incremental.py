@@ -0,0 +1,29 @@
+import pytest
+import sklearn
+from serving import FEATURES
+from synthetic_data import make_ready
+from model_selection import TARGET, make_pipeline
+from incremental import stamp, update_pipeline
+
+# Warm-start updates rebuild trees through sklearn's private Tree state, so
+# they refuse to run on a scikit-learn series other than the pinned one.
+
+def fitted(n=400, seed=0):
+    df = make_ready(n, seed=seed)
+    pipeline = make_pipeline("Random Forest", n_estimators=3).fit(df[FEATURES], df[TARGET])
+    stamp(pipeline, '2026-10-01')
+    return pipeline
+
+def test_update_adds_trees():
+    pipeline = fitted()
+    df = make_ready(200, seed=1)
+    summary = update_pipeline(pipeline, df[FEATURES], df[TARGET], '2026-10-08', new_trees=2)
+    assert summary['trees'] == 5 and summary['trained_through'] == '2026-10-08'
+
+def test_other_sklearn_versions_refused(monkeypatch):
+    pipeline = fitted()
+    df = make_ready(200, seed=1)
+    monkeypatch.setattr(sklearn, '__version__', '1.7.0')
+    with pytest.raises(RuntimeError, match="full training"):
+        update_pipeline(pipeline, df[FEATURES], df[TARGET], '2026-10-08')
+    assert len(pipeline.named_steps['model'].estimators_) == 3
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from synthetic_data import make_ready
+from dataset_store import DatasetWriter
+from model_selection import CAT_COLS, FEATURES, TARGET, make_preprocessor
+from out_of_core import (MIN_PER_STRATUM, allocate, dense_block, encode_frame, fit_preprocessor, iter_frames,
+                         output_layout, scan, stratified_sample, stratum_keys)
+
+# The trees are fitted on dense blocks expanded straight from category codes;
+# they must equal what the saved pipeline's preprocessor produces. Stratified
+# samples keep every stratum's proportional share, with a floor.
+
+def listings(n=3_000, seed=0):
+    df = make_ready(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.random(n) < 0.05, 'RAM'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'Display_Inch'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'Brand'] = None
+    df.loc[rng.random(n) < 0.02, 'GPU'] = None
+    df.loc[rng.random(n) < 0.01, TARGET] = np.nan
+    return df
+
+@pytest.fixture(params=['parquet', 'csv'])
+def dataset(request, tmp_path):
+    # Written in several chunks, so vocabularies grow across blocks
+    df = listings()
+    if request.param == 'csv':
+        path = str(tmp_path / 'ready.csv')
+        df.to_csv(path, index=False)
+    else:
+        path = str(tmp_path / 'ready')
+        writer = DatasetWriter(path, FEATURES + [TARGET], scrape_date='2026-10-01')
+        for start in range(0, len(df), 1_000):
+            writer.write(df.iloc[start:start + 1_000])
+        writer.close()
+    return path, df[df[TARGET].notna()]
+
+def test_dense_block_matches_transform(dataset):
+    path, df = dataset
+    vocabulary, summary = scan(path, chunk_rows=700)
+    assert summary['rows'] == len(df)
+    preprocessor = fit_preprocessor(vocabulary, summary)
+    layout = output_layout(preprocessor, vocabulary)
+    for frame in iter_frames(path, chunk_rows=700):
+        codes, numeric, _ = encode_frame(frame, vocabulary)
+        rows = frame[frame[TARGET].notna()][FEATURES]
+        expected = preprocessor.transform(rows)
+        expected = expected.toarray() if hasattr(expected, 'toarray') else expected
+        np.testing.assert_array_equal(dense_block(layout, codes, numeric), expected.astype(np.float32))
+
+def test_preprocessor_matches_fitting_every_row(dataset):
+    # Same categories and modes; means to float32 precision
+    path, df = dataset
+    vocabulary, summary = scan(path, chunk_rows=700)
+    preprocessor = fit_preprocessor(vocabulary, summary)
+    reference = make_preprocessor().fit(df[FEATURES])
+    got, expected = preprocessor.transform(df[FEATURES]), reference.transform(df[FEATURES])
+    got = got.toarray() if hasattr(got, 'toarray') else got
+    expected = expected.toarray() if hasattr(expected, 'toarray') else expected
+    np.testing.assert_allclose(got, expected, rtol=1e-6)
+
+def test_allocate_floor():
+    counts = pd.Series([9_000, 600, 60, 8])
+    quotas = allocate(counts, 1_000)
+    assert quotas.tolist() == [931, 62, MIN_PER_STRATUM, 8]
+    # The floor shrinks when it alone would exceed n
+    assert allocate(pd.Series([100] * 10), 50).tolist() == [5] * 10
+
+def test_stratified_sample_sizes(tmp_path):
+    df = make_ready(6_000, seed=1)
+    rng = np.random.default_rng(1)
+    df['Brand'] = rng.choice(['HP', 'Dell', 'Apple', 'MSI'], len(df), p=[0.93, 0.05, 0.015, 0.005])
+    df['Processor'] = 'Intel Core i5'
+    df['GPU'] = 'Intel Iris Xe'
+    path = str(tmp_path / 'ready')
+    writer = DatasetWriter(path, FEATURES + [TARGET], scrape_date='2026-10-01')
+    writer.write(df)
+    writer.close()
+
+    vocabulary, summary = scan(path, chunk_rows=1_000)
+    codes, numeric, price = stratified_sample(path, vocabulary, summary, 600, chunk_rows=1_000)
+    keys = summary['strata_counts'].index.to_numpy()
+    sizes = np.bincount(np.searchsorted(keys, stratum_keys(codes)), minlength=len(keys))
+    quotas = allocate(summary['strata_counts'], 600)
+    assert sizes.tolist() == quotas.tolist()
+    counts = summary['strata_counts'].to_numpy()
+    assert (sizes >= np.minimum(MIN_PER_STRATUM, counts)).all()
+    # The rare brands are over-represented, never dropped
+    brands = pd.Series(np.array(list(vocabulary.codes['Brand']))[codes[:, CAT_COLS.index('Brand')]])
+    assert brands.value_counts()['MSI'] >= min(MIN_PER_STRATUM, (df['Brand'] == 'MSI').sum())
+    # Sampled rows are real rows
+    assert np.isin(price, df[TARGET]).all()
@@ -0,0 +1,43 @@
+import os
+from fetch_engine import FetchStats
+from page_cache import PageCache, CachingEngine, CachedResponse
+from mock_server import RENDERERS
+import flipkart_scraper
+
+# Every page a crawl serves counts in the engine's FetchStats, whether it was
+# fetched, a fresh cache hit or replayed; replayed pages leave no debug dumps.
+
+class FakeEngine:
+    def __init__(self, pages):
+        self.pages = pages
+        self.stats = FetchStats()
+
+    def fetch(self, url, headers=None):
+        content = self.pages[url]
+        self.stats.add_page(len(content))
+        return CachedResponse(url, content)
+
+    def close(self):
+        pass
+
+def test_fresh_hits_counted(tmp_path):
+    engine = FakeEngine({'http://x/1': b'<html>one</html>'})
+    cache = PageCache(str(tmp_path))
+    cache.fetch(engine, 'http://x/1')
+    cache.fetch(engine, 'http://x/1')
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert engine.stats.pages == 2 and engine.stats.bytes == 2 * len(b'<html>one</html>')
+
+def test_replay_counted_and_not_dumped(tmp_path, monkeypatch):
+    page = RENDERERS['flipkart'](1).encode("utf-8")
+    cache = PageCache(str(tmp_path / 'cache'))
+    cache.fetch(FakeEngine({'http://x/1': page}), 'http://x/1')
+    replay = CachingEngine(None, cache, replay=True)
+    response = replay.fetch('http://x/1')
+    assert response.replayed and replay.stats.pages == 1
+
+    monkeypatch.chdir(tmp_path)
+    laptops = flipkart_scraper.handle_flipkart_page(1, response)
+    assert laptops and not os.path.exists(tmp_path / 'debug_flipkart.html')
+    flipkart_scraper.handle_flipkart_page(1, CachedResponse('http://x/1', page))
+    assert os.path.exists(tmp_path / 'debug_flipkart.html')
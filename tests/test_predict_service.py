@@ -0,0 +1,131 @@
+import asyncio
+import json
+import pytest
+from compact_model import CompactForest
+from predict_service import PredictService
+from serving import FEATURES, WARMUP_ROW, predict_one
+from synthetic_data import make_ready
+from model_selection import TARGET, make_pipeline
+
+# Single-laptop requests that arrive together are priced in one predict call,
+# and every caller gets the price of its own row back. Rows the model cannot
+# take are answered with a 400 before they reach the batcher.
+
+@pytest.fixture(scope='module', params=['pipeline', 'compact'])
+def model(request):
+    df = make_ready(500, seed=3)
+    pipeline = make_pipeline("Random Forest", n_estimators=5).fit(df[FEATURES], df[TARGET])
+    return pipeline if request.param == 'pipeline' else CompactForest.from_pipeline(pipeline)
+
+def laptops(n):
+    return [dict(WARMUP_ROW, RAM=4 * (i % 8 + 1), Storage_GB=256 * (i % 5 + 1)) for i in range(n)]
+
+def counted(service):
+    # Records the size of every predict call the batcher makes
+    calls = []
+    timed_predict = service.batcher.timed_predict
+
+    def counting(rows):
+        calls.append(len(rows))
+        return timed_predict(rows)
+    service.batcher.timed_predict = counting
+    return calls
+
+def post(service, rows):
+    # Concurrent POST /predict requests against an in-process service (its
+    # queue binds to this event loop, so one call per service)
+    async def main():
+        runner = asyncio.create_task(service.batcher.run())
+        try:
+            return await asyncio.gather(*(service.route('POST', '/predict', json.dumps(row).encode())
+                                          for row in rows))
+        finally:
+            runner.cancel()
+    return asyncio.run(main())
+
+def test_concurrent_requests_share_one_predict(model):
+    service = PredictService(model, 'test', window_ms=50)
+    calls = counted(service)
+    rows = laptops(20)
+    responses = post(service, rows)
+    assert calls == [20] and service.batcher.batches == 1 and service.batcher.largest == 20
+    for row, (status, payload) in zip(rows, responses):
+        assert status == 200
+        assert payload['price'] == pytest.approx(predict_one(model, row))
+    assert len({payload['price'] for _, payload in responses}) > 1
+
+def test_batches_capped_at_max_batch(model):
+    service = PredictService(model, 'test', window_ms=50, max_batch=8)
+    calls = counted(service)
+    rows = laptops(20)
+    responses = post(service, rows)
+    assert calls == [8, 8, 4]
+    assert [payload['price'] for _, payload in responses] == pytest.approx([predict_one(model, r) for r in rows])
+
+def route(service, method, path, body=b''):
+    return asyncio.run(service.route(method, path, body))
+
+def test_malformed_json_rejected(model):
+    service = PredictService(model, 'test')
+    calls = counted(service)
+    for path in ('/predict', '/predict/bulk'):
+        assert route(service, 'POST', path, b'{"Brand": "HP", ') == (400, {'error': "body is not valid JSON"})
+    assert route(service, 'POST', '/predict/bulk', b'[1, 2]') == (400, {'error': 'expected {"rows": [...]}'})
+    assert route(service, 'POST', '/predict', b'[1, 2]') == (400, {'error': "each row must be a JSON object"})
+    assert calls == []
+
+def test_bad_rows_rejected(model):
+    service = PredictService(model, 'test')
+    missing = {name: WARMUP_ROW[name] for name in FEATURES if name != 'GPU'}
+    status, payload = route(service, 'POST', '/predict', json.dumps(missing).encode())
+    assert (status, payload) == (400, {'error': "missing fields: GPU"})
+    # Categories must be strings, numbers must be numbers
+    for field, value in (('Brand', 7), ('Processor', ['Intel Core i5']), ('RAM', "8 GB"), ('RAM', True)):
+        status, payload = route(service, 'POST', '/predict', json.dumps(dict(WARMUP_ROW, **{field: value})).encode())
+        assert status == 400 and payload['error'].startswith(field)
+    body = json.dumps({'rows': [WARMUP_ROW, dict(WARMUP_ROW, GPU=3)]}).encode()
+    assert route(service, 'POST', '/predict/bulk', body) == (400, {'error': "row 1: GPU must be a string or null"})
+
+def test_unknown_categories_priced_like_the_model(model):
+    # A category the model never saw is encoded as unknown, not refused
+    service = PredictService(model, 'test')
+    rows = [dict(WARMUP_ROW, Brand='Framework'), dict(WARMUP_ROW, GPU='Unknown GPU 9000', Processor=None)]
+    status, payload = route(service, 'POST', '/predict/bulk', json.dumps({'rows': rows}).encode())
+    assert status == 200
+    assert payload['prices'] == pytest.approx([predict_one(model, row) for row in rows])
+    # Priced alone (a batch of one), a row gets the same price as in a batch
+    alone = [post(PredictService(model, 'test'), [row])[0][1]['price'] for row in rows]
+    assert alone == pytest.approx(payload['prices'])
+
+def test_routes(model):
+    service = PredictService(model, 'test')
+    assert route(service, 'GET', '/health')[1]['model'] == 'test'
+    assert route(service, 'GET', '/predict')[0] == 405
+    assert route(service, 'POST', '/price')[0] == 404
+    assert route(service, 'POST', '/predict/bulk', b'{"rows": []}') == (200, {'prices': []})
+
+def test_http_error_status(model):
+    # Over a real connection: the status line carries the error, keep-alive holds
+    service = PredictService(model, 'test')
+
+    async def main():
+        runner = asyncio.create_task(service.batcher.run())
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        replies = []
+        for body in (b'not json', json.dumps(WARMUP_ROW).encode()):
+            writer.write(b"POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            status = (await reader.readline()).split()[1]
+            headers = {}
+            while (line := await reader.readline()) != b'\r\n':
+                name, _, value = line.decode().partition(':')
+                headers[name.lower()] = value.strip()
+            replies.append((int(status), json.loads(await reader.readexactly(int(headers['content-length'])))))
+        writer.close()
+        server.close()
+        runner.cancel()
+        return replies
+
+    (bad_status, bad), (status, good) = asyncio.run(main())
+    assert (bad_status, bad) == (400, {'error': "body is not valid JSON"})
+    assert status == 200 and good['price'] == pytest.approx(predict_one(model, WARMUP_ROW))
@@ -0,0 +1,73 @@
+import pytest
+import prediction_cache
+from prediction_cache import PredictionCache, normalize
+
+# The app's shared prediction cache: least recently used entries go first,
+# entries expire after the TTL, and a new model empties it.
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', clock)
+    return clock
+
+def fill(cache, keys):
+    for key in keys:
+        cache.get(key, lambda key=key: f"price of {key}")
+
+def test_evicts_least_recently_used(clock):
+    cache = PredictionCache(maxsize=3)
+    fill(cache, ['a', 'b', 'c'])
+    # A hit makes 'a' the most recent, so 'b' goes first
+    assert cache.get('a', lambda: pytest.fail("'a' is cached")) == "price of a"
+    fill(cache, ['d'])
+    assert list(cache.entries) == ['c', 'a', 'd']
+    fill(cache, ['e', 'f'])
+    assert list(cache.entries) == ['d', 'e', 'f']
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (3, 3, 1, 6)
+
+def test_entries_expire(clock):
+    cache = PredictionCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get('a', compute) == 1
+    clock.now += 59
+    assert cache.get('a', compute) == 1
+    # A hit does not extend the TTL
+    clock.now += 1
+    assert cache.get('a', compute) == 2
+    assert cache.stats()['expired'] == 1
+    clock.now += 30
+    assert cache.get('a', compute) == 2 and len(calls) == 2
+
+def test_stores_price_and_range(clock):
+    cache = PredictionCache()
+    row = {'Brand': 'HP ', 'RAM': 8.0, 'Storage_GB': 512, 'Processor': 'Intel Core i5', 'GPU': 'Intel Iris Xe',
+           'Display_Inch': 15.600000000000001}
+    forest = (54990.0, [41000.0, 70500.0])
+    assert cache.get(normalize(row), lambda: forest) == forest
+    # The same laptop typed differently is a hit, range included
+    same = dict(row, Brand='HP', RAM=8, Display_Inch=15.6)
+    price, bounds = cache.get(normalize(same), lambda: pytest.fail("should be cached"))
+    assert (price, bounds) == forest
+    # Models without a range store None for it
+    other = dict(row, RAM=16)
+    assert cache.get(normalize(other), lambda: (61000.0, None)) == (61000.0, None)
+    assert cache.get(normalize(other), lambda: pytest.fail("should be cached")) == (61000.0, None)
+
+def test_new_model_empties_cache(clock):
+    cache = PredictionCache()
+    cache.use_model('abc')
+    fill(cache, ['a', 'b'])
+    cache.use_model('abc')
+    assert len(cache.entries) == 2
+    cache.use_model('def')
+    assert len(cache.entries) == 0 and cache.stats()['invalidations'] == 1
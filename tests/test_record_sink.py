@@ -0,0 +1,111 @@
+import os
+import pandas as pd
+from record_sink import RecordSink
+
+# Crawls stream pages to Parquet parts behind a checkpoint: an interrupted or
+# partly failed crawl resumes where it stopped, retries failed pages, and
+# never keeps parts the checkpoint does not list.
+
+COLUMNS = ['Title', 'Price']
+SOURCE = 'https://example.com/search?page={}'
+
+def records(page, n=2):
+    return [{'Title': f"Laptop {page}-{i}", 'Price': 1000 * page + i} for i in range(n)]
+
+def saved(sink):
+    frames = list(sink.iter_batches())
+    return pd.concat(frames, ignore_index=True)['Title'].tolist() if frames else []
+
+def titles(pages, n=2):
+    return [r['Title'] for page in pages for r in records(page, n)]
+
+def test_resume_after_interrupted_crawl(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    assert sink.pending(range(1, 6)) == [1, 2, 3, 4, 5]
+    sink.add_page(1, records(1))
+    sink.add_page(2, records(2))
+    sink.close(complete=False)
+
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    assert sink.last_page == 2 and sink.state['rows'] == 4
+    assert sink.pending(range(1, 6)) == [3, 4, 5]
+    for page in (3, 4, 5):
+        sink.add_page(page, records(page))
+    sink.close()
+    assert sink.state['complete']
+    assert saved(sink) == titles(range(1, 6))
+
+def test_new_source_starts_fresh(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    sink.pending([1, 2])
+    sink.add_page(1, records(1))
+    sink.close(complete=False)
+    sink = RecordSink(str(tmp_path), COLUMNS, source='https://other.example.com/?page={}')
+    assert sink.pending([1, 2]) == [1, 2] and saved(sink) == []
+
+def test_failed_pages_retried(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    sink.pending(range(1, 5))
+    for page in (1, 2, 3, 4):
+        sink.add_page(page, None if page in (2, 4) else records(page))
+    sink.close()
+    assert not sink.state['complete'] and sink.state['failed'] == [2, 4]
+
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    assert sink.pending(range(1, 5)) == [2, 4]
+    sink.add_page(2, records(2))
+    sink.add_page(4, None)
+    sink.close()
+    assert not sink.state['complete']
+
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    assert sink.pending(range(1, 5)) == [4]
+    sink.add_page(4, records(4))
+    sink.close()
+    assert sink.state['complete'] and sink.state['failed'] == []
+    assert sorted(saved(sink)) == sorted(titles(range(1, 5)))
+
+    # A completed crawl starts over on the next run
+    sink = RecordSink(str(tmp_path), COLUMNS, source=SOURCE)
+    assert sink.pending(range(1, 5)) == [1, 2, 3, 4]
+
+def test_orphaned_parts_removed(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    sink.pending(range(1, 4))
+    sink.add_page(1, records(1))
+    sink.close(complete=False)
+    # Left behind by a crash: a part written before its checkpoint update,
+    # and one still being written
+    for name in ('part-00001.parquet', 'part-00002.parquet.tmp'):
+        with open(os.path.join(str(tmp_path), name), 'wb') as f:
+            f.write(b'partial')
+
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    assert sorted(n for n in os.listdir(str(tmp_path)) if n.startswith('part-')) == ['part-00000.parquet']
+    assert saved(sink) == titles([1])
+
+def test_reorder_buffer_flushes_in_page_order(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=1, source=SOURCE)
+    sink.pending(range(1, 5))
+    sink.add_page(3, records(3))
+    sink.add_page(2, records(2))
+    # Nothing is written until page 1 arrives
+    assert sink.state['parts'] == [] and sink.last_page == 0
+    sink.add_page(1, records(1))
+    assert sink.last_page == 3 and len(sink.state['parts']) == 3
+    sink.add_page(4, records(4, n=1))
+    sink.close()
+    assert saved(sink) == titles([1, 2, 3]) + titles([4], n=1)
+
+def test_batches_span_pages(tmp_path):
+    sink = RecordSink(str(tmp_path), COLUMNS, batch_size=5, source=SOURCE)
+    sink.pending(range(1, 5))
+    for page in (2, 1, 4, 3):
+        sink.add_page(page, records(page))
+    assert len(sink.state['parts']) == 1 and sink.last_page == 3
+    sink.close()
+    assert len(sink.state['parts']) == 2 and saved(sink) == titles(range(1, 5))
+
+    csv_path = os.path.join(str(tmp_path), 'out.csv')
+    sink.export_csv(csv_path)
+    assert pd.read_csv(csv_path)['Title'].tolist() == titles(range(1, 5))
@@ -0,0 +1,132 @@
+import copy
+import json
+import os
+import threading
+import joblib
+import numpy as np
+import pytest
+from compact_model import CompactForest
+from price_lattice import LATTICE_FILE, build_lattice, grid_axes, load_lattice
+from serving import (FEATURES, INTERVAL, WARMUP_ROW, ModelLoader, model_path, load_model, predict_interval,
+                     predict_interval_one, predict_one)
+from synthetic_data import make_ready
+from model_selection import TARGET, make_pipeline
+
+# The compact export is not committed: model_path() only picks a file, and
+# ModelLoader writes the export in the background once it has loaded a forest
+# from joblib (serving the joblib pipeline until then). The price lattice
+# answers on the app's grid exactly like the model it was built from.
+
+def save(model_dir, name, **params):
+    df = make_ready(500, seed=3)
+    pipeline = make_pipeline(name, **params).fit(df[FEATURES], df[TARGET])
+    joblib.dump(pipeline, os.path.join(model_dir, 'laptop_price_model.joblib'))
+    return pipeline
+
+def load_in_background(model_dir):
+    loader = ModelLoader(model_dir)
+    loader.get(timeout=60)
+    for thread in threading.enumerate():
+        if thread.name == 'model-warmup':
+            thread.join(60)
+    return loader
+
+def test_model_path_has_no_side_effects(tmp_path):
+    save(str(tmp_path), "Random Forest", n_estimators=5)
+    assert model_path(str(tmp_path)).endswith('.joblib')
+    assert os.listdir(str(tmp_path)) == ['laptop_price_model.joblib']
+
+def test_forest_exported_after_background_load(tmp_path):
+    pipeline = save(str(tmp_path), "Random Forest", n_estimators=5)
+    loader = load_in_background(str(tmp_path))
+    assert loader.path.endswith('.joblib')
+    assert model_path(str(tmp_path)) == os.path.join(str(tmp_path), 'laptop_price_model.forest')
+    assert np.isclose(predict_one(load_model(str(tmp_path)), WARMUP_ROW), predict_one(pipeline, WARMUP_ROW))
+
+def test_stale_export_replaced(tmp_path):
+    save(str(tmp_path), "Random Forest", n_estimators=5)
+    load_in_background(str(tmp_path))
+    compact_path = model_path(str(tmp_path))
+    os.utime(compact_path, (0, 0))
+    pipeline = save(str(tmp_path), "Random Forest", n_estimators=7)
+    assert model_path(str(tmp_path)).endswith('.joblib')
+    load_in_background(str(tmp_path))
+    assert model_path(str(tmp_path)) == compact_path
+    assert load_model(str(tmp_path)).n_trees == 7
+    assert np.isclose(predict_one(load_model(str(tmp_path)), WARMUP_ROW), predict_one(pipeline, WARMUP_ROW))
+
+def test_eager_load_does_not_export(tmp_path):
+    save(str(tmp_path), "Random Forest", n_estimators=5)
+    ModelLoader(str(tmp_path), background=False)
+    assert model_path(str(tmp_path)).endswith('.joblib')
+
+def test_other_models_served_from_joblib(tmp_path):
+    save(str(tmp_path), "Linear Regression")
+    load_in_background(str(tmp_path))
+    assert model_path(str(tmp_path)).endswith('.joblib')
+    assert not os.path.exists(os.path.join(str(tmp_path), 'laptop_price_model.forest'))
+
+
+@pytest.fixture(scope='module')
+def forest():
+    # Shallow trees, so the lattice has few slots per axis
+    df = make_ready(500, seed=3)
+    return make_pipeline("Random Forest", n_estimators=5, max_depth=4).fit(df[FEATURES], df[TARGET])
+
+def grid_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{name: values[rng.integers(len(values))] for name, values in grid_axes().items()} for _ in range(n)]
+
+@pytest.fixture(scope='module')
+def lattice(forest, tmp_path_factory):
+    model_dir = str(tmp_path_factory.mktemp('lattice'))
+    build_lattice(CompactForest.from_pipeline(forest), 'abc', os.path.join(model_dir, LATTICE_FILE))
+    return load_lattice(model_dir, 'abc')
+
+def test_lattice_matches_model(forest, lattice):
+    # Grid values the forest cannot tell apart share a slot
+    assert lattice.tensor[..., 0].size < lattice.meta['grid_cells']
+    for row in grid_rows(200):
+        price, bounds = predict_interval_one(forest, row)
+        found = lattice.lookup_interval(row)
+        assert found is not None
+        assert found[0] == pytest.approx(price, rel=1e-6) == lattice.lookup(row)
+        assert found[1] == pytest.approx(bounds, rel=1e-6)
+    # A what-if curve is the model along one axis
+    row = grid_rows(1, seed=1)[0]
+    values, prices = lattice.curve(row, 'RAM')
+    assert prices == pytest.approx([predict_one(forest, dict(row, RAM=value)) for value in values], rel=1e-6)
+
+def test_lattice_off_grid_and_stale(forest, lattice, tmp_path):
+    # Inputs the widgets cannot produce are left to the model
+    row = grid_rows(1)[0]
+    for name, value in (('RAM', 6), ('Display_Inch', 15.65), ('Brand', 'Framework'), ('GPU', None)):
+        assert lattice.lookup(dict(row, **{name: value})) is None
+        assert lattice.lookup_interval(dict(row, **{name: value})) is None
+    # A lattice from another model or format is not used
+    model_dir = str(tmp_path)
+    build_lattice(CompactForest.from_pipeline(forest), 'abc', os.path.join(model_dir, LATTICE_FILE))
+    assert load_lattice(model_dir, 'def') is None
+    sidecar = os.path.join(model_dir, LATTICE_FILE[:-len('.npy')] + '.json')
+    with open(sidecar) as f:
+        meta = json.load(f)
+    with open(sidecar, 'w') as f:
+        json.dump(dict(meta, version=1), f)
+    assert load_lattice(model_dir, 'abc') is None
+
+def test_configurations_fall_back_to_model(forest):
+    # Too many split points for a 63-bit configuration key: every row is
+    # walked instead of deduplicated, with the same prices
+    engine = CompactForest.from_pipeline(forest)
+    rows = grid_rows(50) * 4
+    columns = {name: [row[name] for row in rows] for name in FEATURES}
+    X = engine.encode(columns)
+    assert engine.distinct(X)[1] is not None
+    wide = copy.copy(engine)
+    wide.split_points = [np.arange(2 ** 21, dtype=np.float32)] * len(engine.numeric)
+    assert wide.configurations(X) is None
+    assert wide.distinct(X)[1] is None
+    prices, bounds = predict_interval(forest, columns)
+    got_prices, got_bounds = wide.predict_interval(columns, INTERVAL)
+    np.testing.assert_allclose(got_prices, prices, rtol=1e-6)
+    np.testing.assert_allclose(got_bounds, bounds, rtol=1e-6)